@@ -14,6 +14,18 @@
 #  - This means a supposed R1 might change L1 if the left cube side is located on the right side at that moment in time
 # Amount of robot movements increases by about 85% because of these mechanical contraints
 #
+# Before the translation, the solver moves on opposite faces (i.e. U and D) are merged and reordered, as they commute:
+#  - Consecutive moves on the same face are merged (i.e. U1 D2 U1 becomes U2 D2), or cancelled (i.e. U1 U3)
+#  - The order of two opposite faces moves is selected to minimize the flips and spins, for the tracked orientation
+#
+# When the servos settings are provided, a minimum-time planner searches the robot sequence for the whole solution:
+#  - It tracks the cube orientation, the bottom servo position (CCW, home, CW) and the top cover/lifter position
+#  - Among all the valid spin/flip/rotate sequences, it selects the one with the lowest estimated execution time
+#
+# The robot moves can be packed in a compact binary format, 4 bits per robot move (two moves per byte):
+#  - Codes 1 to 4 are S1, S3, R1, R3; Codes 9 to 15 are the flips F1 to F7 (the flips run length is in the low 3 bits)
+#  - The high nibble is the first move; Code 0 pads the last byte, and it ends the moves
+#
 #
 # Possible moves with this robot
 # 1) Spins the complete cube ("S") laying on the bottom face: 1 means CW 90deg turns, while 3 means 90CCW turn
@@ -29,6 +41,19 @@
 #############################################################################################################
 """
 
+from array import array             # compact arrays, used by the batch translation
+
+try:
+    import heapq                    # priority queue, used by the robot moves planner
+except ImportError:
+    import uheapq as heapq          # priority queue, used by the robot moves planner (MicroPython)
+
+try:
+    import binascii                 # hex conversion of the packed robot moves
+except ImportError:
+    import ubinascii as binascii    # hex conversion of the packed robot moves (MicroPython)
+
+
 # Global variables
 
 # Below dict has all the possible robot movements, related to the cube solver string
@@ -40,7 +65,7 @@ moves_dict = {'U1':'F2R1S3', 'U2':'F2R1S3R1S3', 'U3':'F2S1R3',
               'R1':'S3F1R1', 'R2':'S3F1R1S3R1', 'R3':'S1F3R3'}
 
 
-# Cube orientation at the start, later updated after every cube movement on the robot
+# Cube orientation at the start: Front face facing the viewer, and Upper face upward
 h_faces={'L':'L','F':'F','R':'R'}   # dict with faces around the bottom/upper positioned faces
 v_faces={'D':'D','F':'F','U':'U'}   # dict with faces around the left/right positioned faces
 """     
@@ -58,18 +83,15 @@ v_faces{}   _______
 by knowing 5 faces, the 6th (B face) is also known ;-)
 """ 
 
+# The 18 solver moves, in the same URFDLB order used by the Kociemba solver
+solver_moves = ('U1','U2','U3','R1','R2','R3','F1','F2','F3','D1','D2','D3','L1','L2','L3','B1','B2','B3')
+solver_moves_idx = {move:i for i, move in enumerate(solver_moves)}   # dict from solver move to its index
 
-
-
-
-def starting_cube_orientation():
-    """ Defines the starting cube orientation, that has to be recalled in case the robot is operated multiple times in a single session."""
-    
-    global h_faces,v_faces 
-    
-    # Cube orientation at the start, later updated after every cube movement on the robot
-    h_faces={'L':'L','F':'F','R':'R'}   # dict with faces around the bottom/upper positioned faces
-    v_faces={'D':'D','F':'F','U':'U'}   # dict with faces around the left/right positioned faces
+# Below lists are populated at import time, by the build_transition_table() function
+orientations=[]        # list of the reachable cube orientations, as 'LFRDU' faces strings (index 0 is the starting one)
+transition_table=[]    # list (one row per orientation) of lists (one cell per solver move) of (robot_seq, next_orientation)
+primitive_table=[]     # list (one row per orientation) of next orientation after a flip, a CW spin and a CCW spin
+bottom_faces=[]        # list of the face located at the bottom (D side), per orientation
 
 
 
@@ -136,12 +158,9 @@ def spinCW_effect(h_faces,v_faces):
 
 
 
-def cube_orient_update(movement):
+def cube_orient_update(movement, h_faces, v_faces):
     """ This function traks the cube orientation based on the applied movements by the robot.
-        Arguments is the applied robot movement.
-        The function uses the cube orientation global variables  "h_faces" and "v_faces"."""
-        
-    global h_faces,v_faces
+        Arguments are the applied robot movement, and the cube orientation dicts "h_faces" and "v_faces" to be updated."""
     
     for i in range(len(movement)):                 # iterates over the string of robot movements
         if movement[i] == 'F':                     # case there is a cube flip on robot movements
@@ -151,7 +170,7 @@ def cube_orient_update(movement):
         
         elif movement[i] == 'S':                   # case there is a cube spin on robot movements
             repeats=int(movement[i+1])             # retrieves how many spin
-            if repeats=='3':                       # case the spin is CCW
+            if repeats==3:                         # case the spin is CCW
                 spinCCW_effect(h_faces,v_faces)    # re-order the cube orientation on the robot due to the CCW spin
             else:                                  # case the spin is CW
                 for j in range(repeats):           # iterates over the amount of spin
@@ -162,13 +181,11 @@ def cube_orient_update(movement):
 
 
 
-def adapt_move(move):
+def adapt_move(move, h_faces, v_faces):
     """ This function adapts the robot move after verifying on wich side the related face is located.
         The solver considers the cube orientation to don't change, but on the robot it does.
         This function will then swap the face name, instead to move the cube back on the original position
-        The function returns a dict with all the robot moves and the total amount."""
-    
-    global h_faces,v_faces
+        The function returns the adapted move, for the cube orientation in the h_faces and v_faces arguments."""
     
     face_to_turn = move[0]                        # face to be turned according to the solver 
     rotations = move[1]                           # rotations (string) to be applied according to the solver 
@@ -176,63 +193,245 @@ def adapt_move(move):
     cube_orientation=h_faces.copy()               # generating a single cube orientation dict with h_faces
     cube_orientation.update(v_faces)              # generating a single cube orientation dict with h_faces and v_faces
     
-    solution_in_dict = True                       # boolean for easier code reading... 80% chances the face is in dict...
-    
     for side, face in cube_orientation.items():   # iteration over the current cube orientation dict (5 sides)
         if face == face_to_turn:                  # case the face to be turned is in the dictionary value
             return side+rotations                 # the dictionary key is returned, as the effective face location
-        else:                                     # case the face to be turned is not in the dictionary value
-            solution_in_dict = False              # boolean variable is changed to False
     
-    if solution_in_dict == False:                 # case the face to be turned is not in the dictionary value
-        return 'B'+rotations                      # the face to be turned must be the 6th one, the B side
+    return 'B'+rotations                          # the face to be turned must be the 6th one, the B side
 
 
 
 
 
 
-def optimize_moves(moves):
-    """Removes unnecessary moves that would cancel each other out, to reduce solving moves and time
-    These movements are for instance a spin CW followed by a spin CCW, or viceversa."""
+def orientation_key(h_faces, v_faces):
+    """ Returns a string with the faces located at L, F, R, D and U sides, identifying the cube orientation."""
     
-    optimization = False                 # boolean to track if optimizations are made
-    to_optmize=[]                        # empty list to be populated with string index where optimization is possible
-    str_length=len(moves)                # length of the robot move string
-    idx=0                                # index variable, of optimizable move string locations, to populate the list
-    for i in range(0,str_length,2):      # for loop of with steps = 2
-        
-        if moves[idx:idx+2]=='S1' and moves[idx+2:idx+4] =='S3':  # case S1 is folloved by S3
-#                 print(f'S1 followed by S3 at index {idx}')
-            optimization = True          # boolean to track optimization is set true
-            to_optmize.append(idx)       # list is populated with the index 
-            idx+=4                       # string index is increased by four, to skip the 2nd (already included) move  
-
-        elif moves[idx:idx+2]=='S3'and moves[idx+2:idx+4] =='S1': # case S3 is folloved by S1
-#                 print(f'S3 followed by S1 at index {idx}')
-            optimization = True          # boolean to track optimization is set true
-            to_optmize.append(idx)       # list is populated with the index 
-            idx+=4                       # string index is increased by four, to skip the 2nd (already included) move  
-
-        idx+=2                           # index variable is increased by two, to analayse next move
-        if idx>=str_length+2:            # case the index variable reaches the string end 
-            break                        # for loop is interrupted
-
-    if optimization == False:            # case the moves string had no need to be optimized
-        return moves                     # original moves are returned
-
-    else:                                # case the moves string has the need to be optimized
-        to_remove=[]                     # empty list to be populated with all indididual characters to be removed from the moves
-        for i in to_optmize:                        # iteration over the list of moves to be optimized
-            to_remove.append((i, i+1, i+2, i+3))    # list is populated with the 4 caracters of the 2 moves
-        
-        new_moves=''                                # empty string to hold the new robot moves 
-        remove = [item for sublist in to_remove for item in sublist] # list of characters is flattened
-        for i in range(str_length):                 # iteration over all the characters of original moves
-            if i not in remove:                     # case the index is not included in the list of those to be skipped
-                new_moves+=moves[i]                 # the character is added to the new string of moves 
-        
-        return new_moves                            # the new string of robot moves is returned
+    return h_faces['L'] + h_faces['F'] + h_faces['R'] + v_faces['D'] + v_faces['U']
+
+
+
+
+
+
+def build_transition_table():
+    """ Compiles, once at import time, the cube orientations reachable by the robot and the transition table.
+        For each orientation and each of the 18 solver moves, the table cell holds the robot movements sequence
+        and the index of the cube orientation after that sequence."""
+    
+    global orientations, transition_table, primitive_table, bottom_faces
+    
+    orientations=[orientation_key(h_faces, v_faces)]        # list of orientations, starting from the initial one
+    orient_faces=[(h_faces.copy(), v_faces.copy())]         # list with the h_faces and v_faces dicts per orientation
+    transition_table=[]                                     # empty list to be populated with a row per orientation
+    
+    idx=0                                                   # index of the orientation to be analyzed
+    while idx < len(orientations):                          # iteration until no new orientations are found
+        row=[]                                              # empty list to be populated with a cell per solver move
+        for move in solver_moves:                           # iteration over the 18 solver moves
+            h, v = orient_faces[idx][0].copy(), orient_faces[idx][1].copy()  # copy of the orientation dicts
+            robot_seq=moves_dict[adapt_move(move, h, v)]    # robot movement sequence for the move at this orientation
+            cube_orient_update(robot_seq, h, v)             # cube orientation after the robot movement sequence
+            key=orientation_key(h, v)                       # string identifying the new cube orientation
+            if key not in orientations:                     # case the orientation has not been found yet
+                orientations.append(key)                    # orientation is added to the list of orientations
+                orient_faces.append((h, v))                 # orientation dicts are added to the list
+            row.append((robot_seq, orientations.index(key)))  # robot sequence and next orientation index are stored
+        transition_table.append(row)                        # row of the orientation is added to the table
+        idx+=1                                              # index is increased, to analyze the next orientation
+    
+    primitive_table=[]                                      # empty list to be populated with a row per orientation
+    bottom_faces=[]                                         # empty list to be populated with a face per orientation
+    for h, v in orient_faces:                               # iteration over the orientations dicts
+        row=[]                                              # empty list for the next orientations after F, S1 and S3
+        for movement in ('F1', 'S1', 'S3'):                 # iteration over the single flip and spin robot movements
+            h_next, v_next = h.copy(), v.copy()             # copy of the orientation dicts
+            cube_orient_update(movement, h_next, v_next)    # cube orientation after the robot movement
+            row.append(orientations.index(orientation_key(h_next, v_next)))  # next orientation index is stored
+        primitive_table.append(row)                         # row of the orientation is added to the table
+        bottom_faces.append(v['D'])                         # face at the bottom is added to the list
+
+build_transition_table()      # the transition table is compiled once, at import time
+
+
+
+
+
+
+def merge_moves(solution):
+    """ Groups the solver moves (string without spaces) in blocks of consecutive moves on the same axis, that commute.
+        Moves on the same face are merged (i.e. U1 D2 U1 becomes U2 D2), and removed when cancelling each other out.
+        Returns a list of blocks, each one being a list of [face index, quarter turns] as per the URFDLB faces order."""
+    
+    blocks=[]                                     # empty list to store the blocks of commuting moves
+    for i in range(0, len(solution), 2):          # iteration over the solver moves
+        move_idx=solver_moves_idx[solution[i:i+2]]  # index of the solver move
+        face, turns = move_idx//3, move_idx%3+1   # face index (URFDLB) and quarter turns (1 to 3)
+        if blocks and blocks[-1][0][0]%3 == face%3:  # case the move is on the same axis of the last block
+            block=blocks[-1]                      # last block of commuting moves
+            for entry in block:                   # iteration over the (max two) moves of the block
+                if entry[0]==face:                # case the block has already a move on this face
+                    entry[1]=(entry[1]+turns)%4   # quarter turns are merged
+                    break                         # for loop is interrupted
+            else:                                 # case the block has not a move on this face
+                block.append([face, turns])       # move is added to the block
+            blocks[-1]=[entry for entry in block if entry[1]!=0] # moves cancelled out are removed
+            if not blocks[-1]:                         # case all the moves of the block are cancelled out
+                blocks.pop()                      # block is removed (next move might merge with the previous block)
+        else:                                     # case the move is on another axis
+            blocks.append([[face, turns]])        # a new block is started
+    return blocks
+
+
+
+
+
+
+def reorder_moves(solution):
+    """ Merges and reorders the commuting solver moves (string without spaces), to minimize flips and spins.
+        Dynamic programming over the blocks of commuting moves and the cube orientations, based on the transition table.
+        Returns the solver moves string without spaces (i.e. 'D3U1' instead of 'U1D3', when it saves robot movements)."""
+    
+    blocks=merge_moves(solution)                  # blocks of commuting moves
+    n=len(orientations)                           # amount of cube orientations
+    inf=1000000                                   # cost for not reachable orientations
+    cost=[0]+[inf]*(n-1)                          # amount of flips and spins per orientation (start is index 0)
+    steps=[]                                      # list (one per block) of (previous orientation, moves order)
+    
+    for block in blocks:                          # iteration over the blocks of commuting moves
+        orders=[block] if len(block)==1 else [block, block[::-1]]   # original order first, to be kept on ties
+        new_cost=[inf]*n                          # cost per orientation after this block
+        back=[None]*n                             # previous orientation and moves order per orientation
+        for orient in range(n):                   # iteration over the cube orientations
+            if cost[orient]==inf:                 # case the orientation is not reachable
+                continue                          # next orientation is evaluated
+            for order in orders:                  # iteration over the possible moves orders
+                o, c = orient, cost[orient]       # orientation and cost at the block start
+                for face, turns in order:         # iteration over the moves of the block
+                    robot_seq, o = transition_table[o][3*face+turns-1]   # robot sequence and next orientation
+                    c+=count_moves(robot_seq)-robot_seq.count('R')     # flips and spins of the robot sequence
+                if c<new_cost[o]:                 # case this order reaches the orientation with less flips and spins
+                    new_cost[o]=c                 # cost is updated
+                    back[o]=(orient, order)       # previous orientation and moves order are stored
+        cost=new_cost                             # cost per orientation is updated
+        steps.append(back)                        # previous orientations and moves orders are stored
+    
+    orient=cost.index(min(cost))                  # final orientation with the lowest amount of flips and spins
+    moves=[]                                      # list of solver moves, from the last one
+    for back in reversed(steps):                  # iteration over the blocks, from the last one
+        orient, order = back[orient]              # previous orientation and moves order of the block
+        for face, turns in reversed(order):       # iteration over the moves of the block, from the last one
+            moves.append(solver_moves[3*face+turns-1])  # solver move is added
+    return ''.join(reversed(moves))               # solver moves string is returned, in execution order
+
+
+
+
+
+
+def build_peephole_rules():
+    """ Compiles, once at import time, the rules table of the peephole optimizer of the robot moves string.
+        Keys are couples of consecutive robot moves, values are (replacement moves, rule name)."""
+    
+    global peephole_rules
+    
+    peephole_rules={}                                          # empty dict to be populated with the rules
+    for a, b in (('S1','S3'), ('S3','S1')):                    # spin CW followed by spin CCW, or viceversa
+        peephole_rules[(a,b)]=('', 'spins cancel out')         # the two spins are removed
+    for a, b in (('R1','R3'), ('R3','R1')):                    # rotation CW followed by rotation CCW, or viceversa
+        peephole_rules[(a,b)]=('', 'rotations cancel out')     # the two rotations are removed
+    for i in range(1,4):                                       # iteration over the flips amount of the first move
+        for j in range(1,4):                                   # iteration over the flips amount of the second move
+            flips=(i+j)%4                                      # four flips return the cube to the same orientation
+            peephole_rules[('F'+str(i),'F'+str(j))]=('F'+str(flips) if flips else '', 'flips merged')
+
+peephole_rules={}             # dict with the rules of the peephole optimizer, as (move, move):(replacement, rule name)
+build_peephole_rules()        # the peephole rules table is compiled once, at import time
+
+# Robot moves per 4 bits code of the packed format (None for the unused codes), and codes per robot move
+packed_moves=('', 'S1', 'S3', 'R1', 'R3', None, None, None, None, 'F1', 'F2', 'F3', 'F4', 'F5', 'F6', 'F7')
+packed_codes={move:code for code, move in enumerate(packed_moves) if move}
+
+stream_window=12              # robot moves kept pending by optimize_stream(), as they could still be cancelled
+
+
+
+
+
+
+def optimize_stream(moves, trace=None, window=stream_window):
+    """ Generator removing unnecessary robot moves that would cancel each other out, to reduce solving moves and time.
+        The moves argument is an iterable of robot moves (two characters each, i.e. 'S1'); Finalized moves are yielded
+        while the following moves are still coming, so the robot can start before the whole string is available.
+        Single pass rewrite engine driven by the peephole_rules table: Each robot move is pushed on a stack, and it is
+        rewritten together with the move on top of the stack when a rule applies (i.e. S1S3, R1R3, F1F3 are removed,
+        F1F1 becomes F2); A rewrite can expose a new rule with the previous move (i.e. S1F1F3S3, R1F1F3R3), so the stack
+        reaches the fixed point in linear time. Moves after the last rotation are removed, as the final cube orientation
+        and bottom servo position are irrelevant.
+        Any move on the stack could still be cancelled by the following moves, so the moves are kept pending on the
+        stack up to the window size: The deepest move is yielded when the stack exceeds the window (and the stack has a
+        rotation, so the move is not after the last rotation). Therefore moves cancelling each other out are removed when
+        at most window moves are pending between them (all of them with window=None, yielding at the end only).
+        When a list is provided as trace argument, it is populated with (string index, moves, replacement, rule name)."""
+    
+    stack=[]                                   # stack of the optimized robot moves, not yet final
+    pos=[]                                     # string index, on the original moves, of each move on the stack
+    i=-2                                       # string index of the robot move
+    for move in moves:                         # iteration over the robot moves (two characters each)
+        i+=2                                   # string index of the robot move
+        if move[0]=='F' and int(move[1])>=4:   # case the flips amount is four or more
+            move='F'+str(int(move[1])%4)       # four flips return the cube to the same orientation
+            if move=='F0':                     # case the flips cancel out
+                continue                       # next move is evaluated
+        idx=i                                  # string index of the move to be pushed
+        while stack and (stack[-1], move) in peephole_rules:   # case the move can be rewritten with the previous one
+            replacement, rule = peephole_rules[(stack[-1], move)]
+            if trace is not None:              # case the trace is requested
+                trace.append((pos[-1], stack[-1]+move, replacement, rule))
+            stack.pop()                        # previous move is removed from the stack
+            idx=pos.pop()                      # string index of the previous move
+            if not replacement:                # case the two moves cancel out
+                move=''                        # no move to be pushed
+                break                          # while loop is interrupted
+            move=replacement                   # the replacement is checked against the new top of the stack
+        if move:                               # case there is a move to be pushed on the stack
+            stack.append(move)                 # move is added to the stack
+            pos.append(idx)                    # string index of the move
+            if window is not None and len(stack)>window and any([m[0]=='R' for m in stack]):   # case of too many pending moves
+                pos.pop(0)                     # string index of the deepest move is removed
+                yield stack.pop(0)             # deepest move is finalized, and returned
+    
+    while stack and stack[-1][0]!='R':         # case the last move is not a rotation
+        if trace is not None:                  # case the trace is requested
+            trace.append((pos[-1], stack[-1], '', 'moves after the last rotation'))
+        stack.pop()                            # last move is removed
+        pos.pop()                              # string index of the last move is removed
+    for final_move in stack:                   # iteration over the remaining moves
+        yield final_move                       # finalized robot move is returned
+
+
+
+
+
+
+def split_moves(moves):
+    """ Generator of the robot moves (two characters each, i.e. 'F2') from a robot moves string."""
+    
+    for i in range(0, len(moves), 2):          # iteration over the robot moves string
+        yield moves[i:i+2]                     # robot move is returned
+
+
+
+
+
+
+def optimize_moves(moves, trace=None):
+    """ Removes unnecessary moves that would cancel each other out, to reduce solving moves and time.
+        Returns the robot moves string, as per optimize_stream() applied to the whole string without window: All the
+        moves are pending until the end, so the string is the fixed point of the rewrite (a second pass changes nothing)
+        and it ends with a rotation. The streamed robot moves differ only when moves cancel out beyond the window."""
+    
+    return ''.join(optimize_stream(split_moves(moves), trace, None))   # the new string of robot moves is returned
 
 
 
@@ -261,31 +460,403 @@ def count_moves(moves):
 
 
 
-def robot_required_moves(solution, solution_Text):
-    """ This function splits the cube manouvre from Kociemba solver string, and generates a dict with all the robot movements."""
+def encode_moves(moves):
+    """ Packs the robot moves (string, or iterable of robot moves like 'F2') in a bytearray, 4 bits per robot move.
+        Codes are as per packed_moves tuple; The high nibble holds the first move, and an odd last move is padded by 0."""
     
-    global h_faces,v_faces
+    if isinstance(moves, str):                 # case the robot moves are a string
+        moves = split_moves(moves)             # iterator of the robot moves (two characters each)
+    data = bytearray()                         # packed robot moves
+    high = -1                                  # code of the move waiting for the low nibble (-1 when none)
+    for move in moves:                         # iteration over the robot moves
+        code = packed_codes.get(move, 0)       # 4 bits code of the robot move
+        if code == 0:                          # case the move cannot be packed
+            raise ValueError('not a robot move: ' + str(move))
+        if high < 0:                           # case the move goes on the high nibble
+            high = code                        # code is kept for the next byte
+        else:                                  # case the move goes on the low nibble
+            data.append(high << 4 | code)      # byte with two robot moves is added
+            high = -1                          # no code is waiting
+    if high >= 0:                              # case of an odd amount of moves
+        data.append(high << 4)                 # last move is padded with the 0 code
+    return data                                # bytearray with the packed robot moves is returned
+
+
+
+
+
+
+def decode_moves(data):
+    """ Generator of the robot moves (two characters each, i.e. 'F2') from the packed robot moves (bytes or bytearray).
+        The moves are the strings of the packed_moves tuple, so no new string is created while decoding."""
+    
+    for byte in data:                          # iteration over the packed bytes
+        code = byte >> 4                       # code of the first move, on the high nibble
+        if code == 0:                          # case of the padding code
+            return                             # generator is terminated
+        yield packed_moves[code]               # robot move is returned
+        code = byte & 15                       # code of the second move, on the low nibble
+        if code == 0:                          # case of the padding code
+            return                             # generator is terminated
+        yield packed_moves[code]               # robot move is returned
+
+
+
+
+
+
+def unpack_moves(data):
+    """ Returns the robot moves string from the packed robot moves."""
+    
+    return ''.join(decode_moves(data))         # robot moves string is returned
+
+
+
+
+
+
+def count_packed_moves(data):
+    """ Counts the total amount of robot movements, as per count_moves(), from the packed robot moves."""
+    
+    robot_tot_moves = 0                        # counter for all the robot movements
+    for byte in data:                          # iteration over the packed bytes
+        for code in (byte >> 4, byte & 15):    # iteration over the two moves codes of the byte
+            if code >= 8:                      # case of a flip, with the amount of flips on the low 3 bits
+                robot_tot_moves += code & 7    # increases by the amount of flips
+            elif code > 0:                     # case of a cube spin or a layer rotation
+                robot_tot_moves += 1           # increases by 1 the total amount of robot movements
+    return robot_tot_moves                     # total amount of robot moves is returned
+
+
+
+
+
+
+def packed_hex(data):
+    """ Returns the packed robot moves as hex text, to be sent on the UART (i.e. 'F2R1S3' is 'a320')."""
+    
+    return binascii.hexlify(data).decode()     # hex text of the packed robot moves
+
+
+
+
+
+
+def packed_from_hex(text):
+    """ Returns the packed robot moves (bytearray) from the hex text made by packed_hex()."""
+    
+    return bytearray(binascii.unhexlify(text)) # packed robot moves
+
+
+
+
+
+
+def estimate_robot_time(moves, settings):
+    """ Estimates the robot execution time, by replaying the robot moves string through a model of the servos
+        state machine in Cubotino_servos.servo_solve_cube() (top cover/lifter position and bottom servo position).
+        Settings argument is the servos settings tuple, with same order as in Cubotino_settings.txt (times in ms).
+        Returns the estimated time in secs, and a list with the per-move breakdown as (string index, move, time in ms)."""
+    
+    t_flip_to_close_time = settings[4]  # time to lower the cover/flipper from flip to close position
+    t_close_to_flip_time = settings[5]  # time to raise the cover/flipper from close to flip position
+    t_flip_open_time = settings[6]      # time to raise/lower the flipper between open and flip positions
+    t_open_close_time = settings[7]     # time to raise/lower the flipper between open and close positions
+    b_spin_time = settings[13]          # time needed to the bottom servo to spin about 90deg
+    b_rotate_time = settings[14]        # time needed to the bottom servo to rotate about 90deg
+    b_rel_time = settings[15]           # time needed to the servo to rotate slightly back, to release tensions
+    
+    top_cover='open'                    # top cover/lifter position at the start
+    b_servo_pos='home'                  # bottom servo position at the start ('home', 'CW' or 'CCW')
+    breakdown=[]                        # empty list to be populated with the per-move estimated time
+    tot_time=0                          # estimated total time in ms
+    str_length=len(moves)               # length of the robot move string
+    
+    for i in range(0,str_length,2):     # iteration over the moves string, with steps = 2
+        move=moves[i:i+2]               # robot move (i.e. 'F2', 'S3', 'R1')
+        move_time=0                     # estimated time for this move, in ms
+        
+        if move[0]=='F':                                 # case there is a flip on the move string
+            flips=int(move[1])                           # number of flips
+            for flip in range(flips):                    # iterates over the number of requested flips
+                if top_cover=='close':                   # case the lifter is raised from close position
+                    move_time+=t_close_to_flip_time      # time to reach the flip position from close
+                elif top_cover=='open':                  # case the lifter is raised from open position
+                    move_time+=t_flip_open_time          # time to reach the flip position from open
+                top_cover='flip'                         # cover/lifter position is at flip
+                if flip<(flips-1):                       # case there are further flippings to do
+                    move_time+=t_flip_open_time          # time to lower the lifter to open position
+                    top_cover='open'                     # cover/lifter position is at open
+            if i+2<str_length:                           # case there is a following command on the moves string
+                if moves[i+2]=='R':                      # case the next action is a 1st layer rotation
+                    move_time+=t_flip_to_close_time      # time to lower the lifter to close position
+                    top_cover='close'                    # cover/lifter position is at close
+                elif moves[i+2]=='S':                    # case the next action is a cube spin
+                    move_time+=t_flip_open_time          # time to lower the lifter to open position
+                    top_cover='open'                     # cover/lifter position is at open
+        
+        elif move[0]=='S':                               # case there is a cube spin on the move string
+            if b_servo_pos=='home':                      # case the bottom servo is at home
+                b_servo_pos='CCW' if move[1]=='3' else 'CW'  # bottom servo spins out from home
+            else:                                        # case the bottom servo is at full CW or CCW position
+                b_servo_pos='home'                       # bottom servo spins back to home
+            move_time+=b_spin_time                       # time for the bottom servo to spin
+        
+        elif move[0]=='R':                               # case there is a cube 1st layer rotation
+            direction='CCW' if move[1]=='3' else 'CW'    # rotation direction
+            if b_servo_pos=='home' or b_servo_pos!=direction:  # case the rotation is within the servo range
+                if top_cover=='flip':                    # case the lifter is at flip position
+                    move_time+=t_flip_to_close_time      # time to lower the cover to close position
+                elif top_cover=='open':                  # case the cover is at open position
+                    move_time+=t_open_close_time         # time to lower the cover to close position
+                move_time+=b_rotate_time+b_rel_time      # time to rotate the layer, and to release the tensions
+                move_time+=t_open_close_time             # time to raise the cover to open position
+                top_cover='open'                         # cover/lifter position is at open
+                b_servo_pos=direction if b_servo_pos=='home' else 'home'  # bottom servo position after the rotation
+        
+        breakdown.append((i, move, move_time))           # per-move estimated time is appended to the list
+        tot_time+=move_time                              # total estimated time is increased
+    
+    return tot_time/1000, breakdown     # estimated time in secs, and per-move breakdown, are returned
+
+
+
+
+
+
+def primitive_costs(settings):
+    """ Returns the times (ms) of the robot primitives, as per estimate_robot_time(), from the servos settings:
+        Tuple of (flip, spin, rotation) times, each as (time with the cover open, time with the cover at flip)."""
+    
+    t_flip_to_close_time = settings[4]  # time to lower the cover/flipper from flip to close position
+    t_flip_open_time = settings[6]      # time to raise/lower the flipper between open and flip positions
+    t_open_close_time = settings[7]     # time to raise/lower the flipper between open and close positions
+    b_spin_time = settings[13]          # time needed to the bottom servo to spin about 90deg
+    b_rotate_time = settings[14]        # time needed to the bottom servo to rotate about 90deg
+    b_rel_time = settings[15]           # time needed to the servo to rotate slightly back, to release tensions
+    
+    r_time = b_rotate_time + b_rel_time + t_open_close_time     # rotation time, excluding the cover lowering
+    return ((t_flip_open_time, 2*t_flip_open_time),             # a flip from flip position goes via open
+            (b_spin_time, b_spin_time + t_flip_open_time),      # the lifter is lowered to open before spin
+            (r_time + t_open_close_time, r_time + t_flip_to_close_time))   # cover lowered to close, then raised to open
+
+
+
+
+
+
+def robot_primitives(o, a, c, flip, rotate, costs):
+    """ Returns the robot primitives from the cube orientation o, bottom servo position a (0=CCW, 1=home, 2=CW) and
+        top cover/lifter position c (0=open, 1=flip), as list of (robot move, time, orientation, servo position, cover,
+        quarter turns of the bottom face). The flip is included when flip is True, the rotations when rotate is True.
+        Times are as per primitive_costs(); Shared by plan_robot_moves() and the robot-metric search."""
+    
+    primitives = []                                             # list of the robot primitives
+    if flip:                                                    # case the flip is allowed
+        primitives.append(('F', costs[0][c], primitive_table[o][0], a, 1, 0))
+    if a < 2:                                                   # case the bottom servo can spin CW
+        primitives.append(('S1', costs[1][c], primitive_table[o][1], a+1, 0, 0))
+    if a > 0:                                                   # case the bottom servo can spin CCW
+        primitives.append(('S3', costs[1][c], primitive_table[o][2], a-1, 0, 0))
+    if rotate:                                                  # case the rotations are allowed
+        if a < 2:                                               # case the bottom servo can rotate CW
+            primitives.append(('R1', costs[2][c], o, a+1, 0, 1))
+        if a > 0:                                               # case the bottom servo can rotate CCW
+            primitives.append(('R3', costs[2][c], o, a-1, 0, 3))
+    return primitives
+
+
+
+
+
+
+def plan_robot_moves(solution, settings):
+    """ Minimum-time planner of the robot moves, for the whole solver solution (string without spaces).
+        A* search over the solver move index, the order of the commuting moves (opposite faces), cube orientation,
+        bottom servo position (CCW, home, CW), top cover/lifter position (open, flip) and the quarter turns already
+        applied to the face to be turned. Same face moves are merged first (merge_moves).
+        Move costs are those of estimate_robot_time(), as robot primitives (robot_primitives), based on the servos
+        settings in argument.
+        Returns a dict with the robot moves per solver move (in execution order), and the robot moves string."""
+    
+    costs = primitive_costs(settings)                           # times of the robot primitives
+    primitives = {}                                             # dict of the robot primitives, per robot state
+    
+    faces = []                                                  # faces to be turned, per solver move
+    turns = []                                                  # quarter turns (1, 2 or 3) per solver move
+    pair = []                                                   # True when the move commutes with the next one
+    for block in merge_moves(solution):                         # iteration over the blocks of commuting moves
+        for i, (face, turn) in enumerate(block):                # iteration over the (max two) moves of the block
+            faces.append('URFDLB'[face])                        # face to be turned
+            turns.append(turn)                                  # quarter turns
+            pair.append(i < len(block)-1)                       # the first move of a two moves block can be swapped
+    blocks = len(faces)                                         # total amount of solver moves
+    pair.append(False)                                          # no move after the last one
+    
+    r_min = min(costs[2])                                       # minimum time of a rotation (heuristic unit)
+    r_need = [2 if turn==2 else 1 for turn in turns] + [0, 0]   # min amount of rotations per solver move
+    r_left = [0]*(blocks+2)                                     # min amount of rotations from each solver move
+    for b in range(blocks-1, -1, -1):                           # iteration over the solver moves, from the last one
+        r_left[b] = r_left[b+1] + r_need[b]                     # rotations of this and the following moves
+    
+    # state is coded as integer: solver move, order (0=as is, 1=next move first, 2=this move after the next one),
+    # orientation, servo pos (0=CCW, 1=home, 2=CW), cover (0=open, 1=flip), quarter turns of the face to be turned
+    start = (((0*3 + 0)*24 + 0)*3 + 1)*2*4                      # first solver move, starting orientation, home, open
+    best = {start:0}                                            # dict with the lowest time found per state
+    parent = {start:None}                                       # dict with the previous state and the robot move
+    queue = [(r_left[0]*r_min, 0, start)]                       # priority queue of (estimated total, time, state)
+    goal = -1                                                   # final state, set when the search completes
+    
+    while queue:                                                # iteration until the priority queue has states
+        f, g, key = heapq.heappop(queue)                        # state with the lowest estimated total time
+        if g > best[key]:                                       # case the state has already been reached faster
+            continue                                            # the state is skipped
+        t = key % 4                                             # quarter turns applied to the face to be turned
+        c = (key//4) % 2                                        # top cover/lifter position
+        a = (key//8) % 3                                        # bottom servo position
+        o = (key//24) % 24                                      # cube orientation
+        k = (key//576) % 3                                      # order of the commuting moves
+        b = key//1728                                           # solver move index
+        if b >= blocks:                                         # case all the solver moves are done
+            goal = key                                          # final state is assigned
+            break                                               # while loop is interrupted
+        
+        m = b+1 if k == 1 else b                                # solver move to be done now
+        bk = (b*3 + k)*24                                       # state part of the solver move and moves order
+        successors = []                                         # list of (robot move, time, next state)
+        if t == 0 and k == 0 and pair[b]:                       # case the next commuting move can be done first
+            successors.append(('', 0, key + 576))               # same state, with the next move done first
+        if k == 1:                                              # case the next move has been done first
+            done = b*3 + 2                                      # this solver move follows
+        elif k == 2:                                            # case this move follows the next one
+            done = (b+2)*3                                      # the solver move after the next one follows
+        else:                                                   # case the moves are done as they are
+            done = (b+1)*3                                      # the next solver move follows
+        rotate = bottom_faces[o] == faces[m]                    # the face to be turned is at the bottom
+        pkey = (((o*3 + a)*2 + c)*2 + (t == 0))*2 + rotate      # robot state, and the allowed primitives
+        if pkey not in primitives:                              # case the primitives are not listed yet
+            primitives[pkey] = robot_primitives(o, a, c, t == 0, rotate, costs)
+        for move, cost, no, na, nc, dt in primitives[pkey]:     # iteration over the robot primitives
+            if dt == 0:                                         # case of flip or spin
+                successors.append((move, cost, (((bk + no)*3 + na)*2 + nc)*4 + t))
+            else:                                               # case of rotation
+                nt = (t + dt) % 4                               # quarter turns after the rotation
+                if nt == turns[m]:                              # case the solver move is completed
+                    nkey = ((done*24 + no)*3 + na)*2*4          # state at the following solver move
+                else:                                           # case the solver move is not completed
+                    nkey = ((bk + no)*3 + na)*2*4 + nt          # state with updated quarter turns
+                successors.append((move, cost, nkey))
+        
+        for move, cost, nkey in successors:                     # iteration over the successor states
+            ng = g + cost                                       # time to reach the successor state
+            if nkey not in best or ng < best[nkey]:             # case the successor state is reached faster
+                best[nkey] = ng                                 # lowest time is updated
+                parent[nkey] = (key, move)                      # previous state and robot move are stored
+                nb = nkey//1728                                 # solver move index of the successor state
+                nk = (nkey//576) % 3                            # moves order of the successor state
+                nt = nkey % 4                                   # quarter turns of the successor state
+                if nb >= blocks:                                # case all the solver moves are done
+                    h = 0                                       # no rotations are left
+                elif nk == 0:                                   # case the moves are done as they are
+                    h = r_left[nb] if nt == 0 else r_left[nb+1] + 1
+                elif nk == 1:                                   # case the next move is done first
+                    h = r_left[nb] if nt == 0 else r_need[nb] + r_left[nb+2] + 1
+                else:                                           # case this move follows the next one
+                    h = r_need[nb] + r_left[nb+2] if nt == 0 else r_left[nb+2] + 1
+                heapq.heappush(queue, (ng + h*r_min, ng, nkey)) # successor state is added to the priority queue
+    
+    robot_seqs = [[] for b in range(blocks)]                    # list of robot moves per solver move, in execution order
+    key = goal                                                  # path is reconstructed from the final state
+    while parent[key] is not None:                              # iteration until the starting state
+        key, move = parent[key]                                 # previous state and robot move
+        if move:                                                # case the robot move is not the moves order choice
+            slot = key//1728 + (1 if (key//576) % 3 == 2 else 0)  # execution position of the solver move
+            robot_seqs[slot].append(move)                       # robot move is added to its solver move
+    
+    robot = {}                                                  # dict with the robot moves per solver move
+    for b in range(blocks):                                     # iteration over the solver moves
+        seq = ''                                                # string of robot moves for the solver move
+        flips = 0                                               # counter of consecutive flips
+        for move in reversed(robot_seqs[b]):                    # iteration over the robot moves, in execution order
+            if move == 'F':                                     # case the robot move is a flip
+                flips += 1                                      # consecutive flips are counted
+            else:                                               # case the robot move is a spin or a rotation
+                if flips > 0:                                   # case there are flips before this move
+                    seq += 'F' + str(flips)                     # consecutive flips are grouped (i.e. 'F2')
+                    flips = 0                                   # counter of consecutive flips is reset
+                seq += move                                     # spin or rotation is added
+        robot[b] = seq                                          # robot moves for the solver move are stored
+    
+    return robot, ''.join([robot[b] for b in range(blocks)])    # dict and string with the robot moves are returned
+
+
+
+
+
+
+def raw_robot_moves(solution):
+    """ Generator of the robot moves (two characters each), before the optimize_stream() rewrite, for the solver solution
+        (string without spaces): Each solver move is translated via the transition table, when needed.
+        The minimum-time planner is not streamed, as it yields nothing before the whole search is done: The planned
+        robot moves are sent as packed program instead (encode_moves)."""
+    
+    solution=reorder_moves(solution)          # commuting moves are merged and reordered, to save flips and spins
+    orient=0                                  # cube orientation index at the start (Front facing the viewer, Upper upward)
+    for block in range(len(solution)//2):     # iteration over blocks of movements
+        robot_seq, orient = transition_table[orient][solver_moves_idx[solution[2*block:2*block+2]]]
+        for move in split_moves(robot_seq):   # iteration over the robot moves of the solver move
+            yield move                        # robot move is returned
+
+
+
+
+
+
+def robot_moves_stream(solution):
+    """ Streaming translation of the Kociemba solver solution into robot moves, yielded one by one (i.e. 'F2').
+        The yielded moves are the same of the robot moves string returned by robot_required_moves() without the servos
+        settings (unless moves cancel out beyond the stream window, as checked on random solutions by Cubotino_checks),
+        so the moves string index (twice the moves count) can be used for the progress feedback."""
+    
+    solution=solution.strip().replace(" ", "")  # eventual empty spaces are removed from the string
+    return optimize_stream(raw_robot_moves(solution))   # generator of the finalized robot moves
+
+
+
+
+
+
+def robot_required_moves(solution, solution_Text, settings=None):
+    """ This function splits the cube manouvre from Kociemba solver string, and generates a dict with all the robot movements.
+        Commuting solver moves (opposite faces) are merged and reordered first, to reduce flips and spins.
+        When the servos settings are provided, the robot moves are planned for the minimum execution time.
+        Without settings, each solver move is translated with a single lookup on the transition table."""
     
     solution=solution.strip()                     # eventual empty spaces are removed from the string
     solution=solution.replace(" ", "")            # eventual empty spaces are removed from the string
-    starting_cube_orientation()                   # Cube orientation at the start, later updated after every cube movement on the robot
     robot={}                                      # empty dict to store all the robot moves
     moves=''                                      # empty string to store all the robot moves
     robot_tot_moves = 0                           # counter for all the robot movements
     
     if solution_Text != 'Error':                  # case the solver did not return an error
-        blocks = int(round(len(solution)/2,0))    # total amount of blocks of movements (i.e. U2R1L3 are 3 blocks: U2, R1 and L1)
+        if settings is not None and len(settings)>=16:   # case the servos settings are available
+            robot, moves = plan_robot_moves(solution, settings)   # minimum-time robot moves (with commuting moves order)
+        
+        else:                                     # case the servos settings are not available
+            solution=reorder_moves(solution)      # commuting moves are merged and reordered, to save flips and spins
+            blocks = int(round(len(solution)/2,0))    # total amount of blocks of movements (i.e. U2R1L3 are 3 blocks: U2, R1 and L1)
+            orient = 0                                # cube orientation index at the start (Front facing the viewer, Upper upward)
+            robot_seqs=[]                             # empty list to store the robot sequences, in solution order
+            
+            # robot movement sequence selection, and cube orientation update, via the transition table
+            for block in range(blocks):               # iteration over blocks of movements
+                move=solution[2*block:2*block+2]      # move to be applied on this block, according to the solver
+                robot_seq, orient = transition_table[orient][solver_moves_idx[move]]  # robot sequence and next orientation
+                robot[block]=robot_seq                # robot movements dict is updated
+                robot_seqs.append(robot_seq)          # robot movements list is updated
+            
+            moves=''.join(robot_seqs)                 # robot movements string
         
-        # cube orientation and robot movement sequence selection
-        for block in range(blocks):               # iteration over blocks of movements
-            move=solution[:2]                     # move to be applied on this block, according to the solver
-            solution=solution[2:]                 # remaining movements from the solver are updated
-            adapted_move=adapt_move(move)         # the move from solver is adapted considering the real cube orientation
-            robot_seq=moves_dict[adapted_move]    # robot movement sequence is retrieved
-            robot[block]=robot_seq                # robot movements dict is updated
-            moves+=robot_seq                      # robot movements string is updated
-            cube_orient_update(robot_seq)         # cube orientation updated after the robot move from this block
-                           
         moves=optimize_moves(moves)               # removes unnecessary moves (that would cancel each other out)
         robot_tot_moves = count_moves(moves)      # counter for the total amount of robot movements
         
@@ -293,6 +864,30 @@ def robot_required_moves(solution, solution_Text):
 
 
 
+def translate_batch(solutions, settings=None):
+    """ Translates a batch of solver solutions (strings, with or without spaces) into robot moves.
+        The translation is stateless: It only reads the tables compiled at import time, so it is re-entrant and it can be
+        called from multiple threads. When the servos settings are provided, the robot moves are planned for the minimum
+        time and the robot time is estimated; Without settings the estimated times are zero.
+        Returns a list with the robot moves strings, an array with the total robot moves and an array with the
+        estimated robot times (secs), in the same order as the solutions."""
+    
+    robot_strings=[]                              # list of robot moves strings
+    counts=array('H')                             # array of total robot moves per solution
+    times=array('f')                              # array of estimated robot time (secs) per solution
+    planned = settings is not None and len(settings)>=16   # case the servos settings are available
+    
+    for solution in solutions:                    # iteration over the solver solutions
+        robot, moves, robot_tot_moves = robot_required_moves(solution, "", settings)   # robot moves
+        robot_strings.append(moves)               # robot moves string is added to the list
+        counts.append(robot_tot_moves)            # total robot moves is added to the array
+        times.append(estimate_robot_time(moves, settings)[0] if planned else 0)   # estimated robot time
+    
+    return robot_strings, counts, times           # lists and arrays are returned
+
+
+
+
 
 
 if __name__ == "__main__":
@@ -326,6 +921,10 @@ if __name__ == "__main__":
     
     print(f'\nstring command to the robot servos driver: {moves}\n')
     
+    settings=(54,68,76,0,900,1000,800,300,51,76,101,2,3,1100,1200,100,'small','small')  # default servos settings
+    robot_time, breakdown = estimate_robot_time(moves, settings)   # estimated robot time, with the default settings
+    print(f'estimated robot time, with default servos settings: {robot_time} secs\n')
+    
     
     
     
@@ -43,6 +43,7 @@ settings_status=False           # boolean to track the servos settings uploading
 robot_init_status=False         # boolean to track the servos inititialization status
 stop_servos=True                # boolean to stop the servos during solving proces: It is set true at the start, servos cannot operate
 fun_status=False                # boolean to track the robot fun status, it is True after solving the cube :-)
+servo_settings=()               # tuple with the servos settings, as uploaded from Cubotino_settings.txt
 
 
 def init_servo(debug=False):
@@ -89,7 +90,7 @@ def upload_settings():
     
     global t_servo_flip, t_servo_open, t_servo_close, t_servo_rel, t_flip_to_close_time, t_close_to_flip_time, t_flip_open_time, t_open_close_time
     global b_servo_CCW, b_home, b_servo_CW, b_servo_CCW_rel, b_servo_CW_rel, b_home_from_CW, b_home_from_CCW
-    global b_rotate_time, b_rel_time, b_spin_time
+    global b_rotate_time, b_rel_time, b_spin_time, servo_settings
     
     
     # import settings from the text file
@@ -130,6 +131,7 @@ def upload_settings():
             t_srv_pw_range = settings[16]  # top servo pulse width range (string variable)
             b_srv_pw_range = settings[17]  # bottom servo pulse width range (string variable)
             
+            servo_settings = tuple(settings)  # tuple with the servos settings, used to plan the robot moves
 
             b_servo_CCW_rel=b_servo_CCW + b_extra_sides   # bottom servo position to rel tensions when fully CW
             b_servo_CW_rel=b_servo_CW - b_extra_sides     # bottom servo position to rel tensions when fully CCW
@@ -555,6 +557,44 @@ def check_moves(moves, debug):
 
 
 
+def check_packed_moves(data, debug):
+    """ Function that counts the total servo moves, and verifies the servo rotation contraints as per check_moves(),
+        on the packed robot moves (bytearray, 4 bits per robot move as per Cubotino_moves.packed_moves).
+        Codes 1 and 3 are the CW spin and rotation, codes 2 and 4 the CCW ones, codes from 9 are the flips."""
+    
+    servo_angle=0                                                 # initial angle is set to zero, as this is the starting condition at string receival
+    servo_angle_ok=True                                           # boolean to track the check result
+    tot_moves=0                                                   # counter for the total amount of servo moves
+    
+    for i in range(2*len(data)):                                  # iteration over all the moves codes (two per byte)
+        code = data[i>>1] >> 4 if i&1==0 else data[i>>1] & 15     # code of the robot move, from the high or low nibble
+        if code == 0:                                             # case of the padding code
+            break                                                 # for loop is interrupted
+        elif code >= 8:                                           # case there is a flip, the amount is on the low 3 bits
+            tot_moves+=code & 7                                   # counter is increased
+        elif code & 1:                                            # case direction is CW (S1 or R1)
+            servo_angle+=90                                       # positive 90deg angle are added to the angle counter
+            tot_moves+=1                                          # counter is increased
+        else:                                                     # case direction is CCW (S3 or R3)
+            servo_angle-=90                                       # negative 90deg angle are subtracted from the angle counter
+            tot_moves+=1                                          # counter is increased
+        
+        if servo_angle<-90 or servo_angle>180:                    # case the angle counter is out of range
+            if debug:
+                print(f'servo_angle out of range at move:{i}')    # info are printed
+            servo_angle_ok=False                                  # bolean of results is updated
+            break                                                 # for loop is interrupted
+    
+    if servo_angle_ok==True and debug:                            # case the coolean is still positive
+        print('servo_angle within range')                         # positive result is printed
+
+    return servo_angle_ok, tot_moves                              # check result and total counter are returned
+
+
+
+
+
+
 def check_uart(debug, stop_btn, btn_ref):
     """ Function that checks if there are info received by the uart.
         When the robot is solving, this function is frequently called to check whether a STOP request has been received."""
@@ -665,31 +705,72 @@ def fun(debug):
 
 
 
+def next_move(moves):
+    """ Returns the next robot move from the moves iterator, or None when the iterator is exhausted."""
+    
+    try:
+        return next(moves)                         # next robot move
+    except StopIteration:                          # case there are no more robot moves
+        return None                                # None is returned
+
+
+
+
+
+
 def servo_solve_cube(moves, debug, stop_btn, btn_ref):
     """ Function that translates the received string of moves, into servos sequence activations.
+        The moves argument can also be an iterator of robot moves (i.e. Cubotino_moves.robot_moves_stream()), consumed
+        while the servos are operating, so the robot starts before the whole robot moves string is available.
+        The moves argument can also be a bytearray with the packed robot moves (Cubotino_moves.encode_moves()), decoded
+        while the servos are operating.
         This is substantially the main function."""
     
     global t_top_cover, b_servo_operable, b_servo_stopped, b_servo_home, stop_servos
     start_time=time()
     end_time=time()
     
-    # the received string is analyzed if compatible with servo rotation contraints, and amount of movements
-    servo_angle_ok, tot_moves = check_moves(moves, debug)    
+    stream = False                                           # the robot moves are checked in advance (string or packed)
+    if isinstance(moves, str):                               # case the moves are a string
+        # the received string is analyzed if compatible with servo rotation contraints, and amount of movements
+        servo_angle_ok, tot_moves = check_moves(moves, debug)
+        moves_string = moves                                 # robot moves string
+        moves = (moves_string[i:i+2] for i in range(0, len(moves_string), 2))   # iterator of the robot moves (two characters each)
+    elif isinstance(moves, (bytes, bytearray)):             # case the moves are packed (4 bits per robot move)
+        import Cubotino_moves as cubotino                    # module with the packed robot moves decoder
+        servo_angle_ok, tot_moves = check_packed_moves(moves, debug)   # servo rotation contraints, and amount of movements
+        moves = cubotino.decode_moves(moves)                 # iterator of the robot moves, decoded from the packed bytes
+    else:                                                    # case the moves are an iterator (streaming translation)
+        tot_moves = 0                                        # total amount of movements is not known in advance
+        stream = True                                        # the robot moves are checked, and counted, while consumed
     if debug:
         print(f'total amount of servo movements: {tot_moves}\n')    
     
     start_moves=tot_moves                                    # start moves is the calculates movements prior starting
     remaining_moves=tot_moves                                # at start the remaining moves are obviosly all the moves
     
-    string_len=len(moves)                                    # number of characters in the moves string
-    for i in range(string_len):                              # iteration over the characters of the moves string
+    move = next_move(moves)                                  # first robot move (None when there are no moves)
+    i = 0                                                    # string index of the robot move, for the progress feedback
+    while move is not None:                                  # iteration over the robot moves
+        following = next_move(moves)                         # following robot move, needed after the flips
         stop_servos=check_uart(debug, stop_btn, btn_ref)     # check is a stop request has been received at uart
         if stop_servos:                                      # case there is a stop request for servos
-            break                                            # the foor loop in interrupted
+            break                                            # the while loop in interrupted
+        
+        if stream:                                           # case the moves have not been checked in advance
+            if move[0]=='F':                                 # case of flips
+                tot_moves+=int(move[1])                      # counter is increased
+            elif (move[1]=='1' and b_servo_CW_pos) or (move[1]=='3' and b_servo_CCW_pos):   # case of spin or rotation beyond the out-position
+                if debug:
+                    print(f'servo_angle out of range at string pos:{i}')   # info are printed
+                stop_servos=True                             # robot is stopped, before moving the servo out of range
+                break                                        # the while loop in interrupted
+            else:                                            # case of spin or rotation within the servo range
+                tot_moves+=1                                 # counter is increased
         
         
-        if moves[i]=='F':                                    # case there is a flip on the move string
-            flips=int(moves[i+1])                            # number of flips
+        if move[0]=='F':                                     # case there is a flip on the move string
+            flips=int(move[1])                               # number of flips
             if debug:
                 print(f'To do F{flips}')                     # for debug
             
@@ -707,16 +788,16 @@ def servo_solve_cube(moves, debug, stop_btn, btn_ref):
 # alternative choice
 #                     flip_to_close()   # lifter is lowered stopping the top cover in close position (cube constrained, for better facelets alignment)
                 
-                if flip==(flips-1) and string_len-(i+2)>0:   # case it's the last flip and there is a following command on the move string
-                    if moves[i+2]=='R':                      # case the next action is a 1st layer cube rotation
+                if flip==(flips-1) and following is not None:   # case it's the last flip and there is a following command on the move string
+                    if following[0]=='R':                    # case the next action is a 1st layer cube rotation
                         flip_to_close()                      # top cover is lowered to close position
-                    elif moves[i+2]=='S':                    # case the next action is a cube spin
+                    elif following[0]=='S':                  # case the next action is a cube spin
                         flip_to_open()                       # top cover is lowered to open position
         
 
 
-        elif moves[i]=='S':                        # case there is a cube spin on the move string
-            direction=int(moves[i+1])              # rotation direction is retrived
+        elif move[0]=='S':                         # case there is a cube spin on the move string
+            direction=int(move[1])                 # rotation direction is retrived
             if debug:
                 print(f'To do S{direction}')       # for debug
 
@@ -735,8 +816,8 @@ def servo_solve_cube(moves, debug, stop_btn, btn_ref):
 
 
 
-        elif moves[i]=='R':                        # case there is a cube 1st layer rotation
-            direction=int(moves[i+1])              # rotation direction is retrived   
+        elif move[0]=='R':                         # case there is a cube 1st layer rotation
+            direction=int(move[1])                 # rotation direction is retrived   
             if debug:
                 print(f'To do R{direction}')       # for debug
 
@@ -758,6 +839,9 @@ def servo_solve_cube(moves, debug, stop_btn, btn_ref):
                 if set_dir=='CW':                  # case the set direction is CW
                     rotate_home(set_dir)           # call to function to spin the full cube toward home position
                     remaining_moves = update_moves(start_moves, remaining_moves, i, debug)  # counter is decreased, and remaining moves sent to uart
+        
+        move = following                           # the following robot move becomes the current one
+        i += 2                                     # string index of the robot move is increased
     
     if stop_servos:                                # case there is a stop request for servos 
         if debug:
@@ -768,6 +852,8 @@ def servo_solve_cube(moves, debug, stop_btn, btn_ref):
     elif not stop_servos:                          # case there is not a stop request for servos
         if debug:
             print(f"\nCompleted all the servo movements")
+            if stream:                             # case the moves have been counted while consumed
+                print(f'total amount of servo movements: {tot_moves}')
         robot_status='Cube_solved'                 # string variable indicating how the servo_solve_cube function has ended
 
     robot_time=(time()-start_time)
@@ -107,11 +107,20 @@ def robot_solver(solution, debug, stop_btn, btn_ref):
     
     flash.init(period=100, mode=Timer.PERIODIC, callback=flash_led)     # keeps the ESP blue led flashing when the robot is solving the cube
     
-    # solution (from Kociemba solver) is converted in robot moves dict, string and amount of movement
-    robot, moves, robot_tot_moves = cubotino.robot_required_moves(solution,"")
+    if robot_program:                                                   # case the packed robot moves have been received
+        moves = robot_program                                           # packed robot moves, decoded while the servos operate
+    else:                                                               # case only the cube solution has been received
+        # solution (from Kociemba solver) is converted in robot moves, streamed to the servos while they operate
+        # robot moves are translated via the transition table (the minimum-time planner is too slow, and memory
+        # demanding, for the board): The planned robot moves are received from the GUI as packed program (p=)
+        moves = cubotino.robot_moves_stream(solution)
 
     if debug:
-        print(f'robot moves:{moves}')                                        # print for debug
+        if cube_orientation:                                                 # case the cube orientation has been advised by the GUI
+            print(f'cube placed with face {cube_orientation[0]} down and face {cube_orientation[1]} front')  # print for debug
+        print(f'solution:{solution}')                                        # print for debug
+        if robot_program:                                                    # case the packed robot moves have been received
+            print(f'robot moves:{cubotino.unpack_moves(robot_program)}')     # print for debug
 
     robot_status, robot_time = servo.servo_solve_cube(moves, debug, stop_btn, btn_ref)   # call the function that operates the servos
     
@@ -127,7 +136,12 @@ def robot_solver(solution, debug, stop_btn, btn_ref):
 
 
 def solution_string(strMsg):
-    """Sanity check on the received cube solution string."""
+    """Sanity check on the received cube solution string.
+       An eventual 'o=' suffix (i.e. '(18f)o=BL') carries the original faces placed down and front on the robot.
+       An eventual 'p=' suffix (i.e. '(18f)p=a320') carries the robot moves, packed 4 bits per move and sent as hex text."""
+    
+    global cube_orientation, robot_program
+    
     if debug:
         solution = strMsg.decode()      # received string is decoded
         solution = solution.strip()     # empty spaces are removed
@@ -135,6 +149,21 @@ def solution_string(strMsg):
     elif not debug:
         solution = strMsg
     
+    pos_o=solution.find('o=')           # position of the cube orientation suffix in the string
+    if pos_o>0:                         # case the string has the cube orientation suffix
+        cube_orientation=solution[pos_o+2:pos_o+4]   # original faces placed down and front on the robot
+    else:                               # case the string has not the cube orientation suffix
+        cube_orientation=''             # cube orientation is set empty (cube placed as per GUI sketch)
+    
+    pos_p=solution.find('p=')           # position of the packed robot moves suffix in the string
+    robot_program=None                  # packed robot moves are set None (robot moves translated on the ESP32)
+    if pos_p>0:                         # case the string has the packed robot moves suffix
+        try:
+            import Cubotino_moves as cubotino                  # module with the packed robot moves decoder
+            robot_program=cubotino.packed_from_hex(solution[pos_p+2:].strip('<>'))   # packed robot moves (bytearray)
+        except:                         # exception is raised if the hex text is not valid
+            robot_program=None          # robot moves will be translated on the ESP32
+    
     pos=solution.find('(')              # position of the "(" character in the string
     solution=solution[:pos]             # string is sliced, by removing the additional info from Kociemba solver
     
@@ -247,6 +276,8 @@ debug=False                   # boolean variable that enable/disable prints for
 
 robot_init_status=False       # boolean to track the robot initialization status is initially set false
 sol_string_ready=False        # boolean to track the cube solution string readiness is initially set false
+cube_orientation=''           # string with the original faces placed down and front on the robot, as advised by the GUI
+robot_program=None            # bytearray with the packed robot moves, when received from the GUI
 robot_status=''               # string to track the robot status is initially set empty
 connect_status=False          # boolean to track the connection status with the uart is initially set false
 
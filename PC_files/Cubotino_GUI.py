@@ -99,8 +99,7 @@ else:                                                 # case the library 'solver
     solver_already_imported = False                   # booleand variable is set true
 
 try:                                                  # attempt
-    import solver as sv                               # import Kociemba solver, copied in robot folder
-    import face, cubie                                # import other Kociemba solver library parts, copied in robot folder
+    import cubie                                      # import Kociemba solver library part, copied in robot folder
     if not solver_already_imported:                   # case the solver was not already imported                                 
         print('imported the installed twophase solver...')  # feedback is printed to the terminal
     solver_found = True                               # boolean to track no exception on import the copied solver
@@ -109,8 +108,6 @@ except:                                               # exception is raised if n
     
 if not solver_found:                                  # case the library was not in folder
     try:                                              # attempt
-        import twophase.solver as sv                  # import Kociemba solver installed
-        import twophase.face as face                  # import face Kociemba solver library part, installed
         import twophase.cubie as cubie                # import cubie Kociemba solver library part, installed
         if not solver_already_imported:               # case the solver was not already imported 
             print('imported the copied twophase solver...') # feedback is printed to the terminal
@@ -123,6 +120,13 @@ if not solver_found and not twophase_solver_found:    # case no one solver has b
         print('\n(Kociemba) twophase solver not found')    # feedback is printed to the terminal
     quit()
 
+# the solver tables are loaded by the solver service process, and the solver runs there (not on the tkinter thread)
+import Cubotino_solver_service as ss    # client of the solver service process (by Andrea Favero)
+import Cubotino_validator as cv         # cube status validator, without the solver (by Andrea Favero)
+import Cubotino_cache as cc             # cache of the solutions and robot moves (by Andrea Favero)
+import Cubotino_cube_state as cst       # compact cube status, with the robot moves permutations (by Andrea Favero)
+import Cubotino_table_manager as tm     # integrity check and background rebuild of the solver tables (by Andrea Favero)
+
 # print()
 
 
@@ -373,8 +377,16 @@ gui_buttons_state="active"     # string variable used to activate/deactivate GUI
 robot_working=False            # boolean variable to track the robot working condition, initially False
 serialData=False               # boolean variable to track when the serial data can be exchanged, initially False
 robot_moves=""                 # string variable holding all the robot moves (robot manoeuvres)
-cube_status={}                 # dictionary variable holding the cube status, for GUI update to robot permutations
+cube_status=cst.CubeState()    # cube status (54 bytes), for GUI update to robot permutations
 left_moves={}                  # dictionary holding the remaining robot moves
+robot_settings=()              # tuple holding the servos settings, populated when the settings are read
+cube_orientation=""            # string with the original faces placed down and front on the robot, when advised
+solving=False                  # boolean variable to track the solver working condition, initially False
+solve_count=0                  # integer variable with the id of the latest solve request
+solve_reply=None               # tuple with the reply of the solver thread, for the tkinter loop
+solve_start=0                  # time reference of the latest solve request
+warm_up_future=None            # future of the solver service warm-up, started once the GUI window is shown
+gui_title="CUBOTino: Rubik's cube solver robot"   # GUI title, also used for the solver warming up status
 
 timestamp = dt.datetime.now().strftime('%Y%m%d_%H%M%S')      # timestamp used on logged data and other locations
 
@@ -621,18 +633,12 @@ def draw_cubotino_center_colors():
 def get_definition_string():
     """Generate the cube definition string, from the facelet colors."""
     
-    color_to_facelet = {}           # dict to store the color of the 54 facelets
-    for i in range(6):              # iteration over the six cube faces
-        # populate the dict connecting the face descriptors (UFRDLB) to center face colors (keys, 'white', 'red', etc)
-        color_to_facelet.update({gui_canvas.itemcget(facelet_id[i][1][1], "fill"): t[i]})
-    s = ""                          # empty string variable to be populated with the cube status
-    for f in range(6):              # iteration over the six cube faces
-        for row in range(3):        # iteration over the three rows of facelets 
-            for col in range(3):    # iteration over the three columns of facelets
-                
-                # cube status string is generated by adding the colors retrieved from the 54 facelets (cube sketch)
-                s += color_to_facelet[gui_canvas.itemcget(facelet_id[f][row][col], "fill")]
-    return s    
+    # center face colors (keys, 'white', 'red', etc), in the face descriptors order (URFDLB)
+    face_colors = [gui_canvas.itemcget(facelet_id[i][1][1], "fill") for i in range(6)]
+    
+    # colors retrieved from the 54 facelets (cube sketch)
+    facelets_colors = [gui_canvas.itemcget(facelet_id[f][row][col], "fill") for f in range(6) for row in range(3) for col in range(3)]
+    return cst.CubeState.from_colors(facelets_colors, face_colors).to_string()   # cube status string
 
 
 
@@ -640,10 +646,12 @@ def get_definition_string():
 
 
 def solve():
-    """Connect to Kociemba solver to get the solving maneuver."""
+    """Connect to Kociemba solver to get the solving maneuver.
+       The solver is called on a thread, so the GUI stays responsive: The reply is processed by solve_done(), scheduled
+       on the tkinter loop via root.after; Meanwhile the read&solve button shows a spinner, and it cancels the solving."""
     
-    global cols, sv, b_read_solve, cube_solving_string, cube_defstr
-    global cube_status, robot_moves, tot_moves, previous_move
+    global cols, b_read_solve, cube_solving_string, cube_defstr
+    global robot_moves, solve_count, solve_reply, solve_start
     
     b_robot["state"] = "disable"                 # GUI robot button is disabled at solve() function start
     b_robot["relief"] = "sunken"                 # GUI robot button is sunk at solve() function start
@@ -679,6 +687,7 @@ def solve():
     gui_text_window.delete(1.0, tk.END)  # clears output window
     cube_defstr=""                       # cube status string is set empty
     cube_solving_string=""               # cube solving string is set empty
+    robot_moves=""                       # robot moves string is set empty
     
     try:
         cube_defstr = get_definition_string()+ "\n"      # cube status string is retrieved
@@ -696,13 +705,167 @@ def solve():
                 
     except:                                              # case the cube definition string is not returned 
         show_text("Invalid facelet configuration.\nWrong or missing colors.")  # feedback to user
+        draw_cubotino_center_colors()                    # draw the cube center facelets with related colors
+        gui_robot_btn_update()                           # updates the cube related buttons status
         return  # function is terminated
     
-    # Kociemba TwophaseSolver, running locally, is called with max_length=18 or timeout=2s and best found within timeout
-    cube_solving_string = sv.solve(cube_defstr.strip(), 18 , 2)
+    code, suspects = cv.validate(cube_defstr)            # cube status is validated, before calling the solver
+    if code != cv.CUBE_OK:                               # case of invalid cube status (the solver is not called)
+        show_text(f'Invalid cube status: {cv.error_string(code, suspects)[7:]}\n')   # feedback to user
+        if debug:                                        # case debug has been activate
+            print(f'cube status validation: {cv.error_string(code, suspects)}')
+        draw_cubotino_center_colors()                    # draw the cube center facelets with related colors
+        gui_robot_btn_update()                           # updates the cube related buttons status
+        return  # function is terminated
+    
+    if gui_orientation_var.get() and len(robot_settings)>=16 and not gui_scramble_var.get():  # case orientation advisor
+        # candidate solutions are evaluated on the 24 cube orientations on the robot, within 6s
+        name, args = 'robot_best_orientation', (cube_defstr, robot_settings, 18, 2, 6)
+    elif gui_robot_search_var.get() and len(robot_settings)>=16:   # case of robot-metric search
+        # the solution is searched with the estimated robot time as search cost, within 6s
+        name, args = 'robot_search_solution', (cube_defstr, robot_settings, 6)
+    elif gui_robot_time_var.get() and len(robot_settings)>=16:   # case the solution is selected by the robot time
+        # anytime solving within 6s: the solver stops when a further search is not worth the robot time it could save,
+        # and the solution with the lowest solving time + estimated robot time is returned
+        name, args = 'robot_anytime_solution', (cube_defstr, robot_settings, 6)
+    else:                                                # case the solution is not selected by the robot time
+        # Kociemba TwophaseSolver, running on the solver service, is called with max_length=18 or timeout=2s and best found within timeout
+        name, args = 'solve', (cube_defstr.strip(), 18 , 2)
+    
+    if warm_up_future is not None and not warm_up_future.done():   # case the solver is still warming up
+        show_text('Solver warming up, the solution follows shortly\n')   # feedback to user (the request waits on it)
+    
+    solve_count += 1                                     # id of this solve request (older replies are discarded)
+    solve_reply = None                                   # reply of the solver thread is set None
+    solve_start = time.time()                            # time reference for the solving feedback
+    gui_solving(True)                                    # read&solve button is changed to the cancel function
+    threading.Thread(target=solve_request, args=(solve_count, name, args), daemon=True).start()   # solver thread
+    root.after(100, solve_poll, solve_count)             # the solver thread reply is checked by the tkinter loop
+
+
+
+
+
+
+def solve_request(request_id, name, args):
+    """Runs on a thread: Requests the solution to the solver service, and stores the reply for solve_poll().
+       The reply is discarded when the request has been cancelled, or superseded by a newer one."""
+    
+    global solve_reply
+    
+    try:
+        result, timing = ss.request(name, *args)         # solver service is called
+    except Exception as e:                               # exception is raised by the solver service
+        result, timing = f'Error: {e}', {}               # error string, as per solver errors
+    if request_id == solve_count:                        # case the request is still the current one
+        solve_reply = (request_id, name, result, timing) # reply is stored for the tkinter loop
+
+
+
+
+
+
+def solve_poll(request_id):
+    """Called by the tkinter loop, via root.after, until the solver thread reply is available.
+       It animates the spinner on the read&solve button, and it calls solve_done() once the reply arrives."""
+    
+    global solve_reply
+    
+    if request_id != solve_count:                        # case the request has been cancelled, or superseded
+        return                                           # function is terminated
+    if solve_reply is None or solve_reply[0] != request_id:  # case the solver thread reply is not available yet
+        elapsed = time.time() - solve_start              # time since the solve request
+        spinner = '|/-\\'[int(elapsed*8)%4]              # spinner character
+        b_read_solve["text"] = f"Solving {spinner}\n{elapsed:.1f} s\nCancel"   # feedback on the button
+        root.after(100, solve_poll, request_id)          # the solver thread reply is checked again
+        return                                           # function is terminated
+    
+    request_id, name, result, timing = solve_reply       # solver thread reply
+    solve_reply = None                                   # reply is consumed
+    solve_done(name, result, timing)                     # solution is processed on the tkinter thread
+
+
+
+
+
+
+def cancel_solve():
+    """Cancels the solve request in progress: The GUI is released, and the solver reply is discarded once available.
+       The solver service completes the running call (within its timeout) before serving a new request."""
+    
+    global solve_count, solve_reply, cube_solving_string
+    
+    solve_count += 1                                     # the request in progress is superseded
+    solve_reply = None                                   # reply of the solver thread is set None
+    cube_solving_string=""                               # cube solving string is set empty
+    gui_solving(False)                                   # read&solve button is restored
+    show_text("Solving cancelled\n")                     # feedback to user
+    draw_cubotino_center_colors()                        # draw the cube center facelets with related colors
+    gui_robot_btn_update()                               # updates the cube related buttons status
+
+
+
+
+
+
+def gui_solving(status):
+    """Changes the read&solve button to a cancel button while solving (status True), and back (status False)."""
+    
+    global solving, gui_buttons_state
+    
+    solving = status                                     # boolean tracking the solving in progress
+    if solving:                                          # case the solving is started
+        gui_buttons_state = gui_buttons_for_cube_status("disable")   # GUI buttons (cube-status) are disabled
+        b_read_solve["text"] = "Solving\n\nCancel"       # read&solve button works as cancel button
+        b_read_solve["state"] = "active"                 # read&solve button is activated
+        b_read_solve["relief"] = "raised"                # read&solve button is raised
+        b_read_solve["bg"] = "orange"                    # read&solve button is orange colored
+        b_read_solve["activebackground"] = "orange"      # read&solve button is orange colored
+    else:                                                # case the solving is ended
+        b_read_solve["text"] = "Read &\nsolve"           # read&solve button text is restored
+        b_read_solve["bg"] = "gray90"                    # read&solve button color is restored
+        b_read_solve["activebackground"] = "gray90"      # read&solve button color is restored
+
+
+
+
+
+
+def solve_done(name, result, timing):
+    """Processes the solver reply, on the tkinter thread: Solution on the text window, robot moves and buttons update."""
+    
+    global cols, cube_solving_string, cube_defstr
+    global cube_status, robot_moves, tot_moves, previous_move, cube_orientation
+    
+    candidates = []                                      # list of candidate solutions, when selected by robot time
+    evaluated = 0                                        # amount of evaluated solutions and orientations, when advised
+    cube_orientation = ""                                # cube orientation on the robot is set empty (as per sketch)
+    if isinstance(result, str):                          # case of the solver string (or error string)
+        cube_solving_string = result                     # cube solving string
+    elif name == 'robot_best_orientation':               # case of the orientation advisor
+        cube_solving_string, robot_defstr, faces, first_time, best_time, evaluated = result
+        if not 'Error' in cube_solving_string:           # case the solver did not return an error
+            cube_orientation = faces[3] + faces[2]       # original faces placed down and front on the robot
+            show_text(f'Place the cube with the {cols[t.index(faces[3])]} face down, and the {cols[t.index(faces[2])]} face to the front\n')
+            if faces != 'URFDLB':                        # case the cube has to be placed differently than the sketch
+                face_cols = cols.copy()                  # colors of the faces, as per cube sketch
+                for i in range(6):                       # iteration on the six faces positions
+                    cols[i] = face_cols[t.index(faces[i])]   # color of the original face placed on this position
+                cube_defstr = robot_defstr + "\n"        # cube status string, as the cube is placed on the robot
+                redraw(cube_defstr)                      # cube sketch is updated to the cube placed on the robot
+                draw_cubotino()                          # updates Cubotino cube sketch, with URF centers facelets colors
+        if debug:                                        # case debug has been activate
+            print(f'cube orientation on robot (faces at URFDLB): {faces}, {evaluated} combinations evaluated')
+    else:                                                # case the solution is selected by the robot time
+        cube_solving_string, first_time, best_time, candidates = result
+        if debug:                                        # case debug has been activate
+            for candidate in candidates:                 # iteration over the candidate solutions
+                print(f'candidate solution ({candidate[0]}): {candidate[1]}, estimated robot time: {candidate[4]} secs')
     
     if debug:   # case debug has been activate
         print(f'cube solution string: {cube_solving_string}\n')     # feedback is printed to the terminal
+        print(f'solver timing (secs): {timing}\n')                  # feedback is printed to the terminal
+        print(f'solutions cache: {cc.cache_stats()}\n')             # feedback is printed to the terminal
         
     
     if cube_defstr=="":                                             # case there is no cube status string
@@ -722,8 +885,18 @@ def solve():
         solution=cube_solving_string[:pos]     # string is sliced, by removing the additional info from Kociemba solver
         solution=solution.replace(" ","")      # empty spaces are removed
         
-        # robot moves dictionary, and total robot moves, are retrieved from the imported Cubotino_moves script
-        robot_moves_dict, robot_moves, tot_moves = cm.robot_required_moves(solution, "")
+        # robot moves, total robot moves and estimated robot time are retrieved from the solutions cache, or
+        # from the imported Cubotino_moves script (robot moves planned with the same servos settings used by the robot)
+        key = cc.make_key('robot_moves', solution, robot_settings)   # cache key, for the solution and servos settings
+        cached = cc.get(key)                                 # cached robot moves, or None
+        if cached is not None:                               # case the robot moves are cached
+            robot_moves, tot_moves, robot_time_est = cached  # robot moves, total robot moves and estimated robot time
+        else:                                                # case the robot moves are not cached
+            robot_moves_dict, robot_moves, tot_moves = cm.robot_required_moves(solution, "", robot_settings)
+            robot_time_est = 0                               # estimated robot time, when the servos settings are available
+            if len(robot_settings)>=16:                      # case the servos settings are available
+                robot_time_est, robot_time_breakdown = cm.estimate_robot_time(robot_moves, robot_settings)
+            cc.put(key, (robot_moves, tot_moves, robot_time_est))   # robot moves are cached
         if not gui_scramble_var.get():                       # case the scramble check box is not checked
             show_text(f'Robot moves: {robot_moves}\n')       # robot moves string is printed on the text window
             if debug:                                        # case the debug checkcutton is selected
@@ -731,14 +904,26 @@ def solve():
                 
         else:                                                # case the scramble check box is checked
             show_text(f'Robot moves: As per random cube\n')  # robot moves string is printed on the text window
+        
+        if len(robot_settings)>=16:                          # case the servos settings are available
+            show_text(f'Robot moves: {tot_moves}, estimated robot time: {robot_time_est} secs\n')  # estimate on text window
+            if evaluated>1:                                  # case the solution and orientation have been advised
+                saving = round(first_time - best_time, 1)    # robot time saved compared to the first solution, as placed
+                show_text(f'Best of {evaluated} solutions and orientations, {saving} secs saved vs the first one\n')
+            elif len(candidates)>1:                          # case the solution has been selected among candidates
+                saving = round(first_time - best_time, 1)    # robot time saved compared to the first solution
+                show_text(f'Best of {len(candidates)} solutions, {saving} secs saved vs the first one\n')  # feedback to user
+            if debug:                                        # case the debug checkcutton is selected
+                print(f'Estimated robot time: {robot_time_est} secs\n')   # feedback is printed to the terminal
 
-        for key in range(len(cube_defstr.strip())):          # iteration over the cube status string
-            cube_status[key]=cube_defstr[key]                # dict generation
+        cube_status=cst.CubeState.from_string(cube_defstr)   # cube status, for GUI update to robot permutations
         previous_move=0                                      # previous move set to zero
 
+    gui_solving(False)                  # read&solve button is restored from the cancel function
     gui_f2.update()                     # GUI f2 part is updated, to release eventual clicks on robot button
     b_robot["state"] = "active"         # GUI robot button is activated after solve() function
     b_robot["relief"] = "raised"        # GUI robot button is raised after solve() function
+    draw_cubotino_center_colors()       # draw the cube center facelets with related colors, at Cubotino sketch
     gui_robot_btn_update()              # updates the cube related buttons status
 
 
@@ -807,9 +992,9 @@ def random():
     gui_text_window.delete(1.0, tk.END)      # clears the text window
     gui_buttons_state = gui_buttons_for_cube_status("disable")   # GUI buttons (cube-status) are disabled
     
-    cc = cubie.CubieCube()                   # cube in cubie reppresentation
-    cc.randomize()                           # randomized cube in cubie reppresentation 
-    fc = cc.to_facelet_cube()                # randomized cube is facelets reppresentation string
+    cube = cubie.CubieCube()                 # cube in cubie reppresentation
+    cube.randomize()                         # randomized cube in cubie reppresentation 
+    fc = cube.to_facelet_cube()              # randomized cube is facelets reppresentation string
     
     if gui_scramble_var.get():               # case the scramble check box is checked
         cols = gray_cols.copy()              # list with gray nuances is used instead of the cube colors
@@ -841,9 +1026,7 @@ def random():
         # feeback is printed to the terminal
         print('==========================   random cube on the screen sketch   ===========================')
 
-    solve()                                  # solve function is called, because of the random() cube request
-    draw_cubotino_center_colors()            # draw the cube center facelets with related colors, at Cubotino sketch
-    gui_buttons_state = gui_buttons_for_cube_status("active")    # GUI buttons (cube-status) are actived
+    solve()                                  # solve function is called (buttons are actived once solved), because of the random() cube request
 
 
 
@@ -853,14 +1036,10 @@ def random():
 def redraw(cube_defstr):
     """Updates sketch cube colors as per cube status string."""
     
-    cube_defstr=cube_defstr.strip()      # eventual empty spaces at string start/end are removed
-    idx = 0                              # integer index, set to zero
-    for f in range(6):                   # iteration over the six cube faces
-        for row in range(3):             # iteration over the three rows of facelets 
-            for col in range(3):         # iteration over the three columns of facelets
-                # facelet idx, at the cube sketch, is colored as per cube_defstr in function argument
-                gui_canvas.itemconfig(facelet_id[f][row][col], fill=cols[t.index(cube_defstr[idx])])
-                idx += 1                 # index is increased
+    facelets = cst.CubeState.from_string(cube_defstr).facelets.tolist()   # face index of the 54 facelets
+    for idx, face_idx in enumerate(facelets):   # iteration over the 54 facelets
+        # facelet idx, at the cube sketch, is colored as per cube_defstr in function argument
+        gui_canvas.itemconfig(facelet_id[idx//9][(idx%9)//3][idx%3], fill=cols[face_idx])
 
 
 
@@ -962,7 +1141,7 @@ def robot_solver():
        The solving string for the robot is without space characters, and contained within <> characters
        When the robot is working, the same button is used to stop the robot."""
     
-    global cube_solving_string, cube_solving_string_robot, ser
+    global cube_solving_string, cube_solving_string_robot, ser, cube_orientation
     
     s = cube_solving_string                               # shorter local variable name
     sr = cube_solving_string_robot                        # shorter local variable name
@@ -971,6 +1150,10 @@ def robot_solver():
         if s != None and len(s)>1 and "f)" in s:          # case there is useful data to send to the robot
             
             sr = s.strip().strip("\r\n").replace(" ","")  # empty, CR, LF, cgaracters are removed
+            if cube_orientation:                          # case the cube orientation on the robot has been advised
+                sr = sr + "o=" + cube_orientation         # original faces placed down and front (i.e. '(18f)o=BL')
+            if robot_moves:                               # case the robot moves are available
+                sr = sr + "p=" + cm.packed_hex(cm.encode_moves(robot_moves))   # packed robot moves, as hex text
             if sr[0]!="<" and sr[-1:]!=">":               # case the string isn't contained by '<' and '>' characters
                 sr = "<" + sr +">"                        # starting '<' and ending '>' chars are added
             cube_solving_string_robot = sr                # global variable is updated
@@ -1072,7 +1255,8 @@ def gui_robot_btn_update():
     global serialData, cube_solving_string, robot_working, gui_buttons_state
         
     if not robot_working:                                 # case the robot is not working
-        gui_buttons_state = gui_buttons_for_cube_status("active")    # buttons for cube status are set active
+        if not solving:                                   # case the solver is not working
+            gui_buttons_state = gui_buttons_for_cube_status("active")    # buttons for cube status are set active
         
         if not serialData:                                # case there is not serial communication set
             b_robot["relief"] = "sunken"                  # large robot button is lowered
@@ -1116,42 +1300,6 @@ def gui_robot_btn_update():
 
 
 
-def cube_facelets_permutation(cube_status, move_type, direction):
-    """Function that updates the cube status, according to the move type the robot does
-       The 'ref' tuples provide the facelet current reference position to be used on the updated position.
-       As example, in case of flip, the resulting facelet 0 is the one currently in position 53 (ref[0])."""
-    
-    if move_type == 'flip':      # case the robot move is a cube flip (complete cube rotation around L-R horizontal axis) 
-        ref=(53,52,51,50,49,48,47,46,45,11,14,17,10,13,16,9,12,15,0,1,2,3,4,5,6,7,8,18,
-             19,20,21,22,23,24,25,26,42,39,36,43,40,37,44,41,38,35,34,33,32,31,30,29,28,27)
-    
-    elif move_type == 'spin':    # case the robot move is a spin (complete cube rotation around vertical axis)
-        if direction == '1':     # case spin is CW
-            ref=(2,5,8,1,4,7,0,3,6,18,19,20,21,22,23,24,25,26,36,37,38,39,40,41,42,43,44,
-                 33,30,27,34,31,28,35,32,29,45,46,47,48,49,50,51,52,53,9,10,11,12,13,14,15,16,17)
-        elif direction == '3':      # case spin is CCW
-            ref=(6,3,0,7,4,1,8,5,2,45,46,47,48,49,50,51,52,53,9,10,11,12,13,14,15,16,17,
-                 29,32,35,28,31,34,27,30,33,18,19,20,21,22,23,24,25,26,36,37,38,39,40,41,42,43,44)
-    
-    elif move_type == 'rotate':  # case the robot move is a rotation (lowest layer rotation versus mid and top ones) 
-        if direction == '1':     # case 1st layer rotation is CW
-            ref=(0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,24,25,26,18,19,20,21,22,23,42,43,44,
-                 33,30,27,34,31,28,35,32,29,36,37,38,39,40,41,51,52,53,45,46,47,48,49,50,15,16,17)
-        elif direction == '3':   # case 1st layer rotation is CCW
-            ref=(0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,51,52,53,18,19,20,21,22,23,15,16,17,
-                 29,32,35,28,31,34,27,30,33,36,37,38,39,40,41,24,25,26,45,46,47,48,49,50,42,43,44)
-    
-    new_status={}                # empty dict to generate the cube status, updated according to move_type and direction
-    for i in range(54):                    # iteration over the 54 facelets
-        new_status[i]=cube_status[ref[i]]  # updated cube status takes the facelet from previous status at ref location
-    
-    return new_status                      # updated cube status is returned
-
-
-
-
-
-
 def animate_cube_sketch(move_index):
     """Function that keeps updating the cube sketch colors on screen, according to the robot move."""
     
@@ -1159,20 +1307,22 @@ def animate_cube_sketch(move_index):
     
     if move_index >= previous_move or move_index==0:    # case there is a new move (or the first one)
         i=move_index                     # shorther variable name
+        previous = cube_status.facelets  # facelets before the move
         if robot_moves[i]=='F':          # case there is a flip on the move string
-            cube_status=cube_facelets_permutation(cube_status, 'flip', None)               # cube status after a flip
+            cube_status = cube_status.robot_move('F1')     # cube status after a flip
             
-        elif robot_moves[i]=='S':        # case there is a cube spin on the move string
-            cube_status=cube_facelets_permutation(cube_status, 'spin', robot_moves[i+1])   # cube status after a spin
-        
-        elif robot_moves[i]=='R':        # case there is a cube 1st layer rotation
-            cube_status=cube_facelets_permutation(cube_status, 'rotate', robot_moves[i+1]) # cube status after a rotate
-
-        for k in range(54):              # iteration over the 54 facelets
+        elif robot_moves[i] in 'SR':     # case there is a cube spin, or a cube 1st layer rotation, on the move string
+            cube_status = cube_status.robot_move(robot_moves[i:i+2])   # cube status after a spin or a rotate
+
+        if move_index==0:                # case of first move, all the facelets are colored
+            changed = range(54)
+        else:                            # case of following moves, only the facelets changed by the move are colored
+            changed = (cube_status.facelets != previous).nonzero()[0].tolist()
+        for k in changed:                # iteration over the facelets to be colored
             f=k//9                       # cube face
             row=(k%9)//3                 # face row
             col=(k%9)%3                  # face column
-            gui_canvas.itemconfig(facelet_id[f][row][col], fill=cols[t.index(cube_status[k])])  # color filling
+            gui_canvas.itemconfig(facelet_id[f][row][col], fill=cols[cube_status.facelets[k]])  # color filling
         
         if move_index > previous_move:   # case the move index is larger than previous (not the case on multui flips)
             previous_move +=2            # previous move index is increased (it goes with step of two)
@@ -1193,6 +1343,10 @@ def cube_read_solve():
 
     global cols, gui_buttons_state  
     
+    if solving:                                    # case the solver is working, and the button works as cancel button
+        cancel_solve()                             # the solving is cancelled
+        return                                     # function is terminated
+    
     if not robot_working:                          # case the robot is not working
         gui_text_window.delete(1.0, tk.END)        # clears the text window
         gui_buttons_state = gui_buttons_for_cube_status("disable")     # disable the buttons on the cube-status GUI part
@@ -1256,7 +1410,8 @@ def cube_read_solve():
             draw_cubotino_center_colors()        # draw the cube center facelets with related colors
             
         if len(cube_defstr)>=54:                 # case the cube solution string has min amount of characters
-            solve()                              # solver is called
+            solve()                              # solver is called (buttons are actived once solved)
+            return                               # function is terminated
  
         draw_cubotino_center_colors()            # draw the cube center facelets with related colors
         gui_buttons_state = gui_buttons_for_cube_status("active")    # activate the buttons on the cube-status GUI part
@@ -1736,6 +1891,7 @@ def close_window():
     except:
         pass
     serialData = False                             # boolean tracking serial comm conditions is set False
+    ss.stop()                                      # solver service is stopped, when started by the GUI
     root.destroy()                                 # GUI is closed
 
 
@@ -1743,6 +1899,67 @@ def close_window():
 
 
 
+def solver_warm_up():
+    """Starts the solver service (and its tables loading) in background, once the GUI window is shown.
+       The warming up status is shown on the GUI title, until the solver is ready.
+       The solver tables are checked first: Missing or damaged tables are rebuilt in background, and the warm-up
+       follows the rebuild."""
+    
+    global warm_up_future
+    
+    bad_tables = tm.check()                        # missing or damaged solver tables (quick check)
+    if bad_tables:                                 # case of tables to be rebuilt
+        tm.start_rebuild(bad_tables)               # tables are rebuilt by a background process
+        show_text(f'Solver tables missing or damaged ({", ".join(bad_tables)}), rebuilding in background:\n'
+                  f'The cube status can be entered, and the robot tuned, meanwhile\n')   # feedback to user
+        root.after(1000, tables_rebuild_poll)      # the rebuild is checked by the tkinter loop
+        return                                     # function is terminated (warm-up after the rebuild)
+    
+    warm_up_future = ss.warm_up()                  # solver service is started, on a background thread
+    root.title(f'{gui_title}   (solver warming up ...)')   # warming up status on the GUI title
+    root.after(200, warm_up_poll)                  # the warm-up is checked by the tkinter loop
+
+
+
+
+
+
+def tables_rebuild_poll():
+    """Checks the solver tables rebuild, on the tkinter loop: The progress is shown on the GUI title, and the solver
+       warm-up is started once the tables are rebuilt."""
+    
+    if tm.rebuilding():                            # case the tables are still being rebuilt
+        root.title(f'{gui_title}   ({tm.progress_text()} ...)')   # rebuild progress on the GUI title
+        root.after(1000, tables_rebuild_poll)      # new check, later
+        return
+    root.title(gui_title)                          # GUI title is restored
+    show_text(f'S{tm.progress_text()[1:]}\n')       # feedback to user (rebuild done, or failed)
+    if tm.rebuild_state['status'] == 'done':       # case the tables have been rebuilt
+        solver_warm_up()                           # solver warm-up
+
+
+
+
+
+
+def warm_up_poll():
+    """Checks the solver warm-up, on the tkinter loop: The GUI title is restored once the solver is ready."""
+    
+    if not warm_up_future.done():                  # case the solver is still warming up
+        root.after(200, warm_up_poll)              # new check, later
+        return
+    root.title(gui_title)                          # GUI title is restored
+    if debug:                                      # case debug has been activate
+        if warm_up_future.exception() is None:     # case the solver service is ready
+            print(f'solver service ready: {warm_up_future.result()}\n')
+        else:                                      # case the solver service could not be reached
+            print(f'solver service not reachable, the solver runs in the GUI process: {warm_up_future.exception()}\n')
+
+
+
+
+
+
 # ################################### functions to get the slider values  ##############################################
 
 def servo_CCW(val):
@@ -2113,7 +2330,7 @@ def facelets_width(val):
 # ####################################################################################################################
 # ############################### GUI high level part ################################################################
 root = tk.Tk()                                     # initialize tkinter as root 
-root.title("CUBOTino: Rubik's cube solver robot")  # name is assigned to GUI root
+root.title(gui_title)                              # name is assigned to GUI root
 try:
     root.iconbitmap("Rubiks-cube.ico")             # custom icon is assigned to GUI root
 except:
@@ -2214,6 +2431,27 @@ cb_scramble.configure(font=("Arial", "10"))
 cb_scramble.grid(column=1, row=4, sticky="ew", padx=5, pady=5)
 gui_scramble_var.set(0)
 
+# checkbutton for solution selection by the estimated robot time
+gui_robot_time_var = tk.BooleanVar()
+cb_robot_time=tk.Checkbutton(cube_status_label, text="fastest robot solution (solving + robot time)", variable=gui_robot_time_var)
+cb_robot_time.configure(font=("Arial", "10"))
+cb_robot_time.grid(column=0, row=5, columnspan=2, sticky="w", padx=5, pady=0)
+gui_robot_time_var.set(0)
+
+# checkbutton for the cube orientation advisor (faces to place down and front on the robot)
+gui_orientation_var = tk.BooleanVar()
+cb_orientation=tk.Checkbutton(cube_status_label, text="advise cube orientation on robot", variable=gui_orientation_var)
+cb_orientation.configure(font=("Arial", "10"))
+cb_orientation.grid(column=0, row=6, columnspan=2, sticky="w", padx=5, pady=0)
+gui_orientation_var.set(0)
+
+# checkbutton for the robot-metric search (estimated robot time as search cost)
+gui_robot_search_var = tk.BooleanVar()
+cb_robot_search=tk.Checkbutton(cube_status_label, text="robot-metric search (robot time as search cost)", variable=gui_robot_search_var)
+cb_robot_search.configure(font=("Arial", "10"))
+cb_robot_search.grid(column=0, row=7, columnspan=2, sticky="w", padx=5, pady=0)
+gui_robot_search_var.set(0)
+
 
 # robot related buttons
 gui_robot_label = tk.LabelFrame(gui_f2, text="Robot", labelanchor="nw", font=("Arial", "12"))
@@ -2536,6 +2774,7 @@ create_facelet_rects(width)                       # calls the function to genera
 create_colorpick(width)                           # calls the function to generate the color-picking palette
 update_coms()                                     # calls the function to generate the cube sketch
 root.protocol("WM_DELETE_WINDOW", close_window)   # the function close_function is called when the windows is closed
+root.after(100, solver_warm_up)                   # solver warm-up starts once the window is shown (not blocking it)
 root.mainloop()                                   # tkinter main loop
 
 ########################################################################################################################
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Batch solving of cube statuses, for regression tests and capacity planning of the PC side of CUBOTino
+#
+# Cube definition strings are read from a file (or stdin), one per line, and solved on a pool of processes:
+#  - Each cube status is validated (Cubotino_validator), solved, and the solution translated into robot moves
+#    (Cubotino_moves, with the servos settings), with the estimated robot time
+#  - In solve mode, cubes a few moves from solved are solved by the lookup table (Cubotino_lookup), when generated
+#  - In robot mode, the solution is searched with the robot time as search cost (Cubotino_robot_search)
+#  - Results are written as JSON lines, in the same order of the input lines, to a file (or stdout)
+#  - Input and output are streamed, with a bounded amount of cubes in progress, so the memory does not grow
+#  - The solver tables are checked at the start (Cubotino_table_manager), as the processes can't generate them
+#  - Throughput (cubes/s) and latency percentiles (solve + translation time per cube) are reported at the end,
+#    on stderr (stdout may carry the JSON lines)
+# Empty lines, and lines starting by '#', are skipped.
+#
+# Run from the PC_files folder, as the solver tables are in the twophase subfolder, i.e.:
+#   python Cubotino_batch.py cubes.txt -o solutions.jsonl --processes 8
+#   python Cubotino_batch.py < cubes.txt > solutions.jsonl
+#
+#############################################################################################################
+"""
+
+import multiprocessing as mp               # multiprocessing library, for the pool of processes
+from collections import deque              # deque, for the cubes in progress (in input order)
+import json                                # json library, for the JSON lines output
+import time                                # time library is imported
+import ast                                 # ast library, to safely parse the settings text file
+import sys, os                             # sys and os libraries, for stdin, stdout and stderr, and the cores
+
+
+
+
+# Global variables
+
+cs = None                                  # Cubotino_solver module, imported on the processes of the pool
+cv = None                                  # Cubotino_validator module, imported on the processes of the pool
+cl = None                                  # Cubotino_lookup module, imported on the processes of the pool
+rs = None                                  # Cubotino_robot_search module, imported on the processes of the pool
+settings = None                            # servos settings, on the processes of the pool
+solver_args = ()                           # solver arguments (mode, max_length, timeout, budget), on the processes
+
+
+
+
+
+
+def read_servo_settings(fname='Cubotino_settings.txt'):
+    """ Returns the servos settings tuple from the text file, or the default settings when the file is not found."""
+
+    try:                                   # attempt
+        with open(fname, "r") as f:        # text file is opened
+            return ast.literal_eval(f.readline().strip())   # settings tuple, from the first line
+    except:                                # exception is raised if the file is missing or not readable
+        return (54,68,76,0,900,1000,800,300,51,76,101,2,3,1100,1200,100,'small','small')   # default servos settings
+
+
+
+
+
+
+def percentile(values, p):
+    """ Returns the p percentile (0 to 100) of a list of values, via the nearest rank method."""
+
+    values = sorted(values)                                     # sorted copy of the values
+    idx = min(len(values)-1, max(0, int(round(p/100*len(values)+0.5))-1))   # nearest rank index
+    return values[idx]                                          # percentile value
+
+
+
+
+
+
+def init_worker(servo_settings, args):
+    """ Initializes a process of the pool: Imports the solver (memory-mapped tables), the validator, the lookup table
+        and the robot-metric search."""
+
+    global cs, cv, cl, rs, settings, solver_args
+
+    import Cubotino_solver                 # candidate solutions module, importing the Kociemba solver
+    import Cubotino_validator              # cube status validator, without the solver
+    import Cubotino_lookup                 # lookup table of the short scrambles (memory-mapped)
+    import Cubotino_robot_search           # robot-metric search, on the solver tables
+    cs, cv, cl = Cubotino_solver, Cubotino_validator, Cubotino_lookup   # modules are assigned to the global variables
+    rs = Cubotino_robot_search             # module is assigned to the global variable
+    settings = servo_settings              # servos settings
+    solver_args = args                     # solver arguments
+
+
+
+
+
+
+def solve_cube(line_number, cube_defstr):
+    """ Runs on a process of the pool: Validates and solves the cube, and translates the solution into robot moves.
+        Returns the result dict, for the JSON line."""
+
+    start = time.perf_counter()            # time reference
+    mode, max_length, timeout, budget = solver_args   # solver arguments
+    result = {'line': line_number, 'cube': cube_defstr}   # result dict
+
+    code, suspects = cv.validate(cube_defstr)   # cube status is validated, without the solver
+    if code != cv.CUBE_OK:                 # case of invalid cube status
+        result['error'] = cv.error_string(code, suspects)
+        result['latency'] = round(time.perf_counter() - start, 4)
+        return result
+
+    if mode == 'anytime':                  # case of anytime solving, on the end-to-end robot time
+        s = cs.robot_anytime_solution(cube_defstr, settings, budget)[0]   # solver string of the best candidate
+    elif mode == 'robot':                  # case of robot-metric search
+        s = rs.robot_search_solution(cube_defstr, settings, budget)[0]    # solver string of the best solution
+    else:                                  # case of plain solver call
+        s = cl.lookup(cube_defstr)         # optimal solution from the lookup table of the short scrambles, or None
+        if s is None:                      # case the cube is not in the lookup table
+            s = cs.sv.solve(cube_defstr, max_length, timeout)   # Kociemba solver is called
+    solver_time = time.perf_counter() - start   # solver time
+    if 'Error' in s or not 'f)' in s:      # case the solver returns an error
+        result['error'] = s
+        result['latency'] = round(time.perf_counter() - start, 4)
+        return result
+
+    moves = cs.solution_moves(s)           # list of solver moves
+    robot_moves, tot_moves, robot_time_est = cs.robot_time(moves, settings)   # robot moves and estimated time
+    result.update({'solution': s, 'length': len(moves), 'solver_time': round(solver_time, 4),
+                   'robot_moves': robot_moves, 'robot_move_count': tot_moves, 'robot_time': robot_time_est,
+                   'latency': round(time.perf_counter() - start, 4)})
+    return result
+
+
+
+
+
+
+def read_cubes(f):
+    """ Generator of (line number, cube definition string) from the input file, skipping empty and comment lines."""
+
+    for i, line in enumerate(f, 1):        # iteration over the input lines
+        line = line.strip()                # line without spaces and line feed
+        if line and not line.startswith('#'):   # case of a cube definition string
+            yield i, line
+
+
+
+
+
+
+def run(f_in, f_out, processes, servo_settings, args, in_flight=4):
+    """ Solves the cubes from the input file on a pool of processes, and writes the JSON lines to the output file.
+        At most processes * in_flight cubes are in progress. Returns the statistics dict."""
+
+    latencies = []                         # list of the cubes latencies (secs)
+    errors = 0                             # counter of the cubes with errors
+    pending = deque()                      # cubes in progress, in input order
+    start = time.time()                    # time reference
+
+    with mp.Pool(processes, initializer=init_worker, initargs=(servo_settings, args)) as pool:
+        for line_number, cube_defstr in read_cubes(f_in):   # iteration over the cubes from the input
+            pending.append(pool.apply_async(solve_cube, (line_number, cube_defstr)))   # cube is submitted
+            while len(pending) >= processes * in_flight or (pending and pending[0].ready()):   # bounded cubes in progress
+                result = pending.popleft().get()   # oldest result (blocking)
+                latencies.append(result['latency'])
+                errors += 'error' in result
+                f_out.write(json.dumps(result) + '\n')   # JSON line is written
+        while pending:                     # iteration over the remaining cubes in progress
+            result = pending.popleft().get()   # oldest result (blocking)
+            latencies.append(result['latency'])
+            errors += 'error' in result
+            f_out.write(json.dumps(result) + '\n')   # JSON line is written
+    f_out.flush()                          # output is flushed
+
+    elapsed = time.time() - start          # batch time
+    stats = {'cubes': len(latencies), 'errors': errors, 'processes': processes, 'secs': round(elapsed, 2),
+             'cubes_per_sec': round(len(latencies) / elapsed, 2) if elapsed else 0}
+    if latencies:                          # case of solved cubes
+        for p in (50, 90, 99):             # iteration over the latency percentiles
+            stats[f'p{p}'] = round(percentile(latencies, p), 3)
+        stats['max'] = round(max(latencies), 3)
+    return stats
+
+
+
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # argument parser object creation
+    parser = argparse.ArgumentParser(description='CUBOTino batch solving, on all the cores')
+
+    # input argument is added to the parser
+    parser.add_argument("input", nargs='?', default='-',
+                        help="Text file with one cube definition string per line. Default stdin.")
+
+    # --output argument is added to the parser
+    parser.add_argument("-o", "--output", type=str, default='-',
+                        help="Output file for the JSON lines. Default stdout.")
+
+    # --processes argument is added to the parser
+    parser.add_argument("-p", "--processes", type=int, default=None,
+                        help="Amount of processes. Default one per core.")
+
+    # --mode argument is added to the parser
+    parser.add_argument("--mode", type=str, default='solve', choices=['solve', 'anytime', 'robot'],
+                        help="Solver mode: plain solver call, anytime solving on the robot time, or robot-metric "
+                             "search. Default solve.")
+
+    # --max_length argument is added to the parser
+    parser.add_argument("--max_length", type=int, default=20,
+                        help="Solver max_length argument (solve mode). Default 20.")
+
+    # --timeout argument is added to the parser
+    parser.add_argument("--timeout", type=float, default=2,
+                        help="Solver timeout argument, secs (solve mode). Default 2.")
+
+    # --budget argument is added to the parser
+    parser.add_argument("--budget", type=float, default=6,
+                        help="Latency budget, secs (anytime mode), or timeout (robot mode). Default 6.")
+
+    # --settings argument is added to the parser
+    parser.add_argument("--settings", type=str, default='Cubotino_settings.txt',
+                        help="Servos settings file, for the robot moves and time. Default Cubotino_settings.txt.")
+
+    args = parser.parse_args()   # argument parsed assignement
+
+    import Cubotino_table_manager as tm    # integrity check of the solver tables
+    bad_tables = tm.check()                # missing or damaged solver tables (quick check)
+    if bad_tables:                         # case of tables to be rebuilt (each process would generate them)
+        print(f"solver tables missing or damaged: {', '.join(bad_tables)}\n"
+              f"rebuild them via: python Cubotino_table_manager.py --rebuild", file=sys.stderr)
+        sys.exit(1)
+
+    processes = args.processes or os.cpu_count() or 1   # amount of processes
+    solver_args = (args.mode, args.max_length, args.timeout, args.budget)   # solver arguments
+    f_in = sys.stdin if args.input == '-' else open(args.input, 'r')        # input file
+    f_out = sys.stdout if args.output == '-' else open(args.output, 'w')    # output file
+    try:                                   # attempt
+        stats = run(f_in, f_out, processes, read_servo_settings(args.settings), solver_args)
+    finally:                               # files are closed also on exceptions (i.e. Ctrl+C)
+        if f_in is not sys.stdin:
+            f_in.close()
+        if f_out is not sys.stdout:
+            f_out.close()
+
+    print(f"cubes: {stats['cubes']} ({stats['errors']} errors), processes: {stats['processes']}, "
+          f"time: {stats['secs']} secs, throughput: {stats['cubes_per_sec']} cubes/s", file=sys.stderr)
+    if stats['cubes']:                     # case of solved cubes
+        print(f"latency (secs): p50 {stats['p50']}, p90 {stats['p90']}, p99 {stats['p99']}, max {stats['max']}",
+              file=sys.stderr)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Solutions cache for the PC side of CUBOTino
+#
+# The same cube status is often solved more than once (demo scrambles, cube re-read after a failed attempt, etc),
+# each time with a full solver search. This module caches the solver replies, and the robot moves translations:
+#  - Keys are made by the request name, the 54 characters cube definition string and the solver parameters
+#    (and the servos settings, when the robot moves are planned on those)
+#  - A bounded LRU (least recently used) dict keeps the most recent entries in memory
+#  - Each new entry is appended to a text file (one entry per line), reused when the GUI is restarted;
+#    The file is compacted at loading, when it has many more lines than the entries kept in memory
+#  - Hits and misses are counted, for the cache statistics
+#
+#############################################################################################################
+"""
+
+from collections import OrderedDict        # dict keeping the entries order, for the LRU policy
+import threading                           # threading library, to protect the cache from concurrent threads
+import ast                                 # ast library, to safely parse the entries from the text file
+import os                                  # os library, for the cache file and folder
+
+
+
+
+# Global variables
+
+max_entries = 2000                         # max amount of entries kept in memory
+folder = os.path.join('.', 'data_log_folder')                    # folder of the cache file
+fname = os.path.join(folder, 'Cubotino_solutions_cache.txt')     # cache file (one entry per line)
+
+cache = OrderedDict()                      # LRU cache, from the least to the most recently used entry
+stats = {'hits':0, 'misses':0, 'loaded':0, 'appended':0}   # cache statistics
+loaded = False                             # boolean to track the cache file loading
+cache_lock = threading.Lock()              # lock to serialize the cache access from the GUI and the solver threads
+
+
+
+
+
+
+def make_key(name, *args):
+    """ Returns the cache key (string) for the request name and its arguments (cube definition string first)."""
+
+    return '|'.join([name] + [str(arg).strip() for arg in args])   # i.e. 'solve|UUUUUUUUURRR...|18|2'
+
+
+
+
+
+
+def load():
+    """ Loads the cache file entries into the memory cache, once. Unreadable lines are skipped.
+        The file is compacted (rewritten with the entries kept in memory) when it has more than twice max_entries lines."""
+
+    global loaded
+
+    loaded = True                          # the loading is done once
+    lines = 0                              # counter of the file lines
+    try:                                   # attempt
+        with open(fname, 'r') as f:        # cache file is opened in read mode
+            for line in f:                 # iteration over the file lines
+                lines += 1                 # lines counter is increased
+                try:                       # attempt
+                    key, value = ast.literal_eval(line)   # entry as (key, value) tuple
+                except:                    # exception is raised on a truncated or corrupted line
+                    continue               # next line is parsed
+                cache[key] = value         # entry is added (later lines override the earlier ones)
+                cache.move_to_end(key)     # entry is the most recently used
+                if len(cache) > max_entries:      # case the memory cache is full
+                    cache.popitem(last=False)     # the least recently used entry is removed
+    except FileNotFoundError:              # exception is raised when the file does not exist yet
+        return
+    except:                                # exception is raised on other file issues
+        return
+
+    stats['loaded'] = len(cache)           # entries loaded from the file
+    if lines > 2 * max_entries:            # case the file has many more lines than the entries in memory
+        try:                               # attempt
+            tmp = fname + '.tmp'           # temporary file
+            with open(tmp, 'w') as f:      # temporary file is opened in write mode
+                for key, value in cache.items():      # iteration over the entries in memory
+                    f.write(repr((key, value)) + '\n')   # entry is written
+            os.replace(tmp, fname)         # the cache file is replaced, atomically
+        except:                            # exception is raised on file issues
+            pass
+
+
+
+
+
+
+def get(key):
+    """ Returns the cached value for the key, or None in case of miss. Hits and misses are counted."""
+
+    with cache_lock:                       # cache is accessed by one thread at the time
+        if not loaded:                     # case the cache file is not loaded yet
+            load()                         # cache file is loaded
+        if key in cache:                   # case of cache hit
+            cache.move_to_end(key)         # entry is the most recently used
+            stats['hits'] += 1             # hits counter is increased
+            return cache[key]              # cached value is returned
+        stats['misses'] += 1               # misses counter is increased
+        return None
+
+
+
+
+
+
+def put(key, value):
+    """ Adds the entry to the memory cache (removing the least recently used entry when full), and it appends the
+        entry to the cache file. The value must be made of python literals (strings, numbers, tuples, lists, dicts)."""
+
+    with cache_lock:                       # cache is accessed by one thread at the time
+        if not loaded:                     # case the cache file is not loaded yet
+            load()                         # cache file is loaded
+        cache[key] = value                 # entry is added
+        cache.move_to_end(key)             # entry is the most recently used
+        if len(cache) > max_entries:       # case the memory cache is full
+            cache.popitem(last=False)      # the least recently used entry is removed
+        try:                               # attempt
+            if not os.path.exists(folder): # case the folder does not exist
+                os.makedirs(folder)        # folder is made
+            with open(fname, 'a') as f:    # cache file is opened in append mode
+                f.write(repr((key, value)) + '\n')   # entry is appended, as one line
+            stats['appended'] += 1         # appended entries counter is increased
+        except:                            # exception is raised on file issues (the memory cache still works)
+            pass
+
+
+
+
+
+
+def cache_stats():
+    """ Returns a dict with the cache statistics: hits, misses, hit rate (%), entries in memory, entries loaded from
+        the file at startup, and entries appended to the file."""
+
+    with cache_lock:                       # cache is accessed by one thread at the time
+        requests = stats['hits'] + stats['misses']   # total cache requests
+        hit_rate = round(100 * stats['hits'] / requests, 1) if requests else 0   # hit rate in percentage
+        return {'hits':stats['hits'], 'misses':stats['misses'], 'hit_rate':hit_rate, 'entries':len(cache),
+                'loaded':stats['loaded'], 'appended':stats['appended']}
+
+
+
+
+
+
+def clear(remove_file=False):
+    """ Empties the memory cache and the statistics (the file entries are not reloaded); The cache file is deleted
+        when remove_file is True."""
+
+    global loaded
+
+    with cache_lock:                       # cache is accessed by one thread at the time
+        cache.clear()                      # memory cache is emptied
+        for key in stats:                  # iteration over the statistics
+            stats[key] = 0                 # statistics are set to zero
+        loaded = True                      # the file entries are not reloaded
+        if remove_file and os.path.exists(fname):   # case the file has to be removed
+            os.remove(fname)               # cache file is removed
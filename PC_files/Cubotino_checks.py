@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Assertion-based checks of the PC side modules of CUBOTino
+#
+# Each check_* function raises AssertionError at the first wrong result:
+#  - check_translation: the transition table translation vs the baseline one (robot moves per solver move, via the
+#    moves_dict and the cube orientation dicts), the streamed robot moves vs the string, and translate_batch()
+#  - check_optimizer: the robot moves cancelling each other out, also when a rotation is pending, the cases the
+#    streaming window differs from the whole string optimization, and the whole string optimization fixed point
+#  - check_packing: encode_moves() / decode_moves() round trip, the moves count and the hex text
+#  - check_simulator: the robot moves of random solutions solve their cubes, with the cube holder in range
+#  - check_symmetry: the rotated / mirrored cubes have the same canonical cube, and the mapped solutions solve it
+#  - check_tables: the memory-mapped solver tables have the table files content, without patching the array module
+#  - check_missing_table: a missing solver table is generated, by the solver imported with the other tables mapped
+#
+# To be run whenever the translator changes, from the PC_files folder (the solver tables are in the twophase folder):
+#   python Cubotino_checks.py
+#
+#############################################################################################################
+"""
+
+import Cubotino_moves as cm                # translate a cube solution into CUBOTino robot moves (by Andrea Favero)
+import random                              # random library, for the random solutions
+import time                                # time library is imported
+
+
+
+
+# Global variables
+
+seed = 1                                   # seed of the random solutions, so the checks are repeatable
+
+
+
+
+
+
+def random_solution(rng, length=20):
+    """ Returns a random solver solution (string without spaces), without consecutive moves on the same face."""
+
+    moves = []                             # list of the solver moves
+    while len(moves) < length:             # iteration until the solution length
+        move = rng.choice(cm.solver_moves) # random solver move
+        if not moves or move[0] != moves[-1][0]:   # case the move is not on the face of the previous one
+            moves.append(move)
+    return ''.join(moves)
+
+
+
+
+
+
+def baseline_translation(solution):
+    """ Baseline translation, as before the transition table: Each solver move is adapted to the cube orientation on
+        the robot, translated via moves_dict, and the cube orientation is updated by the robot moves."""
+
+    h_faces = {'L':'L', 'F':'F', 'R':'R'}  # faces around the bottom/upper faces, at the start
+    v_faces = {'D':'D', 'F':'F', 'U':'U'}  # faces around the left/right faces, at the start
+    robot_moves = ''                       # robot moves string
+    for i in range(0, len(solution), 2):   # iteration over the solver moves
+        robot_seq = cm.moves_dict[cm.adapt_move(solution[i:i+2], h_faces, v_faces)]   # robot moves of the solver move
+        cm.cube_orient_update(robot_seq, h_faces, v_faces)   # cube orientation after the robot moves
+        robot_moves += robot_seq
+    return robot_moves
+
+
+
+
+
+
+def table_translation(solution):
+    """ Transition table translation, on the solver moves as they are (without the commuting moves reordering)."""
+
+    orient = 0                             # cube orientation index at the start
+    robot_moves = ''                       # robot moves string
+    for i in range(0, len(solution), 2):   # iteration over the solver moves
+        robot_seq, orient = cm.transition_table[orient][cm.solver_moves_idx[solution[i:i+2]]]
+        robot_moves += robot_seq
+    return robot_moves
+
+
+
+
+
+
+def check_translation(n=2000):
+    """ The transition table translation matches the baseline one, and the streamed robot moves match the string."""
+
+    rng = random.Random(seed)              # random generator
+    solutions = [random_solution(rng) for _ in range(n)]   # random solver solutions
+    for solution in solutions:             # iteration over the solutions
+        assert table_translation(solution) == baseline_translation(solution), solution
+        robot, robot_moves, tot_moves = cm.robot_required_moves(solution, '')   # robot moves string
+        assert ''.join(cm.robot_moves_stream(solution)) == robot_moves, solution
+        assert tot_moves == cm.count_moves(robot_moves), solution
+    assert list(cm.translate_batch(solutions)[0]) == [cm.robot_required_moves(s, '')[1] for s in solutions]
+
+
+
+
+
+
+def check_optimizer(n=2000):
+    """ Moves cancelling each other out are removed, also around a pending rotation; Beyond the streaming window the
+        streamed moves are final, so they differ from the robot moves string only in those cases. The robot moves
+        string is the fixed point of the optimization, ending with a rotation."""
+
+    optimize = lambda moves, window=cm.stream_window: ''.join(cm.optimize_stream(cm.split_moves(moves), window=window))
+    cases = {'R1F1F3R3': '',               # rotation pending, while the flips cancel out
+             'R1S1F2F2S3R3R1': 'R1',       # nested cancellations (F2F2, S1S3, R1R3)
+             'R1F3F1S1': 'R1',             # moves after the last rotation are removed
+             'F1F1F1F1R1': 'R1',           # four flips cancel out
+             'S1R1F1F1R3': 'S1R1F2R3'}     # flips merged, the rotations don't cancel out
+    for moves, expected in cases.items():  # iteration over the cases
+        assert optimize(moves) == expected, (moves, optimize(moves), expected)
+        assert cm.optimize_moves(moves) == expected, moves
+
+    spins = 'S1F1' * cm.stream_window      # spins and flips, pending on the stack beyond the window
+    undo = 'F3S3' * cm.stream_window       # spins and flips, undoing the previous ones
+    moves = 'R1' + spins + undo + 'R3F1R1' # the first rotation is cancelled only when the whole stack is pending
+    assert optimize(moves, None) == 'F1R1', optimize(moves, None)
+    assert optimize(moves) == 'R1R3F1R1', optimize(moves)   # the first rotation is final beyond the window
+    assert cm.optimize_moves(moves) == 'F1R1', cm.optimize_moves(moves)   # the string is optimized without window
+
+    moves = 'F3R1R1S3F2R1R1F2S3F2S3F1S1F3F1F1S1F2S1F3F3S1F1S1S1S1R3R1S3F3'   # rotation cancelled beyond the window
+    assert cm.optimize_moves(moves) == 'F3R1R1S3F2R1R1', cm.optimize_moves(moves)   # no moves after the last rotation
+    rng = random.Random(seed)              # random generator
+    for _ in range(n):                     # iteration over random robot moves strings
+        moves = ''.join(rng.choice(('F1', 'F2', 'F3', 'S1', 'S3', 'R1', 'R3')) for _ in range(rng.randint(1, 40)))
+        optimized = cm.optimize_moves(moves)   # optimized robot moves
+        assert cm.optimize_moves(optimized) == optimized, moves   # fixed point, a second pass changes nothing
+        assert not optimized or optimized[-2] == 'R', moves       # the string ends with a rotation
+
+    rng = random.Random(seed)              # random generator
+    for _ in range(n):                     # iteration over random solutions
+        robot_moves = table_translation(random_solution(rng))   # robot moves, before the optimization
+        assert optimize(robot_moves) == optimize(robot_moves, None), robot_moves
+
+
+
+
+
+
+def check_packing(n=2000):
+    """ encode_moves() / decode_moves() round trip, the packed moves count and the hex text of the packed moves."""
+
+    rng = random.Random(seed)              # random generator
+    for _ in range(n):                     # iteration over random solutions
+        robot_moves = cm.robot_required_moves(random_solution(rng), '')[1]   # robot moves string
+        data = cm.encode_moves(robot_moves)                    # packed robot moves
+        assert ''.join(cm.decode_moves(data)) == robot_moves, robot_moves
+        assert cm.unpack_moves(data) == robot_moves, robot_moves
+        assert cm.count_packed_moves(data) == cm.count_moves(robot_moves), robot_moves
+        assert cm.packed_from_hex(cm.packed_hex(data)) == data, robot_moves
+    assert cm.unpack_moves(cm.encode_moves('')) == ''          # empty robot moves
+    assert cm.unpack_moves(cm.encode_moves('F7S1')) == 'F7S1'  # longest flips run of a packed code
+
+
+
+
+
+
+def check_simulator(n=20000):
+    """ The robot moves of random solutions solve their cubes, and the cube holder range is checked."""
+
+    import Cubotino_simulator as sim       # vectorized facelets simulator (by Andrea Favero)
+
+    stats = sim.verify(n, processes=1, seed=seed)   # robot moves of random solutions, applied by the simulator
+    assert not stats['failed'] and stats['holder_failed'] == 0, stats['failed'][:3]
+
+    codes = sim.encode(['R1S3R1S3', 'S1R1S1', 'R1R3S3S3', 'R3S1S3F1R1'])   # robot moves vs cube holder range
+    assert sim.holder_ok(codes).tolist() == [True, False, False, True]
+    solved = sim.simulate(sim.solved_by(sim.random_solutions(1, 1, sim.np.random.default_rng(seed))),
+                          sim.encode(['']))   # no robot moves
+    assert not sim.is_solved(solved).any()  # a turned face is not solved without moves
+
+
+
+
+
+
+def check_symmetry(n=200, variants=4):
+    """ A cube and its rotated / mirrored versions have the same canonical cube, and the solution mapped to the
+        canonical cube solves it (and it is mapped back to the original solution)."""
+
+    import Cubotino_symmetry as cy         # canonical cube among the 48 symmetric ones (by Andrea Favero)
+    import Cubotino_cube_state as cst      # compact cube status, with the solver moves permutations (by Andrea Favero)
+
+    rng = random.Random(seed)              # random generator
+    for _ in range(n):                     # iteration over the random cubes
+        solution = random_solution(rng)    # random solution
+        moves = [solution[i:i+2] for i in range(0, len(solution), 2)]   # list of the solution moves
+        scramble = [m[0] + str(4 - int(m[1])) for m in reversed(moves)]  # inverse moves, scrambling the solved cube
+        cube_defstr = cst.CubeState().solver_moves(' '.join(scramble)).to_string()   # cube solved by the solution
+        canonical, sym = cy.canonical_cube(cube_defstr)   # canonical cube, and its symmetry
+        mapped = cy.to_canonical(moves, sym)   # solution of the canonical cube
+        assert cst.CubeState.from_string(canonical).solver_moves(' '.join(mapped)).is_solved(), cube_defstr
+        assert cy.from_canonical(mapped, sym) == moves, cube_defstr
+
+        cube = cy.to_cubie(cube_defstr)    # cube as cubie tuple
+        for s in rng.sample(range(1, 48), variants):   # iteration over random symmetries (not the identity)
+            variant = cy.multiply(cy.multiply(cy.sym_cubes[s], cube), cy.sym_cubes[cy.inv_idx[s]])   # S * cube * S^-1
+            assert cy.canonical_cube(cy.to_defstr(variant))[0] == canonical, (cube_defstr, s)
+
+
+
+
+
+
+def check_tables(n=5):
+    """ The solver imported with the memory-mapped tables: The tables have the content of the table files (as read into
+        arrays), the array module is not patched, and the solutions solve their cubes."""
+
+    import array                           # array library, to read the table files as the solver does
+    import Cubotino_tables as ct           # memory-mapped solver tables (by Andrea Favero)
+    import Cubotino_solver as cs           # Kociemba solver, imported with the memory-mapped tables (by Andrea Favero)
+    import Cubotino_cube_state as cst      # compact cube status, with the solver moves permutations (by Andrea Favero)
+    import sys                             # sys library, for the solver modules
+
+    assert array.array is ct.real_array    # the array module is not patched
+    assert ct.tables or not ct.mapped, 'no mapped tables'
+    for fname, (mm, view) in ct.tables.items():   # iteration over the mapped tables
+        table = array.array(view.format)   # table read into an array, as per the solver
+        with open(fname, 'rb') as f:       # table file
+            table.fromfile(f, len(view))
+        assert table.tobytes() == view.tobytes(), fname
+    for module in list(sys.modules.values()):   # iteration over the imported modules
+        if isinstance(getattr(module, '__loader__', None), ct.MappedLoader):   # case of solver module
+            assert all([value is not ct.patched_module for value in vars(module).values()]), module.__name__
+
+    rng = random.Random(seed)              # random generator
+    for _ in range(n):                     # iteration over the random cubes
+        cube_defstr = cst.CubeState().solver_moves(' '.join(rng.choice(cm.solver_moves) for _ in range(30))).to_string()
+        s = cs.sv.solve(cube_defstr, 20, 2)   # Kociemba solver is called
+        assert cst.CubeState.from_string(cube_defstr).solver_moves(s).is_solved(), (cube_defstr, s)
+
+
+
+
+
+
+def check_missing_table(fname='phase2_cornsliceprun'):
+    """ A solver table file is missing: The solver, imported with the other tables memory-mapped, generates it out of
+        the mapped ones, and the solution solves the cube. The solver runs in a process started in a temporary folder,
+        with links to the table files but the missing one."""
+
+    import Cubotino_cube_state as cst      # compact cube status, with the solver moves permutations (by Andrea Favero)
+    import subprocess                      # subprocess library, to import the solver in a fresh process
+    import tempfile                        # tempfile library, for the temporary tables folder
+    import sys                             # sys library, for the python executable
+    import os                              # os library, for the table files links
+
+    rng = random.Random(seed)              # random generator
+    cube_defstr = cst.CubeState().solver_moves(' '.join(rng.choice(cm.solver_moves) for _ in range(30))).to_string()
+    here = os.path.dirname(os.path.abspath(__file__))   # PC_files folder
+    code = ('import sys; sys.path.insert(0, sys.argv[1]); import Cubotino_solver as cs; '
+            'print(cs.sv.solve(sys.argv[2], 20, 2))')   # solver import and solve, in the temporary folder
+    with tempfile.TemporaryDirectory() as folder:   # temporary folder, with the twophase subfolder
+        os.mkdir(os.path.join(folder, 'twophase'))
+        for name in os.listdir(os.path.join(here, 'twophase')):   # iteration over the table files
+            if name != fname:              # case of table file not to be generated
+                os.symlink(os.path.join(here, 'twophase', name), os.path.join(folder, 'twophase', name))
+        out = subprocess.run([sys.executable, '-c', code, here, cube_defstr], cwd=folder,
+                             capture_output=True, text=True)   # solver process
+        assert out.returncode == 0, out.stderr.strip().splitlines()[-1:]
+        assert os.path.isfile(os.path.join(folder, 'twophase', fname)), fname   # table file generated
+    s = out.stdout.strip().splitlines()[-1] # solver solution, on the last line
+    assert cst.CubeState.from_string(cube_defstr).solver_moves(s).is_solved(), (cube_defstr, s)
+
+
+
+
+
+
+if __name__ == "__main__":
+    checks = (check_translation, check_optimizer, check_packing, check_simulator, check_symmetry, check_tables,
+              check_missing_table)
+    for check in checks:                   # iteration over the checks
+        start = time.time()                # time reference
+        check()                            # AssertionError is raised at the first wrong result
+        print(f'{check.__name__}: ok ({round(time.time() - start, 1)} secs)')
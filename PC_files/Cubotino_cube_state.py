@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Compact cube status, for the PC side of CUBOTino
+#
+# The cube status has been passed around as the cube definition string, as dict of the facelets (GUI), as colors of
+# the sketch facelets and as cubie cube, with Python loops converting between them.
+# This module has one cube status class, CubeState, backed by a NumPy array of 54 bytes (face index per facelet,
+# faces order URFDLB as per the cube definition string):
+#  - Robot moves (flips, spins and 1st layer rotations) and solver moves are applied as facelets permutations, by
+#    NumPy fancy indexing (permutation as per the 'ref' tuples: new facelet i is the one currently at ref[i])
+#  - Conversion from/to the cube definition string, the facelets colors, and 54 bytes (serialization)
+#  - The cube status is immutable (the moves return a new cube status, the facelets array is read-only), so it can
+#    be hashed: Hashing and equality on the 54 bytes, and key() returns them (i.e. as dict key)
+# The permutations are also available as module arrays (robot_perms, solver_perms), to permute batches of cubes.
+#
+#############################################################################################################
+"""
+
+import numpy as np                         # NumPy library, for the facelets arrays and permutations
+import Cubotino_lookup as cl               # facelets permutations of the solver moves (by Andrea Favero)
+
+
+
+
+# Global variables
+
+faces = 'URFDLB'                           # faces order, as per the cube definition string
+to_letters = bytes.maketrans(bytes(range(6)), faces.encode())   # from face index to face letter (bytes translation)
+to_indexes = bytes.maketrans(faces.encode(), bytes(range(6)))   # from face letter to face index (bytes translation)
+
+# facelets permutations of the robot moves: new facelet i is the one currently at ref[i]
+robot_refs = {
+    # flip (complete cube rotation around L-R horizontal axis)
+    'F1': (53,52,51,50,49,48,47,46,45,11,14,17,10,13,16,9,12,15,0,1,2,3,4,5,6,7,8,18,
+           19,20,21,22,23,24,25,26,42,39,36,43,40,37,44,41,38,35,34,33,32,31,30,29,28,27),
+    # spin CW (complete cube rotation around vertical axis)
+    'S1': (2,5,8,1,4,7,0,3,6,18,19,20,21,22,23,24,25,26,36,37,38,39,40,41,42,43,44,
+           33,30,27,34,31,28,35,32,29,45,46,47,48,49,50,51,52,53,9,10,11,12,13,14,15,16,17),
+    # spin CCW
+    'S3': (6,3,0,7,4,1,8,5,2,45,46,47,48,49,50,51,52,53,9,10,11,12,13,14,15,16,17,
+           29,32,35,28,31,34,27,30,33,18,19,20,21,22,23,24,25,26,36,37,38,39,40,41,42,43,44),
+    # rotation CW (lowest layer rotation versus mid and top ones)
+    'R1': (0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,24,25,26,18,19,20,21,22,23,42,43,44,
+           33,30,27,34,31,28,35,32,29,36,37,38,39,40,41,51,52,53,45,46,47,48,49,50,15,16,17),
+    # rotation CCW
+    'R3': (0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,51,52,53,18,19,20,21,22,23,15,16,17,
+           29,32,35,28,31,34,27,30,33,36,37,38,39,40,41,24,25,26,45,46,47,48,49,50,42,43,44)}
+
+robot_perms = {move: np.array(ref, dtype=np.intp) for move, ref in robot_refs.items()}   # robot moves permutations
+robot_perms['F2'] = robot_perms['F1'][robot_perms['F1']]   # two flips
+robot_perms['F3'] = robot_perms['F2'][robot_perms['F1']]   # three flips
+
+solver_perms = {move: np.array(perm, dtype=np.intp) for move, perm in zip(cl.move_names, cl.move_perms)}   # solver moves
+
+
+
+
+
+
+def compose(perms):
+    """ Returns the permutation of the permutations applied in sequence (first one first)."""
+
+    perm = np.arange(54, dtype=np.intp)    # identity permutation
+    for p in perms:                        # iteration over the permutations
+        perm = perm[p]                     # permutation p after the previous ones
+    return perm
+
+
+
+
+
+
+def robot_moves_perm(robot_moves):
+    """ Returns the permutation of the robot moves string (i.e. 'F1R3S1'), as a single permutation."""
+
+    return compose([robot_perms[robot_moves[i:i+2]] for i in range(0, len(robot_moves), 2)])
+
+
+
+
+
+
+def solver_string_perm(solver_string):
+    """ Returns the permutation of the solver string (i.e. 'U1 R2 F3 (3f)'), as a single permutation."""
+
+    moves = solver_string[:solver_string.find('(')].split() if '(' in solver_string else solver_string.split()
+    return compose([solver_perms[m] for m in moves])
+
+
+
+
+
+
+class CubeState:
+    """ Cube status as 54 facelets (face index 0 to 5, faces order URFDLB), in a read-only NumPy array of unsigned bytes.
+        The cube status is immutable: The moves return a new cube status."""
+
+    __slots__ = ('facelets',)
+
+    def __init__(self, facelets=None):
+        """ Cube status from the 54 face indexes (array, list or bytes), or the solved cube."""
+
+        if facelets is None:               # case of no facelets
+            self.facelets = np.repeat(np.arange(6, dtype=np.uint8), 9)   # solved cube
+        else:                              # case of facelets
+            self.facelets = np.array(facelets, dtype=np.uint8).reshape(54)   # copy of the facelets
+        self.facelets.flags.writeable = False  # facelets are read-only
+
+    @classmethod
+    def from_string(cls, cube_defstr):
+        """ Cube status from the cube definition string (i.e. 'UUUUUUUUURRR...')."""
+
+        return cls.from_bytes(cube_defstr.strip().encode().translate(to_indexes))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """ Cube status from the 54 bytes of the face indexes (as per to_bytes)."""
+
+        if len(data) != 54:                # case of wrong data length
+            raise ValueError(f'cube status needs 54 facelets, {len(data)} given')
+        return cls(np.frombuffer(data, dtype=np.uint8))
+
+    @classmethod
+    def from_colors(cls, facelets_colors, face_colors):
+        """ Cube status from the colors of the 54 facelets, and the colors of the faces (URFDLB order)."""
+
+        face_index = {color: i for i, color in enumerate(face_colors)}   # dict from color to face index
+        return cls([face_index[color] for color in facelets_colors])
+
+    def to_string(self):
+        """ Returns the cube definition string."""
+
+        return self.facelets.tobytes().translate(to_letters).decode()
+
+    def to_bytes(self):
+        """ Returns the 54 bytes of the face indexes (serialization)."""
+
+        return self.facelets.tobytes()
+
+    def to_colors(self, face_colors):
+        """ Returns the list of the colors of the 54 facelets, from the colors of the faces (URFDLB order)."""
+
+        return [face_colors[f] for f in self.facelets.tolist()]
+
+    def key(self):
+        """ Returns the 54 bytes of the face indexes, as key of the cube status (i.e. dict key)."""
+
+        return self.facelets.tobytes()
+
+    def permute(self, perm):
+        """ Returns the cube status after the facelets permutation (new facelet i is the one currently at perm[i])."""
+
+        return CubeState(self.facelets[perm])
+
+    def robot_move(self, move):
+        """ Returns the cube status after one robot move ('F1', 'F2', 'F3', 'S1', 'S3', 'R1' or 'R3')."""
+
+        return self.permute(robot_perms[move])
+
+    def robot_moves(self, robot_moves):
+        """ Returns the cube status after the robot moves string (i.e. 'F1R3S1')."""
+
+        return self.permute(robot_moves_perm(robot_moves))
+
+    def solver_move(self, move):
+        """ Returns the cube status after one solver move ('U1', 'U2', ... 'B3')."""
+
+        return self.permute(solver_perms[move])
+
+    def solver_moves(self, solver_string):
+        """ Returns the cube status after the solver string (i.e. 'U1 R2 F3 (3f)')."""
+
+        return self.permute(solver_string_perm(solver_string))
+
+    def is_solved(self):
+        """ Returns True when each face has the color of its center facelet."""
+
+        return bool((self.facelets.reshape(6, 9) == self.facelets[4::9, None]).all())
+
+    def __getitem__(self, i):
+        """ Returns the face letter of the facelet i, as per the cube definition string."""
+
+        return faces[self.facelets[i]]
+
+    def __len__(self):
+        return 54
+
+    def __eq__(self, other):
+        return isinstance(other, CubeState) and np.array_equal(self.facelets, other.facelets)
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return f"CubeState('{self.to_string()}')"
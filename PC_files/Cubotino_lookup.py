@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Lookup table of the short scrambles, for the PC side of CUBOTino
+#
+# A cube scrambled by a few moves still costs a solver call, and the solver returns the first solution within
+# max_length, not necessarily the shortest one.
+# This module has a precomputed table of all the cube statuses within a given depth (face turns) from the solved cube,
+# each with an optimal solution:
+#  - The table is generated by a breadth-first search from the solved cube, over the 18 solver moves (numpy)
+#  - Each cube status is stored as a 64 bits hash (FNV-1a of the cube definition string), in a sorted array, and
+#    the solution is stored in a parallel array (up to 7 moves in 32 bits)
+#  - The two arrays are files in the twophase folder, memory-mapped read-only when first used (as Cubotino_tables)
+#  - lookup() searches the hash by bisection, and verifies the solution on the cube definition string (hashes
+#    collisions are then ignored): A hit returns the solver string in some microseconds, otherwise None
+# The solver service (Cubotino_solver_service) and the batch solving check the table before calling the solver.
+#
+# The table is generated, with the report of its size by depth, via (run from the PC_files folder):
+#   python Cubotino_lookup.py --depth 5
+# States by depth (face turns): 1, 18, 243, 3240, 43239, 574908, 7618438, 100803036; 12 bytes each.
+# Depth 5 (620k states, 7 MB) is generated in about 1 sec; Depth 6 (8.2M states, 94 MB) in about 15 secs, with 1 GB RAM.
+#
+#############################################################################################################
+"""
+
+from bisect import bisect_left             # bisection, to search the hash in the sorted array
+import mmap                                # mmap library, to map the table files read-only
+import time                                # time library is imported
+import os                                  # os library, for the table files path
+
+
+
+
+# Global variables
+
+folder = 'twophase'                        # folder of the table files (as per the solver tables)
+hashes_fname = 'lookup_hashes'             # file of the sorted states hashes (unsigned 64 bits)
+solutions_fname = 'lookup_solutions'       # file of the solutions (unsigned 32 bits), parallel to the hashes
+max_depth = 7                              # max depth, as 7 moves (base 19 digits) fit 32 bits
+
+faces = 'URFDLB'                           # faces order, as per the cube definition string and the solver moves
+solved = ''.join([f * 9 for f in faces])   # cube definition string of the solved cube
+move_names = [f + str(p) for f in faces for p in (1, 2, 3)]   # solver moves, as per the solver Move order
+
+FNV_OFFSET = 0xcbf29ce484222325            # FNV-1a 64 bits offset basis
+FNV_PRIME = 0x100000001b3                  # FNV-1a 64 bits prime
+MASK = 0xffffffffffffffff                  # 64 bits mask
+
+# facelets of the corners and edges positions, as per the solver definitions (cornerFacelet, edgeFacelet)
+corner_facelets = ((8, 9, 20), (6, 18, 38), (0, 36, 47), (2, 45, 11), (29, 26, 15), (27, 44, 24), (33, 53, 42), (35, 17, 51))
+edge_facelets = ((5, 10), (7, 19), (3, 37), (1, 46), (32, 16), (28, 25), (30, 43), (34, 52), (23, 12), (21, 41), (50, 39), (48, 14))
+
+# basic face turns (clockwise), as per the solver cubie moves (cp, co, ep, eo) in URFDLB order
+basic_moves = (((3, 0, 1, 2, 4, 5, 6, 7), (0, 0, 0, 0, 0, 0, 0, 0), (3, 0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11), (0,) * 12),
+               ((4, 1, 2, 0, 7, 5, 6, 3), (2, 0, 0, 1, 1, 0, 0, 2), (8, 1, 2, 3, 11, 5, 6, 7, 4, 9, 10, 0), (0,) * 12),
+               ((1, 5, 2, 3, 0, 4, 6, 7), (1, 2, 0, 0, 2, 1, 0, 0), (0, 9, 2, 3, 4, 8, 6, 7, 1, 5, 10, 11), (0, 1, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0)),
+               ((0, 1, 2, 3, 5, 6, 7, 4), (0, 0, 0, 0, 0, 0, 0, 0), (0, 1, 2, 3, 5, 6, 7, 4, 8, 9, 10, 11), (0,) * 12),
+               ((0, 2, 6, 3, 4, 1, 5, 7), (0, 1, 2, 0, 0, 2, 1, 0), (0, 1, 10, 3, 4, 5, 9, 7, 8, 2, 6, 11), (0,) * 12),
+               ((0, 1, 3, 7, 4, 5, 2, 6), (0, 0, 1, 2, 0, 0, 2, 1), (0, 1, 2, 11, 4, 5, 6, 10, 8, 9, 3, 7), (0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 1)))
+
+hashes = None                              # memoryview of the sorted hashes, once loaded
+solutions = None                           # memoryview of the solutions, once loaded
+loaded = False                             # flag for the table files loading attempted
+
+
+
+
+
+
+
+
+
+
+def facelet_permutation(cp, co, ep, eo):
+    """ Returns the facelets permutation of a cubie move: The moved cube string is ''.join([s[i] for i in perm])."""
+
+    perm = list(range(54))                 # identity permutation (centers are not moved)
+    for i in range(8):                     # iteration over the corner positions
+        for k in range(3):                 # iteration over the corner facelets
+            perm[corner_facelets[i][(k + co[i]) % 3]] = corner_facelets[cp[i]][k]
+    for i in range(12):                    # iteration over the edge positions
+        for k in range(2):                 # iteration over the edge facelets
+            perm[edge_facelets[i][(k + eo[i]) % 2]] = edge_facelets[ep[i]][k]
+    return tuple(perm)
+
+
+
+
+
+
+def build_move_perms():
+    """ Returns the list of the facelets permutations of the 18 solver moves (U1, U2, U3, R1, ... B3)."""
+
+    perms = []                             # list of the moves permutations
+    for move in basic_moves:               # iteration over the basic face turns
+        perm = facelet_permutation(*move)  # permutation of the clockwise face turn
+        p = perm                           # permutation of the face turn repeated
+        for power in range(3):             # iteration over the powers (1, 2, 3 quarter turns)
+            perms.append(p)
+            p = tuple([p[i] for i in perm])   # one more clockwise quarter turn
+    return perms
+
+move_perms = build_move_perms()            # facelets permutations of the 18 solver moves
+
+
+
+
+
+
+def inverse_move(m):
+    """ Returns the index of the inverse move (i.e. U3 for U1, U2 for U2), also for numpy arrays of indexes."""
+
+    return 3 * (m // 3) + 2 - m % 3
+
+
+
+
+
+
+def apply_moves(cube_defstr, moves):
+    """ Returns the cube definition string after the moves (list of moves indexes)."""
+
+    s = cube_defstr                        # cube definition string
+    for m in moves:                        # iteration over the moves
+        s = ''.join([s[i] for i in move_perms[m]])   # facelets are permuted
+    return s
+
+
+
+
+
+
+def state_hash(cube_defstr):
+    """ Returns the 64 bits hash (FNV-1a) of the cube definition string."""
+
+    h = FNV_OFFSET                         # hash initial value
+    for c in cube_defstr.encode():         # iteration over the facelets
+        h = ((h ^ c) * FNV_PRIME) & MASK   # FNV-1a step
+    return h
+
+
+
+
+
+
+def decode(code):
+    """ Returns the list of moves indexes from the solution code (one base 19 digit per move, first move on the
+        less significant digit, 0 for no move)."""
+
+    moves = []                             # list of the moves indexes
+    while code:                            # iteration until all the digits are decoded
+        code, digit = divmod(code, 19)     # less significant digit
+        moves.append(digit - 1)
+    return moves
+
+
+
+
+
+
+def solver_string(moves):
+    """ Returns the solver string (i.e. 'U2 R1 F3 (3f)') of the moves indexes, with the same format of the solver."""
+
+    return ' '.join([move_names[m] for m in moves]) + (' ' if moves else '') + '(' + str(len(moves)) + 'f)'
+
+
+
+
+
+
+def load():
+    """ Maps the table files read-only, on the first call. Returns True when the table is available."""
+
+    global hashes, solutions, loaded
+
+    if not loaded:                         # case the table files are not loaded yet
+        loaded = True                      # loading is attempted once
+        try:                               # attempt
+            views = []                     # list of the memoryviews
+            for fname, typecode in ((hashes_fname, 'Q'), (solutions_fname, 'I')):   # iteration over the files
+                with open(os.path.join(folder, fname), 'rb') as f:   # table file is opened
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)   # table file mapped read-only
+                views.append(memoryview(mm).cast(typecode))   # memoryview, cast to the array type code
+            if len(views[0]) == len(views[1]):   # case of consistent table files
+                hashes, solutions = views  # memoryviews are assigned to the global variables
+        except:                            # exception is raised if the table files are missing
+            pass                           # the table is not used
+    return hashes is not None
+
+
+
+
+
+
+def lookup(cube_defstr):
+    """ Returns the optimal solver string (i.e. 'U2 R1 F3 (3f)') of a cube within the table depth, otherwise None."""
+
+    if len(cube_defstr) != 54 or not load():   # case of invalid string, or table not available
+        return None
+    h = state_hash(cube_defstr)            # hash of the cube status
+    idx = bisect_left(hashes, h)           # index of the hash in the sorted array
+    if idx == len(hashes) or hashes[idx] != h:   # case the hash is not in the table
+        return None
+    moves = decode(solutions[idx])         # solution moves
+    if apply_moves(cube_defstr, moves) != solved:   # case of hashes collision
+        return None
+    return solver_string(moves)
+
+
+
+
+
+
+def numpy_hash(states, np):
+    """ Returns the array of the hashes (as per state_hash) of the cube statuses array (rows of 54 characters codes)."""
+
+    h = np.full(len(states), FNV_OFFSET, dtype=np.uint64)   # hashes initial values
+    prime = np.uint64(FNV_PRIME)           # FNV-1a prime, as unsigned 64 bits (products wrap around)
+    for i in range(54):                    # iteration over the facelets
+        h ^= states[:, i]                  # FNV-1a step
+        h *= prime
+    return h
+
+
+
+
+
+
+def generate(depth, verbose=True):
+    """ Generates the table of all the cube statuses within depth moves from the solved cube (breadth-first search).
+        Returns the sorted hashes, the solutions arrays (numpy), and the report list of (depth, states, secs)."""
+
+    import numpy as np                     # numpy library, for the table generation only
+
+    start = time.time()                    # time reference
+    perms = np.array(move_perms, dtype=np.intp)   # facelets permutations of the moves
+    states = np.frombuffer(solved.encode(), dtype=np.uint8).reshape(1, 54)   # cube statuses of the last depth
+    codes = np.zeros(1, dtype=np.uint32)   # solutions of the cube statuses of the last depth
+    level_hashes = numpy_hash(states, np)  # hashes of the cube statuses of the last depth
+    all_hashes, all_codes = [level_hashes], [codes]   # lists of the hashes and solutions arrays, per depth
+    visited = level_hashes                 # sorted hashes of the cube statuses found so far
+    report = [(0, 1, 0)]                   # report of the states by depth
+
+    for d in range(1, depth + 1):          # iteration over the depths
+        child_hashes = []                  # hashes of the cube statuses one move further, per move
+        for m in range(18):                # iteration over the moves
+            child_hashes.append(numpy_hash(states[:, perms[m]], np))
+        child_hashes = np.concatenate(child_hashes)   # hashes, ordered by move and by parent
+        level_hashes, idx = np.unique(child_hashes, return_index=True)   # sorted unique hashes, first occurrence
+        pos = np.minimum(np.searchsorted(visited, level_hashes), len(visited) - 1)   # position in visited hashes
+        new = visited[pos] != level_hashes # cube statuses not found at lower depths (exactly d moves from solved)
+        level_hashes, idx = level_hashes[new], idx[new]
+        move, parent = np.divmod(idx, len(states))   # move and parent cube status of each new cube status
+
+        # solution: the inverse of the move, followed by the parent solution
+        codes = (inverse_move(move) + 1).astype(np.uint32) + np.uint32(19) * codes[parent]
+        if d < depth:                      # case the cube statuses are needed for the next depth
+            states = states[parent[:, None], perms[move]]   # new cube statuses
+        all_hashes.append(level_hashes)
+        all_codes.append(codes)
+        visited = np.union1d(visited, level_hashes)   # sorted hashes found so far
+        report.append((d, len(level_hashes), round(time.time() - start, 1)))
+        if verbose:                        # case of verbose
+            print(f'depth {d}: {len(level_hashes)} states ({time.time() - start:.1f} secs)')
+
+    hashes_arr = np.concatenate(all_hashes)   # hashes of all the cube statuses
+    codes_arr = np.concatenate(all_codes)  # solutions of all the cube statuses
+    order = np.argsort(hashes_arr, kind='stable')   # sorting order of the hashes
+    return hashes_arr[order], codes_arr[order], report
+
+
+
+
+
+
+def save(hashes_arr, codes_arr):
+    """ Writes the table files in the folder, as raw arrays (native byte order, as per the solver tables)."""
+
+    for fname, arr in ((hashes_fname, hashes_arr), (solutions_fname, codes_arr)):   # iteration over the files
+        tmp = os.path.join(folder, fname + '.tmp')   # temporary file
+        arr.tofile(tmp)                    # array is written
+        os.replace(tmp, os.path.join(folder, fname))   # table file is replaced at once
+
+
+
+
+
+
+def table_report(report):
+    """ Prints the table size by depth, from the generation report list of (depth, states, secs)."""
+
+    print(f'\n{"depth":>5} {"states":>12} {"cumulative":>12} {"size MB":>9} {"secs":>7}')
+    total = 0                              # cumulative amount of states
+    for d, n, secs in report:              # iteration over the depths
+        total += n
+        print(f'{d:>5} {n:>12} {total:>12} {total * 12 / 1048576:>9.1f} {secs:>7}')
+    print()
+
+
+
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # argument parser object creation
+    parser = argparse.ArgumentParser(description='Lookup table of the short scrambles: generation and report')
+
+    # --depth argument is added to the parser
+    parser.add_argument("-d", "--depth", type=int, default=5, choices=range(1, max_depth + 1),
+                        help="Max depth (face turns) of the cube statuses in the table. Default 5.")
+
+    # --test argument is added to the parser
+    parser.add_argument("-t", "--test", type=int, default=1000,
+                        help="Amount of random scrambles within the depth, to test the lookup. Default 1000.")
+
+    args = parser.parse_args()   # argument parsed assignement
+
+    hashes_arr, codes_arr, report = generate(args.depth)   # table is generated
+    save(hashes_arr, codes_arr)            # table files are written
+    table_report(report)                   # table size by depth
+
+    import random
+    found, optimal, secs = 0, 0, 0         # lookup test counters
+    for i in range(args.test):             # iteration over the random scrambles
+        scramble = [random.randrange(18) for j in range(random.randint(0, args.depth))]   # random moves
+        cube_defstr = apply_moves(solved, scramble)   # scrambled cube definition string
+        t = time.perf_counter()            # time reference
+        s = lookup(cube_defstr)            # table lookup
+        secs += time.perf_counter() - t
+        if s is not None:                  # case of table hit
+            found += 1
+            optimal += s.count(' ') <= len(scramble)   # solution not longer than the scramble
+    if args.test:                          # case of lookup test
+        print(f'lookup test: {found}/{args.test} found, {optimal} not longer than the scramble, '
+              f'{1e6 * secs / args.test:.1f} microsecs per lookup\n')
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Benchmark of the translation from the Kociemba solver solutions to CUBOTino robot moves.
+#
+# Random cubes are generated via cubie.CubieCube().randomize(), and solved by the Kociemba TwophaseSolver.
+# The solutions are then translated into robot moves via Cubotino_moves.translate_batch(), by reporting:
+#  - The translations per second, with and without the servos settings (minimum-time planner vs transition table)
+#  - The distribution of the robot moves per solver move
+#  - The estimated robot time
+#  - The parse and UART transfer times of the robot moves, as text strings vs packed format (4 bits per robot move)
+#
+# Run from the PC_files folder, as the solver tables are in the twophase subfolder, i.e.:
+#   python Cubotino_moves_benchmark.py --cubes 200 --timeout 1
+#
+#############################################################################################################
+"""
+
+import argparse
+
+# argument parser object creation
+parser = argparse.ArgumentParser(description='Benchmark of the Cubotino_moves translation')
+
+# --cubes argument is added to the parser
+parser.add_argument("-c", "--cubes", type=int, default=100,
+                    help="Amount of random cubes to be solved and translated. Default 100.")
+
+# --max_length argument is added to the parser
+parser.add_argument("--max_length", type=int, default=20,
+                    help="Solver max_length argument. Default 20.")
+
+# --timeout argument is added to the parser
+parser.add_argument("--timeout", type=float, default=1,
+                    help="Solver timeout argument (secs). Default 1.")
+
+# --repeat argument is added to the parser
+parser.add_argument("--repeat", type=int, default=3,
+                    help="Amount of repetitions for the translation timing. Default 3.")
+
+# --baud argument is added to the parser
+parser.add_argument("--baud", type=int, default=115200,
+                    help="UART baudrate, for the transfer time of the robot moves. Default 115200.")
+
+args = parser.parse_args()   # argument parsed assignement
+
+
+try:                                       # attempt
+    import solver as sv                    # import Kociemba solver, copied in robot folder
+    import cubie                           # import cubie Kociemba solver library part, copied in robot folder
+except:                                    # exception is raised if no library in folder or other issues
+    import twophase.solver as sv           # import Kociemba solver installed
+    import twophase.cubie as cubie         # import cubie Kociemba solver library part, installed
+
+import Cubotino_moves as cm                # translate a cube solution into CUBOTino robot moves (by Andrea Favero)
+import time                                # time library is imported
+import ast                                 # ast library, to safely parse the settings text file
+
+
+
+
+
+
+def read_servo_settings(fname='Cubotino_settings.txt'):
+    """ Returns the servos settings tuple from the text file, or the default settings when the file is not found."""
+
+    try:                                   # attempt
+        with open(fname, "r") as f:        # text file is opened
+            return ast.literal_eval(f.readline().strip())   # settings tuple, from the first line
+    except:                                # exception is raised if the file is missing or not readable
+        return (54,68,76,0,900,1000,800,300,51,76,101,2,3,1100,1200,100,'small','small')   # default servos settings
+
+
+
+
+
+
+def percentile(values, p):
+    """ Returns the p percentile (0 to 100) of a list of values, via the nearest rank method."""
+
+    values = sorted(values)                                     # sorted copy of the values
+    idx = min(len(values)-1, max(0, int(round(p/100*len(values)+0.5))-1))   # nearest rank index
+    return values[idx]                                          # percentile value
+
+
+
+
+
+
+def solve_random_cubes(cubes, max_length, timeout):
+    """ Generates and solves random cubes. Returns the list of solutions (strings without the '(Nf)' part)."""
+
+    solutions = []                                              # list of the solver solutions
+    start = time.time()                                         # time reference
+    for i in range(cubes):                                      # iteration over the cubes
+        cc = cubie.CubieCube()                                  # cube in cubie reppresentation
+        cc.randomize()                                          # randomized cube in cubie reppresentation
+        s = sv.solve(cc.to_facelet_cube().to_string(), max_length, timeout)   # Kociemba solver is called
+        solutions.append(s[:s.find('(')].strip())               # solution string, without the '(Nf)' part
+        print(f'\rsolved cubes: {i+1}/{cubes}', end='')         # progress feedback
+    print(f'\nsolving time: {round(time.time()-start, 1)} secs\n')
+    return solutions
+
+
+
+
+
+
+def benchmark(solutions, settings, repeat, label):
+    """ Times the batch translation, and prints the translations per second and the robot moves distribution."""
+
+    best = None                                                 # best (shortest) time for the batch translation
+    for r in range(repeat):                                     # iteration over the repetitions
+        start = time.perf_counter()                             # time reference
+        robot_strings, counts, times = cm.translate_batch(solutions, settings)   # batch translation
+        elapsed = time.perf_counter() - start                   # time of the batch translation
+        best = elapsed if best is None else min(best, elapsed)  # shortest time
+
+    ratios = [counts[i]/max(1, len(solutions[i].split())) for i in range(len(solutions))]  # robot moves per solver move
+    print(f'{label}:')
+    print(f'  translations per second: {round(len(solutions)/best, 1)}')
+    print(f'  robot moves per solution: mean {round(sum(counts)/len(counts), 1)}, min {min(counts)}, max {max(counts)}')
+    print(f'  robot moves per solver move: mean {round(sum(ratios)/len(ratios), 2)}, '
+          f'p10 {round(percentile(ratios, 10), 2)}, p50 {round(percentile(ratios, 50), 2)}, '
+          f'p90 {round(percentile(ratios, 90), 2)}')
+
+    bins = {}                                                   # histogram of the robot moves per solver move
+    for ratio in ratios:                                        # iteration over the ratios
+        key = int(ratio*4)/4                                    # bins of 0.25 width
+        bins[key] = bins.get(key, 0) + 1                        # histogram is updated
+    for key in sorted(bins):                                    # iteration over the histogram bins
+        print(f'    {key:4.2f}-{key+0.25:4.2f}: {"#"*max(1, round(60*bins[key]/len(ratios)))} {bins[key]}')
+
+    if settings is not None:                                    # case the robot times are estimated
+        print(f'  estimated robot time: mean {round(sum(times)/len(times), 1)} secs, '
+              f'p90 {round(percentile(list(times), 90), 1)} secs')
+    print()
+
+
+
+
+
+
+def parse_time(programs, parse, repeat):
+    """ Returns the shortest time (secs) to parse all the robot programs, via the parse function, over the repetitions."""
+
+    best = None                                                 # best (shortest) time for the parsing
+    for r in range(repeat):                                     # iteration over the repetitions
+        start = time.perf_counter()                             # time reference
+        for program in programs:                                # iteration over the robot programs
+            parse(program)                                      # robot program is parsed
+        elapsed = time.perf_counter() - start                   # time of the parsing
+        best = elapsed if best is None else min(best, elapsed)  # shortest time
+    return best
+
+
+
+
+
+
+def parse_string(moves):
+    """ Parses the robot moves string as the ESP32 does: Moves counting, then iteration over the robot moves."""
+
+    cm.count_moves(moves)                                       # total robot moves (the check_moves scan)
+    for move in cm.split_moves(moves):                          # iteration over the robot moves
+        pass
+
+
+
+
+
+
+def parse_packed(data):
+    """ Parses the packed robot moves as the ESP32 does: Moves counting, then iteration over the decoded robot moves."""
+
+    cm.count_packed_moves(data)                                 # total robot moves (the check_packed_moves scan)
+    for move in cm.decode_moves(data):                          # iteration over the robot moves
+        pass
+
+
+
+
+
+
+def benchmark_packed(solutions, settings, repeat, baud):
+    """ Compares the robot moves as text strings (2 characters per move) vs the packed format (4 bits per move):
+        Size, parse time and UART transfer time at the baudrate (10 bits per byte, as per 8N1 frames)."""
+
+    robot_strings, counts, times = cm.translate_batch(solutions, settings)   # robot moves strings
+    packed = [cm.encode_moves(moves) for moves in robot_strings]   # packed robot moves
+    hex_texts = [cm.packed_hex(data) for data in packed]       # packed robot moves, as hex text for the UART
+
+    sizes = (sum(len(m) for m in robot_strings), sum(len(d) for d in packed), sum(len(h) for h in hex_texts))
+    t_string = parse_time(robot_strings, parse_string, repeat)  # parse time of the robot moves strings
+    t_packed = parse_time(packed, parse_packed, repeat)         # parse time of the packed robot moves
+    n = len(robot_strings)                                      # amount of robot programs
+
+    print('robot moves, text strings vs packed format:')
+    for label, size in zip(('text string', 'packed bytes', 'packed hex text'), sizes):
+        print(f'  {label:16}: {round(size/n, 1)} bytes per program, '
+              f'transfer {round(1000*10*size/baud/n, 2)} ms at {baud} baud')
+    print(f'  parse time per program: text string {round(1e6*t_string/n, 1)} us, '
+          f'packed {round(1e6*t_packed/n, 1)} us (CPython)')
+    print()
+
+
+
+
+
+
+if __name__ == "__main__":
+    solutions = solve_random_cubes(args.cubes, args.max_length, args.timeout)   # solver solutions of random cubes
+    benchmark(solutions, None, args.repeat, 'transition table (no servos settings)')
+    benchmark(solutions, read_servo_settings(), args.repeat, 'minimum-time planner (servos settings)')
+    benchmark_packed(solutions, read_servo_settings(), args.repeat, args.baud)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Multi-core search for the Kociemba solver, for the PC side of CUBOTino
+#
+# The Kociemba solver searches the cube from 3 orientations (rotations along the URF-DBL diagonal) and their inverse
+# cubes, on 6 threads: Python threads are serialized by the GIL, so one core does all the work within the timeout.
+# This module runs the same searches on a pool of processes:
+#  - Each process searches one orientation, or one inverse, via the SolverThread of the solver (run on the process)
+#  - The best solution length, and the terminated flag, are shared by the processes via shared memory, so all the
+#    processes prune against the shortest solution found by any of them
+#  - All the processes stop when a solution within max_length is found, or after the timeout (once a solution is found)
+#  - The shortest solution is returned, with the same format of the solver solve() function
+# The processes import the solver with the memory-mapped tables (Cubotino_tables), so the tables pages are shared.
+#
+# The pool is started by the solver service, as the processes are spawned by re-importing the main module on
+# Windows. To compare the solutions found with threads vs processes, within the same timeout:
+#   python Cubotino_parallel.py --cubes 20 --timeout 2
+# Run from the PC_files folder, as the solver tables are in the twophase subfolder.
+#
+#############################################################################################################
+"""
+
+import multiprocessing as mp               # multiprocessing library, for the pool of processes and the shared memory
+import threading                           # threading library, to serialize the solver calls on the pool
+import time                                # time library is imported
+import os                                  # os library, for the amount of cores
+
+
+
+
+# Global variables
+
+max_processes = 6                          # max amount of processes (3 orientations by 2, with the inverse cubes)
+pool = None                                # pool of processes, started by start()
+pool_processes = 0                         # amount of processes of the pool
+shared = None                              # shared memory: [best solution length, terminated flag]
+shared_lock = None                         # lock to update the best solution length
+solve_lock = threading.Lock()              # lock to serialize the solver calls on the pool
+state = None                               # shared search state, on the processes of the pool
+cs = None                                  # Cubotino_solver module, imported on the processes of the pool
+
+
+
+
+
+
+class SharedSearch:
+    """ Search state shared by the processes, passed to the solver SolverThread as both the shortest_length list and
+        the terminated event: Item 0 is the best solution length (only lowered), is_set() and set() the terminated flag."""
+
+    def __init__(self, shared, shared_lock):
+        self.shared = shared                            # shared memory array: [best solution length, terminated flag]
+        self.shared_lock = shared_lock                  # lock to update the best solution length
+
+    def __getitem__(self, idx):
+        return self.shared[0]                           # best solution length, found by any process
+
+    def __setitem__(self, idx, value):
+        with self.shared_lock:                          # one process at the time
+            if value < self.shared[0]:                  # case of a shorter solution
+                self.shared[0] = value                  # best solution length is updated
+
+    def is_set(self):
+        return self.shared[1] == 1                      # terminated flag
+
+    def set(self):
+        self.shared[1] = 1                              # terminated flag is set
+
+
+
+
+
+
+def init_worker(shared_array, lock):
+    """ Initializes a process of the pool: Imports the solver (memory-mapped tables) and the shared search state."""
+
+    global state, cs
+
+    import Cubotino_solver                 # candidate solutions module, importing the Kociemba solver
+    cs = Cubotino_solver                   # module is assigned to the global variable
+    state = SharedSearch(shared_array, lock)   # shared search state
+
+
+
+
+
+
+def search(cube_defstr, rot, inv, max_length, timeout, start_time):
+    """ Runs on a process of the pool: Searches the cube rotated by rot (0, 1, 2 times 120deg along the URF-DBL
+        diagonal) and inverted when inv is 1. Returns the shortest solution found (list of moves, like 'R2'), or None."""
+
+    fc = cs.face.FaceCube()                # facelet cube object
+    fc.from_string(cube_defstr)            # facelet cube is defined by the cube definition string
+    solutions = []                         # list of the solutions found by this process
+    th = cs.sv.SolverThread(fc.to_cubie_cube(), rot, inv, max_length, timeout, start_time, solutions, state, state)
+    th.run()                               # search runs on this process (the SolverThread is not started)
+    return [m.name for m in solutions[-1]] if solutions else None
+
+
+
+
+
+
+def start(processes=None):
+    """ Starts the pool of processes (by default one per core, up to max_processes). Returns the amount of processes."""
+
+    global pool, pool_processes, shared, shared_lock
+
+    if pool is None:                       # case the pool is not started yet
+        if processes is None:              # case of default amount of processes
+            processes = os.cpu_count() or 1    # one process per core
+        processes = max(1, min(processes, max_processes))   # amount of processes
+        shared = mp.RawArray('i', 2)       # shared memory, without lock (the terminated flag is read at each node)
+        shared_lock = mp.Lock()            # lock to update the best solution length
+        pool = mp.Pool(processes, initializer=init_worker, initargs=(shared, shared_lock))
+        pool_processes = processes         # amount of processes of the pool
+    return pool_processes
+
+
+
+
+
+
+def solve(cubestring, max_length=20, timeout=3):
+    """ Solves the cube as per the solver solve() function, with the searches on the pool of processes.
+        Returns the solver string (i.e. 'U2 R1 F3 (3f)'), or the solver error string."""
+
+    import Cubotino_solver as cs           # candidate solutions module, importing the Kociemba solver
+    fc = cs.face.FaceCube()                # facelet cube object
+    s = fc.from_string(cubestring)         # facelet cube is defined by the cube definition string
+    if s != cs.cubie.CUBE_OK:              # case of errors on the facelet cube
+        return s                           # error string, as per the solver
+    cc = fc.to_cubie_cube()                # cubie cube representation
+    s = cc.verify()                        # cubie cube is verified
+    if s != cs.cubie.CUBE_OK:              # case of errors on the cubie cube
+        return s                           # error string, as per the solver
+
+    syms = cc.symmetries()                 # symmetries of the cube, to skip redundant searches (as per the solver)
+    if len({16, 20, 24, 28} & set(syms)) > 0:   # case of rotational symmetry along a long diagonal
+        tr = [0, 3]                        # one orientation, and its inverse
+    else:                                  # case without rotational symmetry along the long diagonals
+        tr = list(range(6))                # 3 orientations, and their inverses
+    if len(set(range(48, 96)) & set(syms)) > 0:   # case of antisymmetry
+        tr = [i for i in tr if i < 3]      # no search on the inverse cubes
+
+    with solve_lock:                       # one solver call at the time on the pool
+        start()                            # pool is started, when not started yet
+        shared[0] = 999                    # best solution length is reset
+        shared[1] = 0                      # terminated flag is reset
+        start_time = time.monotonic()      # time reference, as per the SolverThread (system-wide monotonic clock)
+        results = [pool.apply_async(search, (cubestring, i % 3, i // 3, max_length, timeout, start_time)) for i in tr]
+        for result in results:             # iteration over the searches
+            while not result.ready():      # iteration until the search has finished
+                if time.monotonic() > start_time + timeout and shared[0] < 999:   # case of timeout, with a solution
+                    shared[1] = 1          # all the searches are terminated
+                result.wait(0.01)          # short wait for the search
+        solutions = [result.get() for result in results]   # solutions of the searches (or None)
+
+    solutions = [moves for moves in solutions if moves is not None]   # solutions found
+    moves = min(solutions, key=len) if solutions else []    # shortest solution
+    return ' '.join(moves) + (' ' if moves else '') + '(' + str(len(moves)) + 'f)'   # same format as the solver
+
+
+
+
+
+
+def stop():
+    """ Stops the pool of processes."""
+
+    global pool
+
+    if pool is not None:                   # case the pool is started
+        pool.terminate()                   # processes are terminated
+        pool.join()                        # processes are joined
+        pool = None
+
+
+
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # argument parser object creation
+    parser = argparse.ArgumentParser(description='Kociemba solver: threads vs pool of processes')
+
+    # --cubes argument is added to the parser
+    parser.add_argument("-c", "--cubes", type=int, default=20,
+                        help="Amount of random cubes. Default 20.")
+
+    # --max_length argument is added to the parser
+    parser.add_argument("--max_length", type=int, default=18,
+                        help="Solver max_length argument. Default 18.")
+
+    # --timeout argument is added to the parser
+    parser.add_argument("--timeout", type=float, default=2,
+                        help="Solver timeout argument (secs). Default 2.")
+
+    # --processes argument is added to the parser
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Amount of processes of the pool. Default one per core, up to 6.")
+
+    args = parser.parse_args()   # argument parsed assignement
+
+    import Cubotino_solver as cs           # candidate solutions module, importing the Kociemba solver
+    processes = start(args.processes)      # pool of processes is started
+    print(f'\nrandom cubes: {args.cubes}, max_length: {args.max_length}, timeout: {args.timeout} secs, '
+          f'processes: {processes}, cores: {os.cpu_count()}\n')
+
+    results = {'threads': [], 'processes': []}   # dict of the (length, time) results
+    for i in range(args.cubes):            # iteration over the random cubes
+        cc = cs.cubie.CubieCube()          # cube in cubie reppresentation
+        cc.randomize()                     # randomized cube in cubie reppresentation
+        cube_defstr = cc.to_facelet_cube().to_string()   # cube definition string
+        for label, function in (('threads', cs.sv.solve), ('processes', solve)):   # iteration over the solvers
+            t = time.time()                # time reference
+            s = function(cube_defstr, args.max_length, args.timeout)   # solver is called
+            results[label].append((len(cs.solution_moves(s)), time.time() - t))
+        print(f'\rsolved cubes: {i+1}/{args.cubes}', end='')
+    stop()                                 # pool of processes is stopped
+
+    print('\n')
+    for label, values in results.items():  # iteration over the solvers
+        lengths = [length for length, t in values]   # solutions lengths
+        times = [t for length, t in values]          # solving times
+        print(f'{label:10}: average length {round(sum(lengths)/len(lengths), 2)} moves (max {max(lengths)}), '
+              f'average time {round(sum(times)/len(times), 3)} secs (max {round(max(times), 3)})')
+    print()
@@ -0,0 +1,501 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Robot-metric search, for the PC side of CUBOTino
+#
+# The Kociemba solver minimizes the amount of face turns, while the robot pays very different times per face:
+# The face at the bottom is turned by a bare rotation (i.e. D1 is 'R1S3'), the other faces need flips or spins first
+# (i.e. U2 is 'F2R1S3R1S3'), and the cube orientation on the robot changes along the solution.
+# This module searches the solution with the robot time as search cost:
+#  - The robot state is the cube orientation on the robot, the bottom servo position (CCW, home, CW) and the top
+#    cover/lifter position; After a solver move the face just turned is at the bottom, and the cover is open, so
+#    12 robot states are possible (4 orientations with that face at the bottom, by 3 servo positions)
+#  - The search state is the cube (solver coordinates) and the lowest robot time to reach each of those 12 robot
+#    states: The robot moves of each solver move are not fixed by the search, as per the Cubotino_moves planner
+#    (robot moves and their times are the planner primitives of Cubotino_moves, with the servos settings)
+#  - The search follows the two phases of the Kociemba solver, with its move and pruning tables (the memory-mapped
+#    tables of the twophase folder): Phase 1 solutions are generated by increasing length, and each of them is
+#    completed by all the phase 2 solutions within the robot time of the best solution found so far (branch and bound)
+#  - As per the solver, the cube is also searched rotated along the URF-DBL diagonal (3 frames), by the same phase 1
+#    lengths; The robot time is always computed on the solver moves of the cube (not rotated)
+#  - The Kociemba solution is the first robot time to improve, so the robot time is never higher than its one
+#  - The pruning tables distances (amount of moves still needed) are converted into robot time lower bounds, by the
+#    fastest sequences of that many moves from each robot state (precomputed per servos settings)
+#  - Each improving solution is kept, and the search stops at the timeout (hard deadline)
+# The solution often has more solver moves than the Kociemba one, but a lower robot time.
+# This is not an optimal search: The Python search covers a small part of the solutions within the timeout, and
+# the robot time saved grows with it (about 4% on random cubes, at 6 secs timeout).
+#
+# To compare the robot time of the Kociemba solutions vs the robot-metric search, on random cubes:
+#   python Cubotino_robot_search.py --cubes 10 --timeout 6
+# Run from the PC_files folder, as the solver tables are in the twophase subfolder.
+#
+#############################################################################################################
+"""
+
+import Cubotino_solver as cs               # candidate solutions module, importing the Kociemba solver (by Andrea Favero)
+import Cubotino_moves as cm                # robot orientations and primitives tables (by Andrea Favero)
+from operator import add                   # addition function, for the robot times of the 12 robot states
+import threading                           # threading library, to serialize the searches
+import heapq                               # priority queue, for the robot moves of a solver move
+import time                                # time library is imported
+
+
+
+
+# Global variables
+
+INF = 10**9                                # robot time of the robot states not reachable
+max_togo1 = 20                             # phase 1 moves are less than max_togo1
+max_togo2 = 11                             # phase 2 moves are less than max_togo2 (as per the solver)
+row1, row2 = max_togo1 + 1, max_togo2 + 1  # row length of the lower bounds tables
+phase2_moves = (0, 1, 2, 4, 7, 9, 10, 11, 13, 16)   # U1, U2, U3, R2, F2, D1, D2, D3, L2, B2
+check_nodes = 1000                         # search nodes between two timeout checks
+
+# robot states after a solver move on face f: index i = 3*q + a, where q is the index of the orientation in
+# bottom_orientations[f] (orientations with face f at the bottom) and a the bottom servo position (0=CCW, 1=home, 2=CW)
+bottom_face = ['URFDLB'.index(f) for f in cm.bottom_faces]   # face at the bottom, per orientation
+bottom_orientations = [[o for o in range(len(cm.orientations)) if bottom_face[o] == f] for f in range(6)]
+start_face = bottom_face[0]                # face at the bottom at the start (D)
+start_state = 3 * bottom_orientations[start_face].index(0) + 1   # starting orientation, bottom servo at home
+
+search_lock = threading.Lock()             # lock to serialize the searches (the search state is in the globals)
+cost_tables = {}                           # dict of the cost tables, per servos settings
+
+# search state, set by robot_search_solution()
+trans = None                               # robot times of the solver moves, between robot states
+columns = None                             # robot times of the solver moves, per robot state after the move
+lb1 = None                                 # robot time lower bounds of k moves, any move, per robot state
+lb2 = None                                 # robot time lower bounds of k moves, phase 2 moves, per robot state
+co_cube = None                             # cube in the solver coordinates, in the searched frame
+conj = None                                # solver moves of the cube, per move in the searched frame
+path1 = []                                 # phase 1 moves
+path2 = []                                 # phase 2 moves
+best_cost = 0                              # robot time (ms) of the best solution found so far
+solutions = []                             # improving solutions, as (solving time, list of moves indexes, robot time)
+start_time = 0                             # time reference of the search
+deadline = 0                               # time of the search timeout
+nodes = 0                                  # search nodes counter, for the timeout checks
+terminated = False                         # flag to stop the search
+
+
+
+
+
+
+def move_times(o, a, m, costs):
+    """ Returns the robot times (ms) of the solver move m, from the cube orientation o and bottom servo position a
+        (cover open), to each robot state after the move (list of 12 items, INF when not reachable).
+        The robot moves and their times are the primitives of the Cubotino_moves planner (robot_primitives), with the
+        primitives times of the servos settings (primitive_costs)."""
+
+    face, turns = m // 3, m % 3 + 1        # face to be turned, and quarter turns
+    times = [INF] * 12                     # robot times to the robot states after the move
+    queue = [(0, o, a, 0, 0)]              # priority queue of (time, orientation, servo, cover, quarter turns)
+    best = {(o, a, 0, 0): 0}               # dict with the lowest time found per state
+    while queue:                           # iteration until the priority queue has states
+        g, o, a, c, t = heapq.heappop(queue)   # state with the lowest time
+        if g > best[(o, a, c, t)]:         # case the state has already been reached faster
+            continue
+        if t == turns:                     # case the solver move is completed (by a rotation, the cover is open)
+            i = 3 * bottom_orientations[face].index(o) + a   # robot state after the move
+            times[i] = min(times[i], g)
+            continue
+        for move, cost, no, na, nc, dt in cm.robot_primitives(o, a, c, t == 0, bottom_face[o] == face, costs):
+            nt = (t + dt) % 4              # quarter turns after the robot move
+            if dt != 0 and nt == 0:        # case the rotation undoes the quarter turns
+                continue
+            ng = g + cost                  # time to reach the successor state
+            if ng < best.get((no, na, nc, nt), INF):   # case the successor state is reached faster
+                best[(no, na, nc, nt)] = ng
+                heapq.heappush(queue, (ng, no, na, nc, nt))
+    return times
+
+
+
+
+
+
+def lower_bounds(moves, row):
+    """ Returns the list of the lowest robot time (ms) of k solver moves (within moves, k < row), from the robot
+        state i after a move on face f, at index (12*f + i)*row + k. Successive moves follow the solver rules (no
+        moves on the same face, opposite faces in one order only)."""
+
+    lb = [0] * (72 * row)                  # lower bounds list, zero for k=0
+    for k in range(1, row):                # iteration over the amount of moves
+        for f in range(6):                 # iteration over the faces at the bottom
+            for i in range(12):            # iteration over the robot states
+                low = INF                  # lowest robot time
+                for m in moves:            # iteration over the moves
+                    diff = f - m // 3      # difference between the last face and the move face
+                    if diff == 0 or diff == 3:   # case of move not allowed after the last one
+                        continue
+                    t = trans[18*f + m]    # robot times of the move
+                    base = 12 * (m // 3)   # robot states after the move
+                    for j in range(12):    # iteration over the robot states after the move
+                        v = t[12*i + j] + lb[(base + j)*row + k - 1]
+                        if v < low:
+                            low = v
+                lb[(12*f + i)*row + k] = low
+    return lb
+
+
+
+
+
+
+def build_cost_tables(settings):
+    """ Returns the cost tables (columns, lb1, lb2) for the servos settings, built once per settings.
+        columns[18*f + m][j] is the tuple of the robot times (ms) of the solver move m, from the 12 robot states after
+        a move on face f, to the robot state j after the move m.
+        lb1[row1*f + k] and lb2[row2*f + k] are the tuples of the lower bounds of k moves, from the 12 robot states
+        after a move on face f."""
+
+    global trans
+
+    key = tuple(settings[:16])             # servos settings used by the robot time estimation
+    if key not in cost_tables:             # case the tables are not built yet for these settings
+        costs = cm.primitive_costs(settings)   # times of the robot primitives, as per the planner
+        trans = []                         # list of the robot times, per face at the bottom and solver move
+        for f in range(6):                 # iteration over the faces at the bottom
+            for m in range(18):            # iteration over the solver moves
+                times = []                 # robot times, from each robot state to each robot state after the move
+                for i in range(12):        # iteration over the robot states
+                    times += move_times(bottom_orientations[f][i // 3], i % 3, m, costs)
+                trans.append(times)
+        columns = [[tuple(t[12*i + j] for i in range(12)) for j in range(12)] for t in trans]
+        lbs = []                           # lower bounds tables, as tuples per face and amount of moves
+        for moves, row in ((range(18), row1), (phase2_moves, row2)):   # iteration over the moves sets
+            lb = lower_bounds(moves, row)  # lower bounds list
+            lbs.append([tuple(lb[(12*f + i)*row + k] for i in range(12)) for f in range(6) for k in range(row)])
+        cost_tables[key] = (columns, lbs[0], lbs[1])
+    return cost_tables[key]
+
+
+
+
+
+
+def advance(front, f, m):
+    """ Returns the robot times of the 12 robot states after the solver move m, from the robot times of the 12 robot
+        states after a move on face f (front)."""
+
+    return [min(map(add, front, column)) for column in columns[18*f + m]]
+
+
+
+
+
+
+def bound(front, lb):
+    """ Returns the robot time lower bound from the front, with the lower bounds lb of the 12 robot states."""
+
+    return min(map(add, front, lb))
+
+
+
+
+
+
+def sequence_cost(moves, front):
+    """ Returns the robot time (ms) of the solver moves (indexes), from the robot times of the 12 robot states (front)
+        at the start."""
+
+    f = start_face                         # face at the bottom at the start
+    for m in moves:                        # iteration over the solver moves
+        front = advance(front, f, m)       # robot times after the move
+        f = m // 3                         # face turned by the move, now at the bottom
+    return min(front)
+
+
+
+
+
+
+def store_solution(g):
+    """ Stores the solution (path1 + path2) of robot time g, as improving solution."""
+
+    global best_cost, terminated
+
+    best_cost = g                          # robot time of the best solution
+    solutions.append((time.monotonic() - start_time, [conj[m] for m in path1 + path2], g, 'found'))
+    if time.monotonic() > deadline:        # case of timeout
+        terminated = True
+
+
+
+
+
+
+def timed_out():
+    """ Counts the searched nodes, and terminates the search at the deadline (checked every check_nodes nodes).
+        Returns True when the search is terminated."""
+
+    global nodes, terminated
+
+    nodes += 1                             # nodes counter
+    if nodes % check_nodes == 0 and time.monotonic() > deadline:   # case of timeout
+        terminated = True
+    return terminated
+
+
+
+
+
+
+def search_phase2(corners, ud_edges, slice_sorted, dist, togo, front, f, last):
+    """ Phase 2 search, as per the solver SolverThread, exactly togo moves, within the best robot time.
+        The front has the robot times after a move on face f of the cube; last is the last move face in the searched
+        frame (-1 at the start)."""
+
+    if terminated or timed_out():          # case the search is terminated
+        return
+    if togo == 0:                          # case of phase 2 completed
+        g = min(front)                     # robot time of the solution
+        if slice_sorted == 0 and g < best_cost:   # case of solved cube, with a lower robot time
+            store_solution(g)
+        return
+
+    mv, sy, pr = cs.sv.mv, cs.sv.sy, cs.sv.pr   # solver modules, with the move and pruning tables
+    children = []                          # list of the moves to search, with their robot time lower bound
+    for m in phase2_moves:                 # iteration over the phase 2 moves
+        diff = last - m // 3               # difference between the last face and the move face
+        if diff == 0 or diff == 3:         # case of successive moves on the same face, or same axis in wrong order
+            continue
+        corners_new = mv.corners_move[18 * corners + m]
+        ud_edges_new = mv.ud_edges_move[18 * ud_edges + m]
+        slice_sorted_new = mv.slice_sorted_move[18 * slice_sorted + m]
+        classidx = sy.corner_classidx[corners_new]
+        sym = sy.corner_sym[corners_new]
+        dist_new_mod3 = pr.get_corners_ud_edges_depth3(40320 * classidx + sy.ud_edges_conj[(ud_edges_new << 4) + sym])
+        dist_new = pr.distance[3 * dist + dist_new_mod3]
+        if max(dist_new, pr.cornslice_depth[24 * corners_new + slice_sorted_new]) >= togo:   # case of too few moves
+            continue
+        mc = conj[m]                       # solver move of the cube
+        front_new = advance(front, f, mc)  # robot times after the move
+        h = bound(front_new, lb2[row2 * (mc // 3) + togo - 1])  # robot time lower bound of the solution
+        if h < best_cost:                  # case the best robot time can be improved
+            children.append((h, m, corners_new, ud_edges_new, slice_sorted_new, dist_new, front_new))
+
+    children.sort()                        # moves with the lowest robot time lower bound are searched first
+    for h, m, corners_new, ud_edges_new, slice_sorted_new, dist_new, front_new in children:   # iteration over moves
+        if h >= best_cost:                 # case the best robot time can't be improved anymore
+            break
+        path2.append(m)
+        search_phase2(corners_new, ud_edges_new, slice_sorted_new, dist_new, togo - 1, front_new, conj[m] // 3, m // 3)
+        path2.pop()
+
+
+
+
+
+
+def phase1_done(slice_sorted, front, f, last):
+    """ Completes the phase 1 solution (path1) by the phase 2 searches, within the best robot time."""
+
+    global path2, terminated
+
+    if time.monotonic() > deadline:        # case of timeout
+        terminated = True
+        return
+    mv, pr, coord = cs.sv.mv, cs.sv.pr, cs.sv.coord   # solver modules, with the move and pruning tables
+    corners = co_cube.corners              # phase 2 coordinates, after the phase 1 moves
+    u_edges = co_cube.u_edges
+    d_edges = co_cube.d_edges
+    for m in path1:                        # iteration over the phase 1 moves
+        corners = mv.corners_move[18 * corners + m]
+        u_edges = mv.u_edges_move[18 * u_edges + m]
+        d_edges = mv.d_edges_move[18 * d_edges + m]
+    ud_edges = coord.u_edges_plus_d_edges_to_ud_edges[24 * u_edges + d_edges % 24]
+    dist2 = co_cube.get_depth_phase2(corners, ud_edges)   # phase 2 distance
+    for togo2 in range(max(dist2, pr.cornslice_depth[24 * corners + slice_sorted]), max_togo2):   # phase 2 lengths
+        if bound(front, lb2[row2 * f + togo2]) >= best_cost:   # case longer phase 2 can't improve the robot time
+            break
+        path2 = []
+        search_phase2(corners, ud_edges, slice_sorted, dist2, togo2, front, f, last)
+        if terminated:                     # case the search is terminated
+            break
+
+
+
+
+
+
+def search_phase1(flip, twist, slice_sorted, dist, togo, front, f, last):
+    """ Phase 1 search, as per the solver SolverThread, exactly togo moves, within the best robot time.
+        The front has the robot times after a move on face f of the cube; last is the last move face in the searched
+        frame (-1 at the start)."""
+
+    if terminated or timed_out():          # case the search is terminated
+        return
+    if togo == 0:                          # case of phase 1 completed
+        phase1_done(slice_sorted, front, f, last)
+        return
+
+    mv, sy, pr = cs.sv.mv, cs.sv.sy, cs.sv.pr   # solver modules, with the move and pruning tables
+    children = []                          # list of the moves to search, with their robot time lower bound
+    for m in range(18):                    # iteration over the solver moves
+        if dist == 0 and togo < 5 and m in phase2_moves:   # case of moves generated by phase 2 (as per the solver)
+            continue
+        diff = last - m // 3               # difference between the last face and the move face
+        if diff == 0 or diff == 3:         # case of successive moves on the same face, or same axis in wrong order
+            continue
+        flip_new = mv.flip_move[18 * flip + m]
+        twist_new = mv.twist_move[18 * twist + m]
+        slice_sorted_new = mv.slice_sorted_move[18 * slice_sorted + m]
+        flipslice = 2048 * (slice_sorted_new // 24) + flip_new
+        classidx = sy.flipslice_classidx[flipslice]
+        sym = sy.flipslice_sym[flipslice]
+        dist_new_mod3 = pr.get_flipslice_twist_depth3(2187 * classidx + sy.twist_conj[(twist_new << 4) + sym])
+        dist_new = pr.distance[3 * dist + dist_new_mod3]
+        if dist_new >= togo:               # case the subgroup H can't be reached in togo - 1 moves
+            continue
+        mc = conj[m]                       # solver move of the cube
+        front_new = advance(front, f, mc)  # robot times after the move
+        h = bound(front_new, lb1[row1 * (mc // 3) + togo - 1])  # robot time lower bound of the solution
+        if h < best_cost:                  # case the best robot time can be improved
+            children.append((h, m, flip_new, twist_new, slice_sorted_new, dist_new, front_new))
+
+    children.sort()                        # moves with the lowest robot time lower bound are searched first
+    for h, m, flip_new, twist_new, slice_sorted_new, dist_new, front_new in children:   # iteration over the moves
+        if h >= best_cost:                 # case the best robot time can't be improved anymore
+            break
+        path1.append(m)
+        search_phase1(flip_new, twist_new, slice_sorted_new, dist_new, togo - 1, front_new, conj[m] // 3, m // 3)
+        path1.pop()
+
+
+
+
+
+
+def robot_search_solution(cube_defstr, settings, timeout=6):
+    """ Robot-metric search: Searches the solution with the lowest estimated robot time, within the timeout (secs).
+        The cube orientation on the robot, the bottom servo and the top cover positions are
+        tracked by the search.
+        Returns as per Cubotino_solver.robot_best_solution(): The first robot time is the one of the Kociemba solution
+        (searched within a third of the timeout); The candidates labels report the solving time the solution was found."""
+
+    global columns, lb1, lb2, co_cube, conj, path1, path2, best_cost, solutions, start_time, deadline, nodes
+    global terminated
+
+    fc = cs.face.FaceCube()                # facelet cube object
+    s = fc.from_string(cube_defstr.strip())   # facelet cube is defined by the cube definition string
+    if s != cs.cubie.CUBE_OK:              # case of errors on the facelet cube
+        return s, 0, 0, []                 # the solver error string is returned
+    cc = fc.to_cubie_cube()                # cubie cube representation
+    s = cc.verify()                        # cubie cube is verified
+    if s != cs.cubie.CUBE_OK:              # case of errors on the cubie cube
+        return s, 0, 0, []                 # the solver error string is returned
+
+    with search_lock:                      # one search at the time
+        columns, lb1, lb2 = build_cost_tables(settings)   # cost tables, for the servos settings
+        start_time = time.monotonic()      # time reference
+        deadline = start_time + timeout    # time of the search timeout
+        sy = cs.sv.sy                      # solver symmetries module
+        frames = []                        # searched frames, as (cube in the solver coordinates, moves mapping)
+        for rot in range(3):               # iteration over the rotations along the URF-DBL diagonal (as per the solver)
+            if rot == 0:                   # case of the cube as it is
+                rc = cc
+            elif rot == 1:                 # case of the cube rotated by 120deg
+                rc = cs.cubie.CubieCube(sy.symCube[32].cp, sy.symCube[32].co, sy.symCube[32].ep, sy.symCube[32].eo)
+                rc.multiply(cc)
+                rc.multiply(sy.symCube[16])
+            else:                          # case of the cube rotated by 240deg
+                rc = cs.cubie.CubieCube(sy.symCube[16].cp, sy.symCube[16].co, sy.symCube[16].ep, sy.symCube[16].eo)
+                rc.multiply(cc)
+                rc.multiply(sy.symCube[32])
+            co = cs.sv.coord.CoordCube(rc) # rotated cube in the solver coordinates
+            frames.append((co, sy.conj_move[288 * rot: 288 * rot + 18], co.get_depth_phase1()))
+
+        path1, path2, solutions = [], [], []
+        best_cost, nodes, terminated = INF, 0, False
+        front = [INF] * 12                 # robot times of the robot states at the start
+        front[start_state] = 0             # starting orientation, bottom servo at home
+        s = cs.sv.solve(cube_defstr, 18, timeout / 3)   # Kociemba solution, as robot time to improve
+        if 'f)' in s:                      # case the solver returns a solution
+            seed = [cm.solver_moves_idx[m] for m in cs.solution_moves(s)]   # solver moves indexes
+            best_cost = sequence_cost(seed, front)   # robot time of the Kociemba solution
+            solutions.append((time.monotonic() - start_time, seed, best_cost, 'kociemba'))
+        for togo1 in range(min([d for _, _, d in frames]), max_togo1):   # iterative deepening of phase 1
+            for co_cube, conj, dist in frames:   # iteration over the frames, sharing the best robot time
+                if dist > togo1:           # case phase 1 of this frame needs more moves
+                    continue
+                path1 = []
+                search_phase1(co_cube.flip, co_cube.twist, co_cube.slice_sorted, dist, togo1, front, start_face, -1)
+                if terminated:             # case the search is terminated
+                    break
+            if terminated:                 # case the search is terminated
+                break
+        found = solutions                  # improving solutions of this search
+
+    candidates = []                        # list of the candidate solutions
+    for secs, moves, g, label in found:    # iteration over the improving solutions
+        moves = [cm.solver_moves[m] for m in moves]   # solver moves names
+        robot_moves, tot_moves, robot_time_est = cs.robot_time(moves, settings)   # robot moves and estimated time
+        candidates.append((f'{label} at {round(secs, 2)} secs', cs.solver_string(moves), robot_moves, tot_moves,
+                           robot_time_est))
+    if not candidates:                     # case of no solution within the timeout
+        return cs.no_solution, 0, 0, candidates   # the error string is returned
+    best = min(candidates, key=lambda c: c[4])   # candidate with the lowest estimated robot time
+    return best[1], candidates[0][4], best[4], candidates
+
+
+
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # argument parser object creation
+    parser = argparse.ArgumentParser(description='Robot time: Kociemba solver vs robot-metric search')
+
+    # --cubes argument is added to the parser
+    parser.add_argument("-c", "--cubes", type=int, default=10,
+                        help="Amount of random cubes. Default 10.")
+
+    # --timeout argument is added to the parser
+    parser.add_argument("--timeout", type=float, default=6,
+                        help="Timeout (secs) of the robot-metric search. Default 6.")
+
+    # --settings argument is added to the parser
+    parser.add_argument("--settings", type=str, default='Cubotino_settings.txt',
+                        help="Servos settings file, for the robot time. Default Cubotino_settings.txt.")
+
+    args = parser.parse_args()   # argument parsed assignement
+
+    import Cubotino_batch as cb            # batch solving, for the servos settings reading
+    settings = cb.read_servo_settings(args.settings)   # servos settings
+    t = time.time()                        # time reference
+    build_cost_tables(settings)            # cost tables, for the servos settings
+    print(f'\ncost tables built in {round(time.time() - t, 2)} secs')
+
+    results = {'kociemba': [], 'robot search': []}   # dict of the (length, robot time, solving time) results
+    for i in range(args.cubes):            # iteration over the random cubes
+        cc = cs.cubie.CubieCube()          # cube in cubie reppresentation
+        cc.randomize()                     # randomized cube in cubie reppresentation
+        cube_defstr = cc.to_facelet_cube().to_string()   # cube definition string
+        t = time.time()                    # time reference
+        s = cs.sv.solve(cube_defstr, 18, 2)   # Kociemba solver, as per the GUI default
+        secs = time.time() - t
+        moves = cs.solution_moves(s)       # solver moves
+        results['kociemba'].append((len(moves), cs.robot_time(moves, settings)[2], secs))
+        t = time.time()                    # time reference
+        s, first_time, best_time, candidates = robot_search_solution(cube_defstr, settings, args.timeout)
+        results['robot search'].append((len(cs.solution_moves(s)), best_time, time.time() - t))
+        print(f'\rsolved cubes: {i+1}/{args.cubes}', end='')
+
+    print('\n')
+    for label, values in results.items():  # iteration over the solvers
+        n = len(values)                    # amount of cubes
+        print(f'{label:13}: average length {round(sum([v[0] for v in values])/n, 1)} moves, '
+              f'average robot time {round(sum([v[1] for v in values])/n, 2)} secs, '
+              f'average solving time {round(sum([v[2] for v in values])/n, 2)} secs')
+    saved = [k[1] - r[1] for k, r in zip(results['kociemba'], results['robot search'])]   # robot time saved per cube
+    print(f'\nrobot time saved: average {round(sum(saved)/len(saved), 2)} secs, '
+          f'min {round(min(saved), 2)} secs, max {round(max(saved), 2)} secs\n')
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Vectorized facelets simulator, to verify the robot moves of CUBOTino at scale
+#
+# The robot moves strings (i.e. 'F1R3S1...') are applied to a batch of N cubes at once, as NumPy arrays of
+# N x 54 facelets (face index per facelet, as per Cubotino_cube_state):
+#  - Each robot move is a facelets permutation (the 'ref' tuples of Cubotino_cube_state.robot_perms)
+#  - The robot moves strings are encoded into an N x L array of move codes (0 for no move, as padding of the shorter
+#    strings), and the moves are grouped by 3: The permutations of the 8^3 codes triples are precomposed once, so
+#    each step permutes all the cubes by a single fancy indexing, for 3 robot moves
+#  - The cubes are processed by chunks, to limit the memory of the indexes arrays
+#  - The cube holder position (bottom servo at CCW, home or CW) is tracked per cube, as per the servos state machine
+#    of Cubotino_servos.servo_solve_cube(): A spin or rotation toward the current out-position is not executed as
+#    such by the robot (a spin goes back home, whatever its direction, and a rotation is skipped), so it is a failure
+#
+# verify() checks the robot moves translation of Cubotino_moves.robot_required_moves(): Random solver solutions
+# are generated, the cubes they solve are built by the inverse moves (vectorized), the solutions are translated
+# into robot moves (on a pool of processes), and the robot moves are applied by the simulator: Each cube has to
+# be solved (each face of one color, in any cube orientation), with robot moves consistent with the cube holder.
+#
+# To be run whenever the translator or the robot moves optimizer changes, i.e. (from the PC_files folder):
+#   python Cubotino_simulator.py --cubes 1000000
+#   python Cubotino_simulator.py --cubes 20000 --settings Cubotino_settings.txt   (robot moves planner, slower)
+#
+#############################################################################################################
+"""
+
+import numpy as np                         # NumPy library, for the facelets arrays and permutations
+import Cubotino_cube_state as cst          # facelets permutations of the robot and solver moves (by Andrea Favero)
+import multiprocessing as mp               # multiprocessing library, for the robot moves translation
+import time                                # time library is imported
+import os                                  # os library, for the cores
+
+
+
+
+# Global variables
+
+robot_moves_list = ('F1', 'F2', 'F3', 'S1', 'S3', 'R1', 'R3')   # robot moves, with codes 1 to 7 (0 for no move)
+solver_moves_list = tuple(cst.solver_perms)   # solver moves, with codes 0 to 17 (U1, U2, U3, R1, ... B3)
+group = 3                                  # robot moves composed in a single permutation
+chunk_size = 65536                         # cubes per chunk, to limit the memory of the indexes arrays
+
+# permutations of the robot move codes (identity for code 0)
+move_perms = np.array([np.arange(54)] + [cst.robot_perms[m] for m in robot_moves_list], dtype=np.intp)
+
+# cube holder steps of the robot move codes (CW spins and rotations +1, CCW ones -1, flips and no move 0)
+holder_steps = np.array([0] + [{'1': 1, '3': -1}[m[1]] if m[0] in 'SR' else 0 for m in robot_moves_list], dtype=np.int8)
+
+# code of each pair of characters (first and second byte), for the robot moves strings encoding
+pair_codes = np.full((256, 256), -1, dtype=np.int16)   # -1 for not valid robot moves
+pair_codes[0, 0] = 0                       # padding of the shorter strings (no move)
+for code, move in enumerate(robot_moves_list, 1):   # iteration over the robot moves
+    pair_codes[ord(move[0]), ord(move[1])] = code
+
+group_perms = None                         # precomposed permutations of the move codes groups, built when first used
+
+
+
+
+
+
+def build_group_perms():
+    """ Returns the array of the precomposed permutations of the groups of move codes: the group of codes
+        (c0, c1, c2) is at index c0*64 + c1*8 + c2, and its permutation applies c0 first."""
+
+    perms = move_perms                     # permutations of the groups of one move code
+    for _ in range(group - 1):             # iteration over the further move codes of the group
+        perms = perms[:, move_perms].reshape(-1, 54)   # previous codes first, then the new move code
+    return perms
+
+
+
+
+
+
+def encode(robot_strings):
+    """ Returns the N x L array of the robot move codes (L multiple of the group), from the N robot moves strings.
+        Spaces in the strings are ignored; Raises ValueError on not valid robot moves."""
+
+    robot_strings = [s.replace(' ', '') for s in robot_strings]   # robot moves strings without spaces
+    width = max([len(s) for s in robot_strings] + [2])   # longest string (bytes)
+    width += -width % (2 * group)          # width multiple of the move codes group
+    data = np.array(robot_strings, dtype=f'S{width}').view(np.uint8).reshape(len(robot_strings), width // 2, 2)
+    codes = pair_codes[data[:, :, 0], data[:, :, 1]]   # move code per pair of characters
+    if (codes < 0).any():                  # case of not valid robot moves
+        raise ValueError(f'not valid robot moves in {(codes < 0).any(axis=1).sum()} strings')
+    return codes.astype(np.intp)
+
+
+
+
+
+
+def simulate(states, codes):
+    """ Applies the robot move codes (N x L, as per encode) to the N x 54 cubes states; Returns the new states."""
+
+    global group_perms
+
+    if group_perms is None:                # case the precomposed permutations are not built yet
+        group_perms = build_group_perms()
+    states = np.array(states, dtype=np.uint8)   # copy of the cubes states
+    base = 8 ** np.arange(group - 1, -1, -1)    # weights of the move codes within a group
+    for start in range(0, len(states), chunk_size):   # iteration over the chunks of cubes
+        chunk = states[start:start + chunk_size]   # cubes of the chunk (view)
+        groups = codes[start:start + chunk_size].reshape(len(chunk), -1, group) @ base   # group index per step
+        for step in range(groups.shape[1]):   # iteration over the steps (groups of robot moves)
+            chunk[:] = np.take_along_axis(chunk, group_perms[groups[:, step]], axis=1)
+    return states
+
+
+
+
+
+
+def holder_ok(codes):
+    """ Returns the boolean array of the robot move codes (N x L, as per encode) consistent with the cube holder: The
+        holder position (0=CCW, 1=home, 2=CW, home at the start) is tracked per cube, and it can't go beyond CCW or CW."""
+
+    positions = 1 + np.cumsum(holder_steps[codes], axis=1, dtype=np.int8)   # holder position after each move
+    return ((positions >= 0) & (positions <= 2)).all(axis=1)
+
+
+
+
+
+
+def is_solved(states):
+    """ Returns the boolean array of the solved cubes (each face of the color of its center), from the N x 54 states."""
+
+    faces = states.reshape(-1, 6, 9)       # facelets per face
+    return (faces == faces[:, :, 4:5]).all(axis=(1, 2))
+
+
+
+
+
+
+def random_solutions(n, length, rng):
+    """ Returns the n x length array of random solver moves codes, without consecutive moves on the same face."""
+
+    moves = rng.integers(0, 18, size=(n, length))   # random solver moves
+    for i in range(1, length):             # iteration over the moves, from the second
+        same = moves[:, i] // 3 == moves[:, i - 1] // 3   # moves on the same face of the previous one
+        while same.any():                  # case of moves on the same face of the previous one
+            moves[same, i] = rng.integers(0, 18, size=same.sum())
+            same = moves[:, i] // 3 == moves[:, i - 1] // 3
+    return moves
+
+
+
+
+
+
+def solved_by(moves):
+    """ Returns the N x 54 states of the cubes solved by the solver moves codes (N x length): The inverse moves, in
+        reverse order, are applied to the solved cube."""
+
+    perms = np.array([cst.solver_perms[m] for m in solver_moves_list], dtype=np.intp)   # solver moves permutations
+    inverse = np.array([3 * (m // 3) + 2 - m % 3 for m in range(18)])   # inverse of each solver move (U1 <-> U3)
+    states = np.tile(cst.CubeState().facelets, (len(moves), 1))   # solved cubes
+    for i in range(moves.shape[1] - 1, -1, -1):   # iteration over the moves, from the last one
+        states = np.take_along_axis(states, perms[inverse[moves[:, i]]], axis=1)
+    return states
+
+
+
+
+
+
+def translate_chunk(args):
+    """ Runs on a process of the pool: Returns the robot moves strings of the solutions (Cubotino_moves)."""
+
+    solutions, settings = args
+    import Cubotino_moves as cm            # robot moves translator (by Andrea Favero)
+    return cm.translate_batch(solutions, settings)[0]
+
+
+
+
+
+
+def verify(n, length=20, settings=None, processes=None, seed=None, batch=20000):
+    """ Verifies that the robot moves of n random solver solutions (length moves) solve their cubes, within the cube
+        holder range.
+        The translation runs on a pool of processes (one per core by default), via Cubotino_moves.translate_batch (robot
+        moves planner when the servos settings are provided). Returns the statistics dict, with the failed solutions."""
+
+    rng = np.random.default_rng(seed)      # random generator
+    failed = []                            # list of the (solution, robot moves) not solving the cube
+    holder_failed = 0                      # robot moves not consistent with the cube holder position
+    secs = {'generate': 0, 'translate': 0, 'simulate': 0}   # time per verification step
+    robot_moves_count = 0                  # total robot moves simulated
+    processes = processes or os.cpu_count() or 1   # amount of processes
+    with mp.Pool(processes) as pool:
+        for start in range(0, n, batch):   # iteration over the batches of cubes
+            t = time.time()                # time reference
+            moves = random_solutions(min(batch, n - start), length, rng)   # random solver solutions
+            states = solved_by(moves)      # cubes solved by the solutions
+            names = np.array(solver_moves_list)[moves]   # solver moves names
+            solutions = [''.join(row) for row in names.tolist()]   # solver solutions strings
+            secs['generate'] += time.time() - t
+
+            t = time.time()                # time reference
+            step = -(-len(solutions) // (4 * processes))   # solutions per translation task
+            tasks = [(solutions[i:i + step], settings) for i in range(0, len(solutions), step)]
+            robot_strings = [s for strings in pool.map(translate_chunk, tasks) for s in strings]
+            secs['translate'] += time.time() - t
+
+            t = time.time()                # time reference
+            codes = encode(robot_strings)  # robot move codes
+            robot_moves_count += int((codes > 0).sum())
+            holder = holder_ok(codes)      # robot moves consistent with the cube holder position
+            holder_failed += int((~holder).sum())
+            ok = is_solved(simulate(states, codes)) & holder   # cubes solved by the robot moves
+            secs['simulate'] += time.time() - t
+            for i in np.flatnonzero(~ok).tolist():   # iteration over the cubes not solved
+                failed.append((solutions[i], robot_strings[i]))
+    secs = {k: round(v, 2) for k, v in secs.items()}
+    return {'cubes': n, 'failed': failed, 'holder_failed': holder_failed, 'robot_moves': robot_moves_count, 'secs': secs,
+            'simulated_cubes_per_sec': round(n / secs['simulate']) if secs['simulate'] else 0}
+
+
+
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # argument parser object creation
+    parser = argparse.ArgumentParser(description='Verification of the robot moves, via the vectorized simulator')
+
+    # --cubes argument is added to the parser
+    parser.add_argument("-c", "--cubes", type=int, default=100000,
+                        help="Amount of random cubes. Default 100000.")
+
+    # --length argument is added to the parser
+    parser.add_argument("--length", type=int, default=20,
+                        help="Solver moves per random solution. Default 20.")
+
+    # --settings argument is added to the parser
+    parser.add_argument("--settings", type=str, default=None,
+                        help="Servos settings file, to verify the robot moves planner. Default none (transition table).")
+
+    # --processes argument is added to the parser
+    parser.add_argument("-p", "--processes", type=int, default=None,
+                        help="Amount of processes for the translation. Default one per core.")
+
+    # --seed argument is added to the parser
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed of the random solutions, to repeat a verification. Default none.")
+
+    args = parser.parse_args()   # argument parsed assignement
+
+    settings = None                        # servos settings
+    if args.settings:                      # case of servos settings file
+        import Cubotino_batch as cb        # batch solving, for the servos settings reading
+        settings = cb.read_servo_settings(args.settings)
+
+    stats = verify(args.cubes, args.length, settings, args.processes, args.seed)
+    print(f"\ncubes: {stats['cubes']}, robot moves: {stats['robot_moves']}, failed: {len(stats['failed'])} "
+          f"(cube holder: {stats['holder_failed']})")
+    print(f"time (secs): {stats['secs']}, simulated cubes per sec: {stats['simulated_cubes_per_sec']}")
+    for solution, robot_string in stats['failed'][:10]:   # iteration over the first failed solutions
+        print(f'failed solution: {solution}, robot moves: {robot_string}')
+    print()
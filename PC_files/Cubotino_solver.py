@@ -0,0 +1,340 @@
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Interface to the Kociemba TwophaseSolver, for the PC side of CUBOTino
+#
+# The solver returns the first solution found within max_length (or the best one within the timeout), while
+# the time the robot needs to execute a solution depends much more on the amount of flips and spins, than on
+# the amount of solver moves: A 19 moves solution can be faster, on the robot, than an 18 moves one.
+#
+# This module collects multiple candidate solutions within a time budget, by solving:
+#  - The same cube with a larger max_length
+#  - The inverse cube (the solution is then reversed and inverted)
+#  - The cube conjugated by a whole cube rotation (the solution moves are then mapped back to the original faces)
+# Each candidate is translated into robot moves by Cubotino_moves, and the one with the lowest estimated robot
+# time is returned, together with the time saved compared to the first solution.
+#
+# The candidates can also be evaluated on the 24 orientations the cube can be placed on the robot, to advise the
+# operator about the faces to place down and to the front for the fastest robot run.
+#
+# The anytime solving keeps every improving solution found by the solver threads during the search, and it stops the
+# search when a further improvement is not worth the waiting: The returned solution has the lowest end-to-end time
+# (solving time + estimated robot time), within a latency budget.
+#
+#############################################################################################################
+"""
+
+import Cubotino_tables as ct               # import the Kociemba solver with memory-mapped tables (by Andrea Favero)
+
+try:                                       # attempt
+    sv = ct.import_mapped('solver')        # import Kociemba solver, copied in robot folder
+    import face, cubie                     # import other Kociemba solver library parts, copied in robot folder
+    import symmetries as sy                # import the cube symmetries Kociemba solver library part, copied in robot folder
+except:                                    # exception is raised if no library in folder or other issues
+    sv = ct.import_mapped('twophase.solver')   # import Kociemba solver installed
+    import twophase.face as face           # import face Kociemba solver library part, installed
+    import twophase.cubie as cubie         # import cubie Kociemba solver library part, installed
+    import twophase.symmetries as sy       # import the cube symmetries Kociemba solver library part, installed
+
+import Cubotino_moves as cm                # translate a cube solution into CUBOTino robot moves (by Andrea Favero)
+import threading                           # threading library, for the solver threads of the anytime solving
+import time                                # time library is imported
+
+
+
+
+# Global variables
+
+# Sources of candidate solutions, as (label, symmetry index, inverse, additional max_length)
+# Symmetry indexes refer to the symCube list of the solver symmetries module: 16 and 32 are the 120deg and 240deg
+# rotations along the URF-DBL diagonal, 8 is the 180deg rotation around the F-B axis, 2 and 6 are the 90deg and
+# 270deg rotations around the U-D axis; The first entry is the plain solver call, used as reference
+candidate_sources = (('first', 0, 0, 0),
+                     ('max_length +1', 0, 0, 1),
+                     ('inverse', 0, 1, 0),
+                     ('rotation URF 120deg', 16, 0, 0),
+                     ('rotation URF 240deg', 32, 0, 0),
+                     ('inverse, rotation URF 120deg', 16, 1, 0),
+                     ('inverse, rotation URF 240deg', 32, 1, 0),
+                     ('max_length +2', 0, 0, 2),
+                     ('rotation F 180deg', 8, 0, 0),
+                     ('rotation U 90deg', 2, 0, 0),
+                     ('rotation U 270deg', 6, 0, 0))
+
+# The 24 whole cube rotations, as indexes of the symCube list (the odd indexes are the mirrored symmetries)
+rotations = tuple(range(0, 48, 2))
+
+anytime_poll = 0.02                        # time (secs) between the checks of the solutions found by the solver threads
+anytime_growth = 2                         # after an improvement at time t, the next one is expected within t*(1+growth)
+no_solution = 'Error: No solution found'   # error string, when the search ends without any solution
+
+
+
+
+
+
+def transformed_cube(cube_defstr, sym, inv):
+    """ Returns the cube definition string of the cube conjugated by the symmetry sym, and inverted when inv is 1.
+        The conjugation is S * cube * S^-1, as per the rotations applied by the solver threads."""
+
+    fc = face.FaceCube()                         # facelet cube object
+    fc.from_string(cube_defstr)                  # facelet cube is defined by the cube definition string
+    cc = fc.to_cubie_cube()                      # cubie cube representation
+    if sym != 0:                                 # case the cube has to be conjugated
+        s = sy.symCube[sym]                      # symmetry cube
+        cb = cubie.CubieCube(s.cp, s.co, s.ep, s.eo)   # copy of the symmetry cube
+        cb.multiply(cc)                          # S * cube
+        cb.multiply(sy.symCube[sy.inv_idx[sym]]) # S * cube * S^-1
+        cc = cb                                  # conjugated cube
+    if inv == 1:                                 # case the cube has to be inverted
+        tmp = cubie.CubieCube()                  # empty cubie cube
+        cc.inv_cubie_cube(tmp)                   # inverse cube stored in tmp
+        cc = tmp                                 # inverted cube
+    return cc.to_facelet_cube().to_string()      # cube definition string of the transformed cube
+
+
+
+
+
+
+def map_solution(moves, sym, inv):
+    """ Maps the solution moves (list of solver moves, like 'R2') of a transformed cube, back to the original cube."""
+
+    m = [cm.solver_moves_idx[move] for move in moves]  # moves indexes, as per URFDLB order (same of the solver Move enum)
+    if inv == 1:                                  # case the solution is for the inverse cube
+        m = [(i // 3) * 3 + (2 - i % 3) for i in reversed(m)]   # moves are reversed and inverted (R1->R3, R2->R2, R3->R1)
+    if sym != 0:                                  # case the solution is for the conjugated cube
+        n = 18 * sy.inv_idx[sym]                  # offset on the conjugated moves table, for S^-1 * move * S
+        m = [sy.conj_move[n + i] for i in m]      # moves are conjugated back to the original faces
+    return [cm.solver_moves[i] for i in m]        # list of solver moves is returned
+
+
+
+
+
+
+def solution_moves(cube_solving_string):
+    """ Returns the list of solver moves, from the solver string (i.e. 'U2 R1 F3 (3f)' returns ['U2','R1','F3'])."""
+
+    pos = cube_solving_string.find('(')           # position of the "(" character in the string
+    return cube_solving_string[:pos].split()      # list of moves, by removing the additional info from Kociemba solver
+
+
+
+
+
+
+def collect_solutions(cube_defstr, max_length=18, timeout=2, budget=6):
+    """ Generator of candidate solutions, from the sources in candidate_sources, within the time budget (secs).
+        The first candidate is the plain solver call sv.solve(cube_defstr, max_length, timeout), and it is always made.
+        Yields (label, list of solver moves for the original cube), skipping the duplicated solutions; In case the first
+        solver call returns an error, it yields (label, solver error string) and it stops."""
+
+    start = time.time()                           # time reference for the budget
+    found = set()                                 # set of the already yielded solutions
+
+    for label, sym, inv, extra_length in candidate_sources:   # iteration over the candidate solution sources
+        elapsed = time.time() - start             # time spent so far (including the time spent by the caller)
+        if found and elapsed >= budget:           # case the time budget is used, and there is at least one candidate
+            return                                # generator is terminated
+
+        if sym == 0 and inv == 0:                 # case the cube is solved as it is
+            cubestring = cube_defstr.strip()      # cube definition string
+        else:                                     # case the cube is transformed
+            cubestring = transformed_cube(cube_defstr.strip(), sym, inv)   # transformed cube definition string
+
+        t_out = timeout if not found else min(timeout, max(0.1, budget - elapsed))  # timeout within the budget
+        cube_solving_string = sv.solve(cubestring, max_length + extra_length, t_out)  # Kociemba solver is called
+
+        if 'Error' in cube_solving_string or not 'f)' in cube_solving_string:  # case the solver returns an error
+            if not found:                         # case the error relates to the first solver call
+                yield label, cube_solving_string  # the solver error string is returned
+                return                            # generator is terminated
+            continue                              # next source is evaluated
+
+        moves = map_solution(solution_moves(cube_solving_string), sym, inv)  # moves of the original cube
+        solution = ''.join(moves)                 # solution string without spaces
+        if solution in found:                     # case this solution has been already yielded
+            continue                              # next source is evaluated
+        found.add(solution)                       # solution is added to the set of the yielded ones
+        yield label, moves                        # candidate solution is returned
+
+
+
+
+
+
+def solver_string(moves):
+    """ Returns the solver string, same format as sv.solve, from the list of solver moves (i.e. 'U2 R1 F3 (3f)')."""
+
+    return ' '.join(moves) + (' ' if moves else '') + '(' + str(len(moves)) + 'f)'
+
+
+
+
+
+
+def robot_time(moves, settings):
+    """ Returns the robot moves string, the total robot moves and the estimated robot time (secs) for the solver moves."""
+
+    robot, robot_moves, tot_moves = cm.robot_required_moves(''.join(moves), "", settings)   # solution into robot moves
+    robot_time_est, robot_time_breakdown = cm.estimate_robot_time(robot_moves, settings)   # estimated robot time
+    return robot_moves, tot_moves, robot_time_est
+
+
+
+
+
+
+def robot_best_solution(cube_defstr, settings, max_length=18, timeout=2, budget=6):
+    """ Collects multiple candidate solutions, within the time budget (secs), and returns the one with the lowest
+        estimated robot time. The first candidate is the plain solver call sv.solve(cube_defstr, max_length, timeout).
+        Returns:
+            - the solver string (same format as sv.solve) of the fastest candidate for the robot
+            - the estimated robot time (secs) of the first solution
+            - the estimated robot time (secs) of the fastest solution
+            - list of candidates, as (label, solver string, robot moves, robot tot moves, estimated robot time)."""
+
+    candidates = []                               # list of the candidate solutions
+    for label, moves in collect_solutions(cube_defstr, max_length, timeout, budget):   # iteration over the candidates
+        if isinstance(moves, str):                # case the solver returned an error
+            return moves, 0, 0, candidates        # the solver error string is returned
+        robot_moves, tot_moves, robot_time_est = robot_time(moves, settings)   # robot moves and estimated time
+        candidates.append((label, solver_string(moves), robot_moves, tot_moves, robot_time_est))
+
+    if not candidates:                            # case of no candidate solution
+        return no_solution, 0, 0, candidates      # the error string is returned
+    best = min(candidates, key=lambda c: c[4])    # candidate with the lowest estimated robot time (first one on ties)
+    return best[1], candidates[0][4], best[4], candidates
+
+
+
+
+
+
+def robot_anytime_solution(cube_defstr, settings, budget=6):
+    """ Anytime solving, within the latency budget (secs): The solver threads search as per sv.solve (3 orientations
+        and their inverse cubes), without a target length. Each improving (shorter) solution found by the threads is
+        translated into robot moves. After each robot time improvement, found at time t, the search continues for
+        t * anytime_growth at most (the improvements get rarer as the search goes on), and not longer than the robot
+        time saved by that improvement (after the first solution: the average robot time per solver move, as expected
+        saving of a one move shorter solution); The search is anyhow stopped at the budget. The solution with the
+        lowest estimated robot time is returned, having the lowest end-to-end time (solving time + estimated robot time).
+        Returns as per robot_best_solution(); The candidates labels report the solving time the solution was found."""
+
+    start = time.monotonic()                      # time reference, as per the solver threads
+    fc = face.FaceCube()                          # facelet cube object
+    s = fc.from_string(cube_defstr.strip())       # facelet cube is defined by the cube definition string
+    if s != cubie.CUBE_OK:                        # case of errors on the facelet cube
+        return s, 0, 0, []                        # the solver error string is returned
+    cc = fc.to_cubie_cube()                       # cubie cube representation
+    s = cc.verify()                               # cubie cube is verified
+    if s != cubie.CUBE_OK:                        # case of errors on the cubie cube
+        return s, 0, 0, []                        # the solver error string is returned
+
+    syms = cc.symmetries()                        # symmetries of the cube, to skip redundant searches (as per sv.solve)
+    if len({16, 20, 24, 28} & set(syms)) > 0:     # case of rotational symmetry along a long diagonal
+        tr = [0, 3]                               # one orientation, and its inverse
+    else:                                         # case without rotational symmetry along the long diagonals
+        tr = list(range(6))                       # 3 orientations, and their inverses
+    if len(set(range(48, 96)) & set(syms)) > 0:   # case of antisymmetry
+        tr = [i for i in tr if i < 3]             # no search on the inverse cubes
+
+    solutions = []                                # improving solutions, appended by the solver threads
+    shortest_length = [999]                       # length of the shortest solution, shared by the solver threads
+    terminated = threading.Event()                # event to stop the solver threads
+    threads = [sv.SolverThread(cc, i % 3, i // 3, 0, budget, start, solutions, terminated, shortest_length) for i in tr]
+    for th in threads:                            # iteration over the solver threads
+        th.start()                                # solver thread is started
+
+    candidates = []                               # list of the candidate solutions
+    best = None                                   # candidate with the lowest estimated robot time
+    improved_at = 0                               # solving time (secs) of the last robot time improvement
+    worth_wait = 0                                # max waiting (secs) for a further improvement
+    while True:                                   # iteration until the solver threads have finished
+        alive = any([th.is_alive() for th in threads])   # solver threads still searching
+        elapsed = time.monotonic() - start        # solving time so far
+        for found in solutions[len(candidates):]: # iteration over the solutions found since the last check
+            moves = [m.name for m in found]       # list of solver moves
+            robot_moves, tot_moves, robot_time_est = robot_time(moves, settings)   # robot moves and estimated time
+            candidate = (f'found at {round(elapsed, 2)} secs', solver_string(moves), robot_moves, tot_moves, robot_time_est)
+            candidates.append(candidate)          # candidate solution is added to the list
+            if best is None:                      # case of the first solution
+                saving = robot_time_est / max(1, len(moves))   # expected saving of a one move shorter solution
+            elif robot_time_est < best[4]:        # case of a robot time improvement
+                saving = best[4] - robot_time_est # robot time saved by the improvement
+            else:                                 # case of a shorter solution, without robot time improvement
+                continue                          # next solution is evaluated
+            best = candidate                      # best candidate is updated
+            improved_at = elapsed                 # solving time of the last improvement
+            worth_wait = min(anytime_growth * elapsed, saving)   # max waiting for a further improvement
+        if not alive:                             # case the solver threads have finished
+            break                                 # while loop is interrupted
+        if best is not None and (elapsed - improved_at > worth_wait or elapsed > budget):   # case of search to stop
+            terminated.set()                      # solver threads are terminated
+        time.sleep(anytime_poll)                  # time for the solver threads to search
+
+    if best is None:                              # case the solver threads have finished without any solution
+        return no_solution, 0, 0, candidates      # the error string is returned
+    return best[1], candidates[0][4], best[4], candidates
+
+
+
+
+
+
+def robot_best_orientation(cube_defstr, settings, max_length=18, timeout=2, budget=6):
+    """ Searches the cube orientation, among the 24 ones the cube can be placed on the robot, with the fastest robot run.
+        Candidate solutions are collected as per robot_best_solution(), within half of the time budget (secs); Each of
+        them is then mapped to the 24 cube orientations (conjugation by the whole cube rotations), and translated into
+        robot moves. The first candidate is evaluated on all the orientations, the others within the time budget.
+        Returns:
+            - the solver string (same format as sv.solve) for the cube as placed on the robot
+            - the cube definition string for the cube as placed on the robot
+            - faces map: string with the original faces located at URFDLB positions on the robot (i.e. 'URFDLB' if as is)
+            - the estimated robot time (secs) of the first solution, for the cube placed as is
+            - the estimated robot time (secs) of the fastest solution and orientation
+            - amount of evaluated (solution, orientation) combinations."""
+
+    start = time.time()                           # time reference for the budget
+    solutions = []                                # list of the candidate solutions
+    for label, moves in collect_solutions(cube_defstr, max_length, timeout, budget/2):   # iteration over candidates
+        if isinstance(moves, str):                # case the solver returned an error
+            return moves, cube_defstr, 'URFDLB', 0, 0, 0   # the solver error string is returned
+        solutions.append(moves)                   # candidate solution is added to the list
+
+    best = None                                   # best (robot time, rotation, robot moves) combination
+    first_time = 0                                # estimated robot time of the first solution, cube placed as is
+    evaluated = 0                                 # counter of the evaluated combinations
+    for i, moves in enumerate(solutions):         # iteration over the candidate solutions
+        if i > 0 and time.time() - start >= budget:   # case the time budget is used
+            break                                 # for loop is interrupted
+        idx = [cm.solver_moves_idx[move] for move in moves]   # moves indexes, as per URFDLB order
+        for sym in rotations:                     # iteration over the 24 whole cube rotations
+            rot_moves = [cm.solver_moves[sy.conj_move[18 * sym + m]] for m in idx]   # moves as per robot faces
+            robot_moves, tot_moves, robot_time_est = robot_time(rot_moves, settings)   # estimated robot time
+            evaluated += 1                        # counter of the evaluated combinations is increased
+            if i == 0 and sym == 0:               # case of the first solution, with the cube placed as is
+                first_time = robot_time_est       # estimated robot time is assigned
+            if best is None or robot_time_est < best[0]:   # case of a faster combination
+                best = (robot_time_est, sym, rot_moves)    # best combination is updated
+
+    if best is None:                              # case of no candidate solution
+        return no_solution, cube_defstr, 'URFDLB', 0, 0, 0   # the error string is returned
+    best_time, sym, rot_moves = best              # fastest combination
+    return solver_string(rot_moves), transformed_cube(cube_defstr.strip(), sym, 0), faces_map(sym), first_time, best_time, evaluated
+
+
+
+
+
+
+def faces_map(sym):
+    """ Returns a string with the original faces located at the URFDLB positions, after the whole cube rotation sym.
+        A move on the original face X is a move on the face conj_move[X] of the rotated cube."""
+
+    faces = [''] * 6                              # list of the original faces, per position
+    for face in range(6):                         # iteration over the six faces, as per URFDLB order
+        faces[sy.conj_move[18 * sym + 3 * face] // 3] = 'URFDLB'[face]   # position of the original face
+    return ''.join(faces)                         # faces map string is returned
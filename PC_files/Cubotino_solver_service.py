@@ -0,0 +1,533 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Solver service for the PC side of CUBOTino
+#
+# The Kociemba TwophaseSolver loads about 10 MB of tables from the twophase folder when it is imported, and each
+# solver call runs on the thread of the caller (for the GUI, the same of tkinter).
+# This module runs the solver in a separate long-lived process, that loads the tables once and serves the requests
+# over a local socket (multiprocessing.connection, localhost only, with authentication key):
+#  - The authentication key is random (32 bytes), generated once in the key file of the data_log_folder (readable by
+#    the user only), so the GUI, the webcam and the service started by hand share it; The CUBOTINO_SOLVER_KEY
+#    environment variable (hex) overrides it. Pickled messages are only accepted from who knows the key
+#  - The GUI and the webcam modules are thin clients, calling solve() and request() of this module
+#  - The first request starts the service process, when it is not running yet; The service accepts the connections
+#    right away, and it replies once the tables are loaded, so the clients wait for the tables being loaded by the
+#    service, instead of loading them on their own process
+#  - Each reply carries the timing metadata: Service time, queue time (waiting for a previous request), solver time
+#  - On multi-core PCs, the plain solver requests are served by a pool of processes (Cubotino_parallel)
+#  - In case the service cannot be reached, the request is served within the client process (as before); A port taken
+#    by another service (different key) or by another program is reported once
+#  - The GUI starts the service in background, once its window is shown (warm_up); Early requests wait on its future
+#  - The replies are cached by the client (Cubotino_cache), so a cube status already solved skips the solver;
+#    Plain solver requests are cached on the canonical cube (Cubotino_symmetry), shared by the rotated and mirrored cubes
+#  - Plain solver requests of cubes a few moves from solved are served by the lookup table (Cubotino_lookup), with an
+#    optimal solution, before the cache and the solver
+#  - While the solver tables are rebuilt (Cubotino_table_manager), the requests are replied with an error string
+#
+# The service can also be started once, and kept running, to have steady solver latency from the first cube:
+#   python Cubotino_solver_service.py --port 6001
+# Run from the PC_files folder, as the solver tables are in the twophase subfolder.
+#
+#############################################################################################################
+"""
+
+from multiprocessing.connection import Listener, Client   # local socket with authentication, and pickled messages
+from multiprocessing import AuthenticationError   # exception raised on a wrong authentication key
+from concurrent.futures import Future      # future of the service warm-up
+import subprocess                          # subprocess library, to start the service process
+import threading                           # threading library, to serve multiple clients
+import time                                # time library is imported
+import sys, os                             # sys and os libraries, for the python executable and the service folder
+
+import Cubotino_cache as cc                # solutions cache, in front of the solver (by Andrea Favero)
+import Cubotino_symmetry as cy             # canonical cube among the 48 symmetric ones, for the cache keys (by Andrea Favero)
+import Cubotino_lookup as cl               # lookup table of the short scrambles, in front of the solver (by Andrea Favero)
+import Cubotino_table_manager as tm        # integrity check and background rebuild of the solver tables (by Andrea Favero)
+
+
+
+
+# Global variables
+
+address = ('localhost', 6001)              # address (host, port) of the solver service
+key_env = 'CUBOTINO_SOLVER_KEY'            # environment variable with the authentication key (hex)
+key_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_log_folder')   # folder of the key file
+key_fname = os.path.join(key_folder, 'Cubotino_solver_key.txt')   # key file, shared by the service and the clients
+authkey = None                             # authentication key, read once by service_key()
+start_timeout = 20                         # max time (secs) to wait for the service process to listen on the socket
+conflict_reported = False                  # True once the port conflict has been reported
+
+conn = None                                # client connection to the solver service
+service_process = None                     # service process, when started by this client
+client_lock = threading.Lock()             # lock to serialize the requests of the client threads on the connection
+last_timing = {}                           # timing metadata of the last request
+warm_up_future = None                      # future of the service warm-up, resolved once the solver tables are loaded
+
+
+
+
+
+
+def service_key():
+    """ Returns the authentication key (bytes): From the environment variable when set, otherwise from the key file.
+        The key file is created with a random key when missing, readable and writable by the user only (O_EXCL, so
+        concurrent launches keep the first key). When the key file cannot be used, the key is random for this process,
+        and given to the service process started by it via the environment variable."""
+
+    global authkey
+
+    if authkey is not None:                # case the key is already known
+        return authkey
+    try:                                   # attempt
+        authkey = bytes.fromhex(os.environ[key_env])   # authentication key given by the environment
+        return authkey
+    except (KeyError, ValueError):         # exception is raised when the key is not given, or not valid
+        pass
+
+    try:                                   # attempt
+        if not os.path.exists(key_folder): # case the folder does not exist
+            os.makedirs(key_folder)        # folder is created
+        fd = os.open(key_fname, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)   # key file, created when missing
+        with os.fdopen(fd, 'w') as f:      # key file is opened in write mode
+            f.write(os.urandom(32).hex())  # random authentication key (hex)
+    except FileExistsError:                # exception is raised when the key file exists
+        pass
+    except OSError:                        # exception is raised if the key file cannot be created
+        authkey = os.urandom(32)           # random authentication key, for this process
+        return authkey
+
+    for attempt in range(20):              # attempts, in case the file is being written by another process
+        try:                               # attempt
+            with open(key_fname, 'r') as f:    # key file is opened in read mode
+                key = bytes.fromhex(f.read().strip())   # authentication key from the key file
+            if len(key) == 32:             # case of complete key
+                authkey = key
+                return authkey
+        except (OSError, ValueError):      # exception is raised if the file is not readable, or not complete
+            pass
+        time.sleep(0.05)                   # short sleep before a new attempt
+    authkey = os.urandom(32)               # random authentication key, for this process
+    return authkey
+
+
+
+
+
+
+def report_conflict(reason):
+    """ Prints once that the solver service port cannot be used, so the solver runs within the client process."""
+
+    global conflict_reported
+
+    if not conflict_reported:              # case the conflict is not reported yet
+        conflict_reported = True
+        print(f'solver service on port {address[1]} not usable ({reason}): the solver runs in this process')
+
+
+
+
+
+
+def load_solver(processes=1):
+    """ Imports the solver (loading the tables), and returns the dict of the functions served by name, and the time
+        (secs) spent to load the tables. With more than one process (None for one per core), the plain solver
+        requests are served by the multi-core search of Cubotino_parallel."""
+
+    start = time.time()                    # time reference
+    import Cubotino_solver as cs           # candidate solutions by robot time; It imports the Kociemba solver
+    import Cubotino_robot_search as rs     # robot-metric search, on the Kociemba solver tables (by Andrea Favero)
+    functions = {'solve': cs.sv.solve,
+                 'robot_best_solution': cs.robot_best_solution,
+                 'robot_best_orientation': cs.robot_best_orientation,
+                 'robot_anytime_solution': cs.robot_anytime_solution,
+                 'robot_search_solution': rs.robot_search_solution}
+    if processes is None or processes > 1: # case of multi-core search
+        import Cubotino_parallel as cp     # multi-core search for the Kociemba solver (by Andrea Favero)
+        if cp.start(processes) > 1:        # case the pool has more than one process
+            functions['solve'] = cp.solve  # plain solver requests are served by the pool of processes
+        else:                              # case of a single core
+            cp.stop()                      # pool of processes is stopped
+    return functions, time.time() - start  # functions dict and tables loading time
+
+
+
+
+
+
+def load_run(processes, solver, stats, ready):
+    """ Runs on the loading thread of the service: Loads the solver tables, and sets the ready event once done.
+        The solver dict gets the 'functions' key, or the 'error' key when the solver cannot be imported."""
+
+    try:                                   # attempt
+        functions, tables_load = load_solver(processes)   # solver functions, and tables loading time
+        stats['tables_load'] = round(tables_load, 4)      # tables loading time, in the service statistics
+        solver['functions'] = functions    # functions served by name
+        print(f'solver service, tables loaded in {round(tables_load, 2)} secs')
+    except Exception as e:                 # exception is raised if the solver cannot be imported
+        solver['error'] = f'{type(e).__name__}: {e}'   # error, replied to the requests
+        print(f'solver service, tables not loaded: {solver["error"]}')
+    ready.set()                            # requests are served from now on
+
+
+
+
+
+
+def serve_client(connection, solver, ready, solver_lock, stats, stop_event, listener_address):
+    """ Serves the requests of a client connection, until the client disconnects.
+        Requests are dicts with 'name' and 'args' keys; Replies are dicts with 'result' and 'timing' keys, or with the
+        'error' key in case of exception. The requests (ping included) are replied once the tables are loaded.
+        The solver calls are serialized by solver_lock, for steady latency."""
+
+    while not stop_event.is_set():         # iteration until the service is stopped
+        try:                               # attempt
+            request = connection.recv()    # request from the client (blocking)
+        except (EOFError, OSError):        # exception is raised when the client disconnects
+            break                          # while loop is interrupted
+
+        received = time.time()             # time reference of the request
+        name = request.get('name')         # name of the requested function
+        if name == 'stop':                 # case of a request to stop the service
+            stop_event.set()               # stop event is set
+            connection.send({'result': 'stopped', 'timing': {}})
+            Client(listener_address, authkey=service_key()).close()   # wakes up the listener, waiting for a new client
+            break                          # while loop is interrupted
+
+        ready.wait()                       # waits for the solver tables being loaded
+        if 'error' in solver:              # case the solver could not be imported
+            reply = {'error': solver['error'], 'timing': dict(stats)}   # reply with the loading error
+        elif name == 'ping':               # case of a request for the service status
+            reply = {'result': 'ready', 'timing': dict(stats)}         # reply once the tables are loaded
+        else:                              # case of a solver request
+            reply = None
+        if reply is not None:              # case the request is already replied
+            try:                           # attempt
+                connection.send(reply)     # reply is sent to the client
+            except (EOFError, OSError):    # exception is raised when the client disconnects
+                break                      # while loop is interrupted
+            continue                       # next request is served
+
+        with solver_lock:                  # solver calls are serialized
+            started = time.time()          # time reference of the solver call
+            try:                           # attempt
+                result = solver['functions'][name](*request.get('args', ()))   # requested function is called
+                reply = {'result': result}                            # reply with the result
+            except Exception as e:         # exception is raised by unknown names or by the solver
+                reply = {'error': f'{type(e).__name__}: {e}'}         # reply with the error
+            ended = time.time()            # time reference at the solver call end
+            stats['requests'] += 1         # counter of the served requests is increased
+
+        reply['timing'] = {'queue': round(started - received, 4),     # time waiting for the previous requests
+                           'solver': round(ended - started, 4),       # time of the solver call
+                           'tables_load': stats['tables_load'],       # time the service spent to load the tables
+                           'requests': stats['requests'],             # requests served by the service
+                           'service': 'process'}                      # request served by the service process
+        try:                               # attempt
+            connection.send(reply)         # reply is sent to the client
+        except (EOFError, OSError):        # exception is raised when the client disconnects
+            break                          # while loop is interrupted
+    connection.close()                     # client connection is closed
+
+
+
+
+
+
+def serve(host='localhost', port=6001, processes=None):
+    """ Service main function: Listens on the local socket, loads the solver tables, and serves the clients.
+        The tables are loaded on a thread, while the connections are accepted: The clients connect (and authenticate)
+        right away, and they wait for the first reply. The processes argument is the amount of processes for the plain
+        solver requests (None for one per core)."""
+
+    listener = Listener((host, port), authkey=service_key())   # local socket listener
+    print(f'solver service on {host}:{port}, loading the solver tables')
+
+    solver = {}                            # dict with the solver functions, once loaded
+    stats = {'tables_load': None, 'requests': 0}   # service statistics
+    ready = threading.Event()              # event set once the solver tables are loaded
+    solver_lock = threading.Lock()         # lock to serialize the solver calls
+    stop_event = threading.Event()         # event to stop the service
+    threading.Thread(target=load_run, args=(processes, solver, stats, ready), daemon=True).start()   # tables loading
+
+    while not stop_event.is_set():         # iteration until the service is stopped
+        try:                               # attempt
+            connection = listener.accept() # client connection (blocking)
+        except Exception:                  # exception is raised on failed authentication
+            continue                       # next client is accepted
+        if stop_event.is_set():            # case the service has been stopped
+            connection.close()             # client connection is closed
+            break                          # while loop is interrupted
+        threading.Thread(target=serve_client, daemon=True,
+                         args=(connection, solver, ready, solver_lock, stats, stop_event, listener.address)).start()
+    listener.close()                       # local socket listener is closed
+    if 'Cubotino_parallel' in sys.modules: # case the multi-core search is imported
+        sys.modules['Cubotino_parallel'].stop()   # pool of processes is stopped
+
+
+
+
+
+
+def start_service():
+    """ Starts the service process, on the folder of this module (the solver tables are in its twophase subfolder).
+        Returns the process object."""
+
+    folder = os.path.dirname(os.path.abspath(__file__))   # folder of this module
+    cmd = [sys.executable, os.path.join(folder, 'Cubotino_solver_service.py'), '--port', str(address[1])]
+    env = dict(os.environ, **{key_env: service_key().hex()})   # environment with the authentication key
+    return subprocess.Popen(cmd, cwd=folder, env=env)     # service process is started
+
+
+
+
+
+
+def connect():
+    """ Connects to the solver service, by starting it when it is not running. Returns True when connected.
+        The service accepts the connections while it loads the tables, so start_timeout bounds the connection time.
+        The port taken by another service (different key) or by another program is reported."""
+
+    global conn, service_process
+
+    if conn is not None:                   # case the client is already connected
+        return True
+    try:                                   # attempt
+        conn = Client(address, authkey=service_key())   # connection to a running service
+        return True
+    except AuthenticationError:            # exception is raised by a service with another key
+        report_conflict('another solver service, with a different authentication key')
+        return False
+    except (ConnectionRefusedError, FileNotFoundError):   # exception is raised when the service is not running
+        pass
+    except (OSError, EOFError) as e:       # exception is raised by another program on the port
+        report_conflict(f'{type(e).__name__}: {e}')
+        return False
+
+    if service_process is None or service_process.poll() is not None:   # case the service was not started, or it ended
+        try:                               # attempt
+            service_process = start_service()   # service process is started
+        except OSError:                    # exception is raised if the process cannot be started
+            return False
+
+    deadline = time.time() + start_timeout     # time limit for the service to listen
+    while time.time() < deadline and service_process.poll() is None:   # iteration until the service listens
+        try:                               # attempt
+            conn = Client(address, authkey=service_key())   # connection to the service (it loads the tables meanwhile)
+            return True
+        except AuthenticationError:        # exception is raised by a service with another key, on the same port
+            report_conflict('another solver service, with a different authentication key')
+            return False
+        except OSError:                    # exception is raised when the service is not listening yet
+            time.sleep(0.1)                # short sleep before a new attempt
+    if service_process.poll() is not None: # case the service process ended (i.e. port already in use)
+        report_conflict(f'the service process ended, exit code {service_process.returncode}')
+    else:                                  # case the service is not listening within the time limit
+        report_conflict(f'the service is not listening within {start_timeout} secs')
+    return False
+
+
+
+
+
+
+def warm_up():
+    """ Starts the solver service, and its tables loading, on a background thread: The caller is not blocked.
+        Returns a concurrent.futures.Future, resolved with the service statistics dict once the tables are loaded
+        (or with the exception, when the service cannot be reached). Requests made meanwhile wait on the future."""
+
+    global warm_up_future
+
+    if warm_up_future is None:             # case the warm-up is not started yet
+        warm_up_future = Future()          # future of the warm-up
+        threading.Thread(target=warm_up_run, args=(warm_up_future,), daemon=True).start()   # warm-up thread
+    return warm_up_future
+
+
+
+
+
+
+def warm_up_run(future):
+    """ Runs on the warm-up thread: Connects to the service (starting it) and waits for the tables being loaded."""
+
+    try:                                   # attempt
+        with client_lock:                  # the connection is used by one thread at the time
+            if not connect():              # case the service cannot be reached
+                raise ConnectionError('solver service not reachable')
+            conn.send({'name': 'ping'})    # service status request (replied once the tables are loaded)
+            reply = conn.recv()            # reply from the service (blocking)
+        if 'error' in reply:               # case the service could not load the solver tables
+            raise RuntimeError(reply['error'])
+        future.set_result(reply['timing']) # future is resolved with the service statistics
+    except Exception as e:                 # exception is raised if the service cannot be reached
+        future.set_exception(e)            # future is resolved with the exception
+
+
+
+
+
+
+def request(name, *args):
+    """ Requests the function name ('solve', 'robot_best_solution', 'robot_best_orientation', 'robot_anytime_solution'
+        or 'robot_search_solution') to the solver service.
+        Returns the function result, and the timing metadata dict (secs):
+            - total: time for the whole request, as measured by the client
+            - queue: time waiting for the requests of other clients
+            - solver: time of the solver call
+            - tables_load: time spent to load the solver tables, by the service
+            - requests: requests served so far by the service
+            - service: 'process' when served by the service process, 'cache' on cache hit, 'lookup' on lookup table
+              hit, 'in-process' otherwise.
+        Plain solver requests are first searched in the lookup table of the short scrambles (Cubotino_lookup).
+        The replies are cached (Cubotino_cache), so the same request is served without the solver.
+        In case the service cannot be reached, the request is served within the client process.
+        While the solver tables are rebuilt, the result is an error string with the rebuild progress (the lookup
+        table still serves the short scrambles)."""
+
+    global last_timing
+
+    start = time.time()                    # time reference
+    if name == 'solve':                    # case of a plain solver request
+        result = cl.lookup(args[0])        # optimal solution from the lookup table, or None
+        if result is not None:             # case of lookup table hit
+            last_timing = {'queue': 0, 'solver': 0, 'tables_load': 0, 'requests': 0, 'service': 'lookup',
+                           'total': round(time.time() - start, 6)}
+            return result, last_timing
+
+    if tm.rebuilding():                    # case the solver tables are being rebuilt (the solver can't be imported)
+        last_timing = {'queue': 0, 'solver': 0, 'tables_load': 0, 'requests': 0, 'service': 'tables rebuild',
+                       'total': round(time.time() - start, 6)}
+        return f'Error: {tm.progress_text()}', last_timing
+
+    sym = None                             # symmetry of the canonical cube (plain solver requests only)
+    key = cc.make_key(name, *args)         # cache key, from the request name and arguments
+    if name == 'solve':                    # case of a plain solver request
+        try:                               # attempt
+            canonical, sym = cy.canonical_cube(args[0])   # canonical cube among the 48 symmetric cubes
+            key = cc.make_key(name, canonical, *args[1:])  # cache key, shared by the rotated and mirrored cubes
+        except:                            # exception is raised by an invalid cube definition string
+            sym = None                     # the cube definition string is used as it is
+
+    result = cc.get(key)                   # cached result, or None
+    if result is not None:                 # case of cache hit
+        if sym is not None:                # case the cached solution is for the canonical cube
+            result = cy.map_solver_string(result, sym, False)   # solution mapped back to the original cube
+        last_timing = {'queue': 0, 'solver': 0, 'tables_load': 0, 'requests': 0, 'service': 'cache',
+                       'symmetry': sym, 'total': round(time.time() - start, 4)}
+        return result, last_timing
+
+    result, last_timing = service_request(name, *args)   # request is served by the solver
+    first = result if isinstance(result, str) else result[0]   # solver string, first of the tuple results
+    if not 'Error' in first:               # case the solver did not return an error
+        if sym is not None:                # case the cache key is the canonical cube
+            cc.put(key, cy.map_solver_string(result, sym, True))   # solution of the canonical cube is cached
+        else:                              # case the cache key is the request as it is
+            cc.put(key, result)            # result is cached
+    last_timing['total'] = round(time.time() - start, 4)   # request time, as measured by the client
+    return result, last_timing
+
+
+
+
+
+
+def service_request(name, *args):
+    """ Requests the function name to the solver service, as per request() but without the cache.
+        In case the service cannot be reached, the request is served within the client process."""
+
+    global conn
+
+    start = time.time()                    # time reference
+    if warm_up_future is not None and not warm_up_future.done():   # case the service is still warming up
+        try:                               # attempt
+            warm_up_future.result(start_timeout)   # waits for the solver tables being loaded by the service
+        except Exception:                  # exception is raised if the service cannot be reached (or on timeout)
+            pass                           # the request is anyhow attempted
+    with client_lock:                      # requests of the client threads are serialized on the connection
+        for attempt in range(2):           # one more attempt, in case the service has been restarted
+            if not connect():              # case the service cannot be reached
+                break                      # for loop is interrupted
+            try:                           # attempt
+                conn.send({'name': name, 'args': args})   # request is sent to the service
+                reply = conn.recv()        # reply from the service (blocking)
+            except (EOFError, OSError):    # exception is raised when the service connection drops
+                conn = None                # connection is dropped
+                continue                   # new attempt
+            if 'error' in reply:           # case the service raised an exception
+                raise RuntimeError(reply['error'])
+            timing = reply['timing']       # timing metadata from the service
+            timing['total'] = round(time.time() - start, 4)   # request time, as measured by the client
+            return reply['result'], timing
+
+    functions, tables_load = load_solver() # solver functions, imported on the client process (fallback)
+    started = time.time()                  # time reference of the solver call
+    result = functions[name](*args)        # requested function is called
+    ended = time.time()                    # time reference at the solver call end
+    timing = {'queue': 0, 'solver': round(ended - started, 4), 'tables_load': round(tables_load, 4),
+              'requests': 0, 'service': 'in-process', 'total': round(ended - start, 4)}
+    return result, timing
+
+
+
+
+
+
+def solve(cube_defstr, max_length=20, timeout=3):
+    """ Kociemba solver call, as sv.solve(cube_defstr, max_length, timeout), served by the solver service.
+        Returns the solver string (i.e. 'U2 R1 F3 (3f)'), and the timing metadata dict."""
+
+    return request('solve', cube_defstr.strip(), max_length, timeout)
+
+
+
+
+
+
+def stop():
+    """ Closes the connection to the solver service, and stops the service when started by this client."""
+
+    global conn, service_process
+
+    with client_lock:                      # no request is in progress
+        if conn is not None and service_process is not None:   # case the service was started by this client
+            try:                           # attempt
+                conn.send({'name': 'stop'})    # stop request is sent to the service
+                conn.recv()                # reply from the service
+            except (EOFError, OSError):    # exception is raised when the service connection drops
+                pass
+        if conn is not None:               # case the client is connected
+            conn.close()                   # connection is closed
+            conn = None
+        if service_process is not None:    # case the service was started by this client
+            try:                           # attempt
+                service_process.wait(2)    # time for the service to end
+            except subprocess.TimeoutExpired:   # exception is raised if the service does not end
+                service_process.kill()     # service process is killed
+            service_process = None
+
+
+
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # argument parser object creation
+    parser = argparse.ArgumentParser(description='CUBOTino solver service, with the Kociemba solver tables preloaded')
+
+    # --port argument is added to the parser
+    parser.add_argument("-p", "--port", type=int, default=address[1],
+                        help="Localhost port of the solver service. Default 6001.")
+
+    # --processes argument is added to the parser
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Processes for the plain solver requests, 1 to use the solver threads. Default one per core.")
+
+    args = parser.parse_args()   # argument parsed assignement
+    serve('localhost', args.port, args.processes)
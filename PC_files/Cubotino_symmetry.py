@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Cube symmetries, for the solutions cache of CUBOTino
+#
+# A cube status, and the same cube rotated or mirrored, are solved by the same solution once its moves are mapped
+# to the rotated (or mirrored) faces. There are 48 cube symmetries: 24 whole cube rotations, each with and without
+# the mirroring at the plane through the U, D, F, B centers.
+# This module maps a cube definition string to a canonical representative among the 48 symmetric cubes (S*cube*S^-1):
+#  - The canonical cube is the symmetric cube with the lowest cubie coordinates (permutations and orientations)
+#  - The symmetry index is returned together with the canonical cube, to map a solution back to the original cube
+#  - The symmetries are indexed as the symCube list of the solver symmetries module (0 is the identity)
+#
+# It is built on the cubie module of the Kociemba solver, that does not load the solver tables; The four basic
+# symmetries are the same of the solver symmetries module (that instead loads its tables, when imported).
+#
+#############################################################################################################
+"""
+
+try:                                       # attempt
+    import face, cubie                     # import Kociemba solver library parts, copied in robot folder
+except:                                    # exception is raised if no library in folder or other issues
+    import twophase.face as face           # import face Kociemba solver library part, installed
+    import twophase.cubie as cubie         # import cubie Kociemba solver library part, installed
+
+import Cubotino_moves as cm                # translate a cube solution into CUBOTino robot moves (by Andrea Favero)
+
+
+
+
+# Global variables
+
+# Basic symmetries as (corners permutation, corners orientation, edges permutation, edges orientation), with corners
+# as per URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB order and edges as per UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR
+ROT_URF3 = ((0,4,5,1,3,7,6,2), (1,2,1,2,2,1,2,1), (1,8,5,9,3,11,7,10,0,4,6,2), (1,0,1,0,1,0,1,0,1,1,1,1))  # 120deg URF-DBL diagonal
+ROT_F2 = ((5,4,7,6,1,0,3,2), (0,0,0,0,0,0,0,0), (6,5,4,7,2,1,0,3,9,8,11,10), (0,0,0,0,0,0,0,0,0,0,0,0))    # 180deg F-B axis
+ROT_U4 = ((3,0,1,2,7,4,5,6), (0,0,0,0,0,0,0,0), (3,0,1,2,7,4,5,6,11,8,9,10), (0,0,0,0,0,0,0,0,1,1,1,1))    # 90deg U-D axis
+MIRR_LR2 = ((1,0,3,2,5,4,7,6), (3,3,3,3,3,3,3,3), (2,1,0,3,6,5,4,7,9,8,11,10), (0,0,0,0,0,0,0,0,0,0,0,0))  # L-R mirror
+
+sym_cubes = []                             # list of the 48 symmetries, as (cp, co, ep, eo) tuples
+inv_idx = []                               # list of the inverse symmetry indexes: sym_cubes[inv_idx[s]] = sym_cubes[s]^-1
+conj_move = []                             # list of the conjugated solver moves: conj_move[18*s+m] = S*m*S^-1
+
+
+
+
+
+
+def multiply(a, b):
+    """ Returns the cubie cube a*b, as per CubieCube.multiply() of the solver cubie module, with cubie cubes as
+        (cp, co, ep, eo) tuples of integers. Corner orientations from 3 are the mirrored ones."""
+
+    a_cp, a_co, a_ep, a_eo = a             # first cubie cube
+    b_cp, b_co, b_ep, b_eo = b             # second cubie cube
+    co = []                                # corners orientation of the product
+    for c in range(8):                     # iteration over the corners
+        ori_a = a_co[b_cp[c]]              # orientation of the corner of a, moved to c by b
+        ori_b = b_co[c]                    # orientation change by b
+        if ori_a < 3 and ori_b < 3:        # two regular cubes
+            ori = (ori_a + ori_b) % 3
+        elif ori_a < 3:                    # cube b is in a mirrored state
+            ori = ori_a + ori_b
+            if ori >= 6:
+                ori -= 3                   # the composition also is in a mirrored state
+        elif ori_b < 3:                    # cube a is in a mirrored state
+            ori = ori_a - ori_b
+            if ori < 3:
+                ori += 3                   # the composition is a mirrored cube
+        else:                              # both cubes are in mirrored states
+            ori = ori_a - ori_b
+            if ori < 0:
+                ori += 3                   # the composition is a regular cube
+        co.append(ori)
+    return (tuple([a_cp[b_cp[c]] for c in range(8)]), tuple(co),
+            tuple([a_ep[b_ep[e]] for e in range(12)]), tuple([(b_eo[e] + a_eo[b_ep[e]]) % 2 for e in range(12)]))
+
+
+
+
+
+
+def to_cubie(cube_defstr):
+    """ Returns the cubie cube, as (cp, co, ep, eo) tuple of integers, of the cube definition string."""
+
+    fc = face.FaceCube()                   # facelet cube object
+    fc.from_string(cube_defstr.strip())    # facelet cube is defined by the cube definition string
+    cc = fc.to_cubie_cube()                # cubie cube representation
+    return (tuple([int(c) for c in cc.cp]), tuple(cc.co), tuple([int(e) for e in cc.ep]), tuple(cc.eo))
+
+
+
+
+
+
+def to_defstr(cube):
+    """ Returns the cube definition string of the cubie cube, given as (cp, co, ep, eo) tuple of integers."""
+
+    cp, co, ep, eo = cube                  # cubie cube
+    return cubie.CubieCube([cubie.Co(c) for c in cp], list(co), [cubie.Ed(e) for e in ep], list(eo)).to_facelet_cube().to_string()
+
+
+
+
+
+
+def build_symmetries():
+    """ Fills the sym_cubes, inv_idx and conj_move lists, once at import time. The symmetries are generated in the same
+        order of the solver symmetries module, so the indexes are the same."""
+
+    identity = (tuple(range(8)), (0,)*8, tuple(range(12)), (0,)*12)   # identity cube
+    cube = identity
+    for urf3 in range(3):
+        for f2 in range(2):
+            for u4 in range(4):
+                for lr2 in range(2):
+                    sym_cubes.append(cube)             # symmetry is added to the list
+                    cube = multiply(cube, MIRR_LR2)
+                cube = multiply(cube, ROT_U4)
+            cube = multiply(cube, ROT_F2)
+        cube = multiply(cube, ROT_URF3)
+
+    for s in range(48):                    # iteration over the symmetries
+        for i in range(48):                # iteration over the candidate inverse symmetries
+            if multiply(sym_cubes[s], sym_cubes[i]) == identity:   # case sym_cubes[i] is the inverse
+                inv_idx.append(i)
+                break
+
+    move_cubes = []                        # list of the solver moves cubie cubes, as per URFDLB order
+    for mc in cubie.moveCube:              # iteration over the solver moves
+        move_cubes.append((tuple([int(c) for c in mc.cp]), tuple(mc.co), tuple([int(e) for e in mc.ep]), tuple(mc.eo)))
+    moves = {mc:m for m, mc in enumerate(move_cubes)}   # dict from cubie cube to solver move index
+    for s in range(48):                    # iteration over the symmetries
+        for mc in move_cubes:              # iteration over the solver moves
+            conj_move.append(moves[multiply(multiply(sym_cubes[s], mc), sym_cubes[inv_idx[s]])])
+
+build_symmetries()                         # the symmetries tables are compiled once, at import time
+
+
+
+
+
+
+def canonical_cube(cube_defstr):
+    """ Returns the canonical cube definition string among the 48 symmetric cubes S*cube*S^-1, and the index of the
+        symmetry S (as per sym_cubes). The canonical cube is the one with the lowest cubie coordinates; A cube and its
+        rotated or mirrored versions have the same canonical cube."""
+
+    cube = to_cubie(cube_defstr)           # cubie cube of the cube definition string
+    best, best_sym = None, 0               # canonical cubie cube and its symmetry index
+    for s in range(48):                    # iteration over the symmetries
+        conj = multiply(multiply(sym_cubes[s], cube), sym_cubes[inv_idx[s]])   # S * cube * S^-1
+        if best is None or conj < best:    # case of lower cubie coordinates
+            best, best_sym = conj, s       # canonical candidate is updated
+    return to_defstr(best), best_sym       # canonical cube definition string, and symmetry index
+
+
+
+
+
+
+def to_canonical(moves, sym):
+    """ Maps the solution moves (list of solver moves, like 'R2') of a cube, to the canonical cube of symmetry sym."""
+
+    return [cm.solver_moves[conj_move[18 * sym + cm.solver_moves_idx[move]]] for move in moves]
+
+
+
+
+
+
+def from_canonical(moves, sym):
+    """ Maps the solution moves (list of solver moves, like 'R2') of the canonical cube of symmetry sym, back to the
+        original cube (the moves are conjugated by the inverse symmetry)."""
+
+    return [cm.solver_moves[conj_move[18 * inv_idx[sym] + cm.solver_moves_idx[move]]] for move in moves]
+
+
+
+
+
+
+def map_solver_string(cube_solving_string, sym, to_canonical_cube):
+    """ Maps the solver string (i.e. 'U2 R1 F3 (3f)') to the canonical cube of symmetry sym when to_canonical_cube is
+        True, or from the canonical cube back to the original cube when False. Solver error strings are returned as they are."""
+
+    if 'Error' in cube_solving_string or not 'f)' in cube_solving_string:   # case of a solver error string
+        return cube_solving_string
+    moves = cube_solving_string[:cube_solving_string.find('(')].split()   # list of the solution moves
+    moves = to_canonical(moves, sym) if to_canonical_cube else from_canonical(moves, sym)   # mapped moves
+    return ' '.join(moves) + (' ' if moves else '') + '(' + str(len(moves)) + 'f)'   # same format as the solver
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Benchmark of the canonical cube (Cubotino_symmetry), used for the solutions cache keys.
+#
+# Random cubes are generated via cubie.CubieCube().randomize(), and each cube is also rotated / mirrored by random
+# symmetries (as a cube placed differently on the robot, or read from a different face), by reporting:
+#  - The canonical cube time, split in the cubie conversion, the 48 conjugations and the definition string conversion
+#  - The time to map a cached solution back to the original cube (the cost of a cache hit)
+#  - The distinct cache keys with and without the canonical cube, for the same cube statuses
+#
+# The solver is not used, so the solver tables are not needed, i.e.:
+#   python Cubotino_symmetry_benchmark.py --cubes 500 --variants 4
+#
+#############################################################################################################
+"""
+
+import argparse
+
+# argument parser object creation
+parser = argparse.ArgumentParser(description='Benchmark of the Cubotino_symmetry canonical cube')
+
+# --cubes argument is added to the parser
+parser.add_argument("-c", "--cubes", type=int, default=500,
+                    help="Amount of random cubes. Default 500.")
+
+# --variants argument is added to the parser
+parser.add_argument("--variants", type=int, default=4,
+                    help="Amount of rotated / mirrored versions of each random cube. Default 4.")
+
+# --repeat argument is added to the parser
+parser.add_argument("--repeat", type=int, default=3,
+                    help="Amount of repetitions for the timing. Default 3.")
+
+args = parser.parse_args()   # argument parsed assignement
+
+
+import Cubotino_symmetry as cy             # canonical cube among the 48 symmetric ones (by Andrea Favero)
+import random                              # random library, for the symmetries applied to the random cubes
+import time                                # time library is imported
+
+
+
+
+
+
+def random_cubes(cubes, variants):
+    """ Returns a list of cubes (as cubie tuples), with each random cube followed by its rotated / mirrored versions."""
+
+    cube_list = []                                              # list of the cubes
+    for i in range(cubes):                                      # iteration over the random cubes
+        cc = cy.cubie.CubieCube()                               # cube in cubie reppresentation
+        cc.randomize()                                          # randomized cube in cubie reppresentation
+        cube = cy.to_cubie(cc.to_facelet_cube().to_string())    # cube as cubie tuple
+        cube_list.append(cube)                                  # random cube is added
+        for s in random.sample(range(1, 48), variants):         # iteration over random symmetries (not the identity)
+            cube_list.append(cy.multiply(cy.multiply(cy.sym_cubes[s], cube), cy.sym_cubes[cy.inv_idx[s]]))
+    return cube_list
+
+
+
+
+
+
+def best_time(function, items, repeat):
+    """ Returns the best time (secs), out of repeat runs, to apply the function to all the items."""
+
+    best = None                                                 # best time
+    for r in range(repeat):                                     # iteration over the repetitions
+        start = time.perf_counter()                             # time reference
+        for item in items:                                      # iteration over the items
+            function(item)
+        elapsed = time.perf_counter() - start                   # time for all the items
+        best = elapsed if best is None else min(best, elapsed)  # best time is updated
+    return best
+
+
+
+
+
+
+def conjugations(cube):
+    """ The 48 conjugations of canonical_cube(), without the cube definition string conversions."""
+
+    best = None                                                 # canonical cubie cube
+    for s in range(48):                                         # iteration over the symmetries
+        conj = cy.multiply(cy.multiply(cy.sym_cubes[s], cube), cy.sym_cubes[cy.inv_idx[s]])   # S * cube * S^-1
+        if best is None or conj < best:                         # case of lower cubie coordinates
+            best = conj
+    return best
+
+
+
+
+
+
+def benchmark(cube_list, repeat):
+    """ Times the canonical cube and the solutions mapping, and counts the distinct cache keys."""
+
+    defstrs = [cy.to_defstr(cube) for cube in cube_list]        # cube definition strings
+    n = len(defstrs)                                            # amount of cubes
+    t_cubie = best_time(cy.to_cubie, defstrs, repeat)           # cube definition string to cubie time
+    t_conj = best_time(conjugations, cube_list, repeat)         # 48 conjugations time
+    t_defstr = best_time(cy.to_defstr, cube_list, repeat)       # cubie to cube definition string time
+    t_total = best_time(cy.canonical_cube, defstrs, repeat)     # canonical cube time
+
+    canonicals = [cy.canonical_cube(d) for d in defstrs]        # canonical cubes and symmetries
+    solution = 'U1 R2 F3 D1 L2 B3 U2 R1 F2 D3 L1 B2 U3 R3 F1 D2 L3 B1 U1 R2 (20f)'   # 20 moves solution
+    items = [sym for canonical, sym in canonicals]              # symmetries of the canonical cubes
+    t_hit = best_time(lambda sym: cy.map_solver_string(solution, sym, False), items, repeat)   # cache hit mapping
+
+    print(f'cubes: {n} ({args.cubes} random cubes, {args.variants} rotated / mirrored versions each)')
+    print(f'canonical cube time: {round(1e6*t_total/n, 1)} us per cube')
+    print(f'  cube string to cubie : {round(1e6*t_cubie/n, 1)} us')
+    print(f'  48 conjugations      : {round(1e6*t_conj/n, 1)} us')
+    print(f'  cubie to cube string : {round(1e6*t_defstr/n, 1)} us')
+    print(f'solution mapping on a cache hit (20 moves): {round(1e6*t_hit/n, 1)} us per cube')
+    print(f'distinct cache keys: {len(set(defstrs))} plain, {len(set(c for c, s in canonicals))} canonical')
+    print()
+
+
+
+
+
+
+if __name__ == "__main__":
+    start = time.time()                                         # time reference
+    cube_list = random_cubes(args.cubes, args.variants)         # random cubes, with rotated / mirrored versions
+    print(f'\nrandom cubes generated in {round(time.time()-start, 1)} secs\n')
+    benchmark(cube_list, args.repeat)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Integrity check and background rebuild of the Kociemba solver tables, for the PC side of CUBOTino
+#
+# When a table file of the twophase folder is missing, the solver generates it when first imported (it can take half
+# an hour for the pruning tables), blocking the process importing it; A truncated table file is not detected at all.
+# This module checks the table files in a few milliseconds, and it rebuilds the bad ones in background:
+#  - check() compares the size, and the CRC32 of three blocks (start, middle, end), of each table file with the
+#    expected ones (the tables are generated deterministically); full=True checks the CRC32 of the whole files
+#  - start_rebuild() generates the bad tables on a separate process (the solver import, in a build folder with the
+#    good tables), and a thread follows its progress from the solver prints: The caller keeps working meanwhile
+#  - Each rebuilt table is verified (full CRC32), then it replaces the bad one by os.replace(), so the twophase folder
+#    never has a partial table file
+# The GUI checks the tables before the solver warm-up, and it shows the rebuild progress on its title; Meanwhile the
+# solver service replies with an error, so the tables are never generated within the GUI process.
+#
+# To check the tables (full CRC32), and to rebuild the bad ones in foreground, from the PC_files folder:
+#   python Cubotino_table_manager.py --full --rebuild
+#
+#############################################################################################################
+"""
+
+import subprocess                          # subprocess library, for the tables rebuild process
+import threading                           # threading library, to follow the rebuild process in background
+import shutil                              # shutil library, to copy the good tables and remove the build folder
+import zlib                                # zlib library, for the CRC32 checksums
+import time                                # time library is imported
+import sys, os                             # sys and os libraries, for the python executable and the files
+
+
+
+
+# Global variables
+
+folder = 'twophase'                        # folder of the solver tables, relative to the PC_files folder
+build_folder = 'twophase_rebuild'          # folder of the tables rebuild (it has a twophase subfolder)
+block = 4096                               # bytes per checked block, for the quick check
+replace_attempts = 20                      # attempts to replace a table file (Windows: the file could be mapped)
+
+# expected table files, as name: (size in bytes, CRC32 of the three blocks, CRC32 of the whole file)
+tables = {
+    'co_classidx': (80640, 0xe3c9ba53, 0x41e6f9aa),
+    'co_rep': (5536, 0x45335f7f, 0x6f428e36),
+    'co_sym': (40320, 0xdcf96622, 0x704b6190),
+    'conj_twist': (69984, 0x93efb841, 0xba79aa68),
+    'conj_ud_edges': (1290240, 0x60ac1f9c, 0xce580243),
+    'fs_classidx': (2027520, 0x552cd51f, 0xc31c0591),
+    'fs_rep': (257720, 0xcc01d604, 0x4a2bcd30),
+    'fs_sym': (1013760, 0x839e2d24, 0x5d7261c2),
+    'move_corners': (1451520, 0x0394568f, 0x5e6bca64),
+    'move_d_edges': (427680, 0xcb477a54, 0xd5d9820a),
+    'move_flip': (73728, 0x35bd0c43, 0xa0d00faf),
+    'move_slice_sorted': (427680, 0xc6a5d946, 0xdf5ecde6),
+    'move_twist': (78732, 0xc332ef8c, 0xeefdc930),
+    'move_u_edges': (427680, 0xcb477a54, 0xd5d9820a),
+    'move_ud_edges': (1451520, 0xf983e0f6, 0xfc732529),
+    'phase1_prun': (35227104, 0x9631c535, 0xf3d84b85),
+    'phase2_cornsliceprun': (967680, 0xdec23f97, 0x330612c3),
+    'phase2_edgemerge': (80640, 0xb32d54d7, 0x1986e2b7),
+    'phase2_prun': (27901440, 0x5658b95e, 0x2eaefcc8)}
+
+# rebuild status, updated by the rebuild thread
+rebuild_state = {'status': 'idle',         # 'idle', 'running', 'done' or 'failed'
+                 'tables': [],             # tables being rebuilt
+                 'table': '',              # table in progress
+                 'progress': 0.0,          # rebuild progress, from 0 to 1 (weighted on the tables size)
+                 'message': ''}            # last message, or error
+rebuild_lock = threading.Lock()            # lock to start one rebuild at the time
+
+
+
+
+
+
+def blocks_crc(path, size):
+    """ Returns the CRC32 of three blocks of the file (start, middle and end), of the given size."""
+
+    crc = 0                                # CRC32 initial value
+    with open(path, 'rb') as f:            # file is opened
+        for offset in sorted({0, max(0, size // 2 - block // 2), max(0, size - block)}):   # blocks offsets
+            f.seek(offset)
+            crc = zlib.crc32(f.read(block), crc)
+    return crc
+
+
+
+
+
+
+def file_crc(path):
+    """ Returns the CRC32 of the whole file, read by chunks of 1 MB."""
+
+    crc = 0                                # CRC32 initial value
+    with open(path, 'rb') as f:            # file is opened
+        for chunk in iter(lambda: f.read(1048576), b''):   # iteration over the file chunks
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+
+
+
+
+def table_ok(path, name, full=False):
+    """ Returns True when the table file has the expected size and checksum (of the whole file when full)."""
+
+    size, sample, crc = tables[name]       # expected size and checksums
+    try:                                   # attempt
+        if os.path.getsize(path) != size:  # case of missing, or truncated, table
+            return False
+        return file_crc(path) == crc if full else blocks_crc(path, size) == sample
+    except OSError:                        # exception is raised if the file is missing or not readable
+        return False
+
+
+
+
+
+
+def check(full=False, tables_folder=folder):
+    """ Returns the list of the missing or damaged table files (empty when all the tables are fine).
+        The quick check (sizes, and three blocks per file) takes a few milliseconds; full=True reads the whole files."""
+
+    return [name for name in tables if not table_ok(os.path.join(tables_folder, name), name, full)]
+
+
+
+
+
+
+def rebuilding():
+    """ Returns True while the tables are being rebuilt."""
+
+    return rebuild_state['status'] == 'running'
+
+
+
+
+
+
+def progress_text():
+    """ Returns a short text with the rebuild status, i.e. 'solver tables rebuild 35% (phase1_prun)'."""
+
+    state = rebuild_state                  # shorter variable name
+    if state['status'] == 'running':       # case of rebuild in progress
+        return f"solver tables rebuild {int(100 * state['progress'])}%" + (f" ({state['table']})" if state['table'] else '')
+    return f"solver tables rebuild {state['status']}" + (f": {state['message']}" if state['message'] else '')
+
+
+
+
+
+
+def start_rebuild(bad, tables_folder=folder):
+    """ Starts the rebuild of the bad tables (list of names) on a background thread, following the rebuild process.
+        Returns the rebuild_state dict, updated by the thread (status 'done' or 'failed' once completed)."""
+
+    with rebuild_lock:                     # one rebuild at the time
+        if not rebuilding():               # case no rebuild is running
+            rebuild_state.update({'status': 'running', 'tables': list(bad), 'table': '', 'progress': 0.0,
+                                  'message': ''})
+            threading.Thread(target=rebuild_run, args=(list(bad), tables_folder), daemon=True).start()
+    return rebuild_state
+
+
+
+
+
+
+def rebuild_run(bad, tables_folder):
+    """ Runs on the rebuild thread: The bad tables are generated by a separate process (the solver import) in the
+        build folder, verified, and then moved to the tables folder by os.replace (atomic, on the same file system)."""
+
+    tables_folder = os.path.abspath(tables_folder)   # tables folder
+    build = os.path.join(os.path.dirname(tables_folder), build_folder)   # build folder
+    build_tables = os.path.join(build, folder)       # tables folder within the build folder
+    try:                                   # attempt
+        shutil.rmtree(build, ignore_errors=True)     # left over of a previous rebuild is removed
+        os.makedirs(build_tables)          # build folder
+        for name in tables:                # iteration over the tables
+            if name not in bad:            # case of good table, needed to generate the bad ones
+                shutil.copyfile(os.path.join(tables_folder, name), os.path.join(build_tables, name))
+
+        # the solver import, on a separate process within the build folder, generates the missing tables
+        proc = subprocess.Popen([sys.executable, '-u', os.path.abspath(__file__), '--build'], cwd=build,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        total = sum([tables[name][0] for name in bad])   # bytes to be rebuilt
+        done = 0                           # bytes of the rebuilt tables
+        for line in proc.stdout:           # iteration over the solver prints (i.e. 'creating phase1_prun table...')
+            words = line.replace('.', ' ').split()   # words of the line (dots are printed as progress)
+            if 'creating' in words and words[-1] == 'table':   # case a new table is generated
+                if rebuild_state['table'] in bad:   # case a previous table has been generated
+                    done += tables[rebuild_state['table']][0]
+                rebuild_state['table'] = words[words.index('creating') + 1]
+                rebuild_state['progress'] = done / total
+            elif 'done:' in words and rebuild_state['table'] in bad:   # case of progress of the table generation
+                count, tot = words[words.index('done:') + 1].split('/')   # table entries done, and total
+                share = min(1, int(count) / max(1, int(tot)))   # share of the table done
+                rebuild_state['progress'] = (done + share * tables[rebuild_state['table']][0]) / total
+        if proc.wait() != 0:               # case the rebuild process failed
+            raise RuntimeError(f'rebuild process exit code {proc.returncode}')
+
+        for name in bad:                   # iteration over the rebuilt tables
+            if not table_ok(os.path.join(build_tables, name), name, full=True):   # case of wrong rebuilt table
+                raise RuntimeError(f'rebuilt table {name} does not match the expected checksum')
+        for name in bad:                   # iteration over the rebuilt tables
+            for attempt in range(replace_attempts):   # attempts to replace the table file
+                try:                       # attempt
+                    os.replace(os.path.join(build_tables, name), os.path.join(tables_folder, name))   # atomic replace
+                    break
+                except PermissionError:    # exception is raised on Windows, when the file is mapped by a process
+                    if attempt == replace_attempts - 1:   # case of last attempt
+                        raise RuntimeError(f'table {name} in use: close the solver service, and run the rebuild again')
+                    time.sleep(0.5)        # short sleep before a new attempt
+        shutil.rmtree(build, ignore_errors=True)   # build folder is removed
+        rebuild_state.update({'status': 'done', 'table': '', 'progress': 1.0, 'message': ''})
+    except Exception as e:                 # exception is raised on rebuild errors
+        rebuild_state.update({'status': 'failed', 'message': str(e)})
+
+
+
+
+
+
+def build():
+    """ Runs on the rebuild process, within the build folder: The solver import generates the missing tables."""
+
+    try:                                   # attempt
+        import solver                      # Kociemba solver, copied in robot folder
+    except ImportError:                    # exception is raised if no library in folder
+        import twophase.solver             # Kociemba solver installed
+
+
+
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # argument parser object creation
+    parser = argparse.ArgumentParser(description='Integrity check and rebuild of the solver tables')
+
+    # --full argument is added to the parser
+    parser.add_argument("--full", action='store_true',
+                        help="Checksum of the whole table files, instead of three blocks per file.")
+
+    # --rebuild argument is added to the parser
+    parser.add_argument("--rebuild", action='store_true',
+                        help="Rebuild of the missing or damaged tables (it can take half an hour).")
+
+    # --build argument is added to the parser (used by the rebuild process)
+    parser.add_argument("--build", action='store_true', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()   # argument parsed assignement
+
+    if args.build:                         # case of rebuild process
+        build()
+        sys.exit(0)
+
+    t = time.time()                        # time reference
+    bad = check(args.full)                 # missing or damaged tables
+    print(f"\n{len(tables)} tables checked in {round(1000 * (time.time() - t), 1)} ms, "
+          f"missing or damaged: {', '.join(bad) if bad else 'none'}")
+    if bad and args.rebuild:               # case of tables to be rebuilt
+        start_rebuild(bad)                 # rebuild is started
+        while rebuilding():                # iteration until the rebuild is completed
+            print(f'\r{progress_text()}          ', end='', flush=True)
+            time.sleep(1)
+        print(f'\r{progress_text()}          ')
+    print()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Memory-mapped loading of the Kociemba solver tables, for the PC side of CUBOTino
+#
+# When imported, the solver modules (moves, symmetries, pruning, coord) read each table file from the twophase
+# folder into an array ( array.fromfile() ), by copying all the tables (many MB) in every process using the solver.
+# This module imports the solver with the tables memory-mapped read-only, instead:
+#  - The solver modules are imported by a loader giving them their own 'import' function (module builtins), so their
+#    'import array as ar' gets a copy of the array module, whose array() returns a placeholder for the empty arrays:
+#    The placeholder fromfile() maps the table file (mmap, read-only) and keeps a memoryview of it, cast to the array
+#    type code. The array module itself is not patched, so other threads keep using it meanwhile
+#  - Right after fromfile(), the placeholder in the solver module globals is replaced by its memoryview, so the tables
+#    still missing (generated by the solver while it is imported) are built on the mapped ones
+#  - Once imported, the placeholders left in the solver modules globals are replaced by their memoryviews, and the
+#    array module copy by the array module
+#  - The memoryviews are indexed as the arrays, so the solver code is unchanged
+# The import time does not depend anymore on the tables size (pages are read from disk when first used), and the
+# processes using the solver (solver service, webcam, batch tools) share the same copy of the tables pages.
+# Tables still missing are generated by the solver as usual (arrays with initializer are real arrays).
+#
+#############################################################################################################
+"""
+
+import array                               # array library, copied for the solver modules while they are imported
+import importlib                           # importlib library, to import the solver by module name
+import importlib.machinery                 # importlib machinery, to find and load the solver modules
+import importlib.util                      # importlib utilities, to find the solver module
+import threading                           # threading library, to serialize the patched imports
+import builtins                            # builtins module, with the import function of the solver modules
+import types                               # types library, for the array module copy
+import os                                  # os library, for the solver folder
+import mmap                                # mmap library, to map the table files read-only
+import sys                                 # sys library, for the modules imported with the solver and their globals
+
+
+
+
+# Global variables
+
+real_array = array.array                   # array class, for the tables with initializer
+import_lock = threading.Lock()             # lock to serialize the patched imports
+mapped = True                              # False to import the solver with the tables read as arrays
+tables = {}                                # dict of the mapped tables, as file name: (mmap object, memoryview)
+
+
+
+
+
+
+class MappedTable:
+    """ Placeholder of an empty array, created by the solver modules before reading a table from file.
+        Method fromfile() maps the table file read-only, as a memoryview cast to the array type code, and it replaces
+        the placeholder by the memoryview in the globals of the solver module reading the table."""
+
+    def __init__(self, typecode):
+        self.typecode = typecode                        # array type code, i.e. 'H'
+        self.itemsize = real_array(typecode).itemsize   # size in bytes of the array items
+        self.view = None                                # memoryview of the table file
+
+    def fromfile(self, fh, n):
+        fname = fh.name                                 # table file name (path)
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)   # table file mapped read-only
+        if len(mm) < n * self.itemsize:                 # case of truncated table file
+            raise EOFError(f'table file {fname} is truncated')   # as per array.fromfile()
+        self.view = memoryview(mm).cast(self.typecode)[:n]        # first n items, as per array.fromfile()
+        tables[fname] = (mm, self.view)                 # references are kept, for the tables report
+        namespace = sys._getframe(1).f_globals          # globals of the solver module reading the table
+        for key, value in list(namespace.items()):      # iteration over the module globals
+            if value is self:                           # case of this placeholder (i.e. 'flip_move')
+                namespace[key] = self.view              # memoryview, already for the tables generated later
+
+
+
+
+
+
+def patched_array(typecode, *initializer):
+    """ Replaces array.array() for the solver modules being imported: Empty arrays are placeholders of mapped tables."""
+
+    if initializer:                                     # case of array with initializer (i.e. table generation)
+        return real_array(typecode, *initializer)       # array, as per array.array()
+    return MappedTable(typecode)                        # placeholder of a table to be mapped
+
+patched_module = types.ModuleType('array')              # copy of the array module, for the solver modules being imported
+patched_module.__dict__.update(vars(array))             # array module content
+patched_module.array = patched_array                    # array() returns the placeholders of the empty arrays
+
+
+
+
+
+
+def solver_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """ Import function of the solver modules being imported: The array module is replaced by its patched copy."""
+
+    if name == 'array' and level == 0:                  # case of the array module
+        return patched_module                           # patched copy of the array module
+    return builtins.__import__(name, globals, locals, fromlist, level)   # import, as per the import statement
+
+
+
+
+
+
+class MappedLoader:
+    """ Loader of the solver modules, executing them with solver_import() as import function (module builtins)."""
+
+    def __init__(self, loader):
+        self.loader = loader                            # loader of the module, as found by the path finder
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)          # module creation, as per the path finder loader
+
+    def exec_module(self, module):
+        module.__builtins__ = dict(vars(builtins), __import__=solver_import)   # builtins of the module
+        self.loader.exec_module(module)                 # module code is executed
+
+
+
+
+
+
+class MappedFinder:
+    """ Finder of the modules in the solver folder, placed first on sys.meta_path while the solver is imported."""
+
+    def __init__(self, folder):
+        self.folder = folder                            # folder of the solver modules
+
+    def find_spec(self, name, path=None, target=None):
+        spec = importlib.machinery.PathFinder.find_spec(name, path)   # module spec, as per the import system
+        if spec is None or not spec.origin or os.path.dirname(os.path.abspath(spec.origin)) != self.folder:
+            return None                                 # case of module not in the solver folder (import as usual)
+        if not isinstance(spec.loader, importlib.machinery.SourceFileLoader):   # case of not a source module
+            return None
+        spec.loader = MappedLoader(spec.loader)         # module is executed with the solver import function
+        return spec
+
+
+
+
+
+
+def import_mapped(module_name):
+    """ Imports the module (i.e. 'twophase.solver') with the solver tables memory-mapped, and returns it.
+        The placeholders left in the globals of the modules imported with it are replaced by their memoryviews.
+        With mapped set False, the module is imported as usual (tables read into arrays)."""
+
+    if not mapped or module_name in sys.modules:        # case of plain import, or module already imported
+        return importlib.import_module(module_name)
+
+    with import_lock:                                   # one patched import at the time
+        spec = importlib.util.find_spec(module_name)    # solver module spec (the parent package is imported)
+        if spec is None or not spec.origin:             # case the module is not found
+            return importlib.import_module(module_name) # ModuleNotFoundError is raised, as per the import statement
+        finder = MappedFinder(os.path.dirname(os.path.abspath(spec.origin)))   # finder of the solver modules
+        before = set(sys.modules)                       # modules imported before the solver
+        sys.meta_path.insert(0, finder)                 # solver modules are loaded by the finder
+        try:                                            # attempt
+            module = importlib.import_module(module_name)   # module is imported (exceptions are raised)
+        finally:                                        # the finder is always removed
+            sys.meta_path.remove(finder)
+
+        for name in set(sys.modules) - before:          # iteration over the modules imported with the solver
+            namespace = vars(sys.modules[name])         # module globals
+            if not isinstance(getattr(sys.modules[name], '__loader__', None), MappedLoader):   # case of other module
+                continue
+            namespace['__builtins__'] = builtins        # builtins of the module, as per a plain import
+            for key, value in list(namespace.items()):  # iteration over the module globals
+                if isinstance(value, MappedTable):      # case of a table placeholder
+                    namespace[key] = value.view if value.view is not None else real_array(value.typecode)
+                elif value is patched_module:           # case of the array module copy (i.e. 'ar')
+                    namespace[key] = array              # array module, for the arrays created later
+    return module
+
+
+
+
+
+
+def tables_report():
+    """ Returns a dict with the amount of mapped tables and their size in MB."""
+
+    size = sum([len(mm) for mm, view in tables.values()])   # total size of the mapped tables
+    return {'mapped_tables': len(tables), 'mapped_MB': round(size / 1048576, 1)}
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Benchmark of the Kociemba solver tables loading: read into arrays vs memory-mapped (Cubotino_tables).
+#
+# Each mode runs in fresh processes, that import the solver and solve random cubes, by reporting:
+#  - The cold start time (solver import, with the tables loading) and the first solve time
+#  - The average solve time of the following cubes
+#  - The process memory after the solves: RSS, split in private (anonymous) and file-backed pages (Linux only);
+#    The file-backed pages of the mapped tables are shared by all the processes using the solver
+#
+# Run from the PC_files folder, as the solver tables are in the twophase subfolder, i.e.:
+#   python Cubotino_tables_benchmark.py --cubes 20 --runs 3
+#
+#############################################################################################################
+"""
+
+import argparse
+
+# argument parser object creation
+parser = argparse.ArgumentParser(description='Benchmark of the solver tables loading')
+
+# --cubes argument is added to the parser
+parser.add_argument("-c", "--cubes", type=int, default=20,
+                    help="Amount of random cubes solved by each process. Default 20.")
+
+# --runs argument is added to the parser
+parser.add_argument("--runs", type=int, default=3,
+                    help="Amount of processes per mode (the best cold start is reported). Default 3.")
+
+# --child argument is added to the parser (used internally, to run one process of the benchmark)
+parser.add_argument("--child", type=str, default='',
+                    help="Internal: 'mapped' or 'arrays' to run one benchmark process.")
+
+args = parser.parse_args()   # argument parsed assignement
+
+
+import subprocess                          # subprocess library, to run each benchmark process
+import resource                            # resource library, for the max RSS when /proc is not available
+import time                                # time library is imported
+import sys                                 # sys library, for the python executable
+import ast                                 # ast library, to parse the benchmark processes results
+
+
+
+
+
+
+def memory_MB():
+    """ Returns a dict with the process RSS, anonymous RSS and file-backed RSS (MB), from /proc/self/status.
+        Only the max RSS is returned when /proc is not available."""
+
+    mem = {}                                                    # dict of the memory values
+    try:                                                        # attempt
+        with open('/proc/self/status', 'r') as f:               # process status file (Linux)
+            for line in f:                                      # iteration over the file lines
+                key = line.split(':')[0]                        # key of the line
+                if key in ('VmRSS', 'RssAnon', 'RssFile'):      # case of RSS values (in kB)
+                    mem[key] = round(int(line.split()[1]) / 1024, 1)
+    except:                                                     # exception is raised if /proc is not available
+        mem['VmRSS'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return mem
+
+
+
+
+
+
+def child(mode, cubes):
+    """ Runs one benchmark process: Imports the solver (mapped or arrays tables) and solves random cubes.
+        The results dict is printed on the last line."""
+
+    import Cubotino_tables as ct                                # memory-mapped solver tables
+    ct.mapped = mode == 'mapped'                                # tables loading mode
+    start = time.perf_counter()                                 # time reference
+    import Cubotino_solver as cs                                # solver is imported, with the tables
+    cold_start = time.perf_counter() - start                    # solver import time
+
+    solve_times = []                                            # list of the solve times
+    for i in range(cubes):                                      # iteration over the cubes
+        cc = cs.cubie.CubieCube()                               # cube in cubie reppresentation
+        cc.randomize()                                          # randomized cube in cubie reppresentation
+        t = time.perf_counter()                                 # time reference
+        cs.sv.solve(cc.to_facelet_cube().to_string(), 20, 1)    # Kociemba solver is called
+        solve_times.append(time.perf_counter() - t)             # solve time
+
+    results = {'cold_start': cold_start, 'first_solve': solve_times[0],
+               'solve': sum(solve_times[1:]) / max(1, len(solve_times) - 1)}
+    results.update(memory_MB())                                 # process memory
+    results.update(ct.tables_report())                          # mapped tables
+    print(repr(results))                                        # results on the last line
+
+
+
+
+
+
+def run(mode, cubes, runs):
+    """ Runs the benchmark processes of a mode, and returns the results of the one with the best cold start."""
+
+    best = None                                                 # results of the best process
+    for r in range(runs):                                       # iteration over the processes
+        out = subprocess.run([sys.executable, __file__, '--child', mode, '--cubes', str(cubes)],
+                             capture_output=True, text=True).stdout   # benchmark process output
+        results = ast.literal_eval(out.strip().splitlines()[-1])      # results dict, from the last line
+        if best is None or results['cold_start'] < best['cold_start']:
+            best = results
+    return best
+
+
+
+
+
+
+if __name__ == "__main__":
+    if args.child:                                              # case of a benchmark process
+        child(args.child, args.cubes)
+    else:                                                       # case of the benchmark report
+        print(f'\nsolver tables: arrays vs memory-mapped ({args.runs} processes each, {args.cubes} cubes per process)\n')
+        for mode in ('arrays', 'mapped'):                       # iteration over the tables loading modes
+            r = run(mode, args.cubes, args.runs)                # results of the best process
+            print(f'{mode}:')
+            print(f'  cold start  : {round(r["cold_start"], 3)} secs  (solver import, tables loading)')
+            print(f'  first solve : {round(r["first_solve"], 3)} secs,  following solves {round(r["solve"], 3)} secs')
+            print(f'  memory      : RSS {r.get("VmRSS")} MB,  private {r.get("RssAnon", "n.a.")} MB,  '
+                  f'file-backed {r.get("RssFile", "n.a.")} MB (shared)')
+            if r['mapped_tables']:                              # case of mapped tables
+                print(f'  mapped      : {r["mapped_tables"]} tables, {r["mapped_MB"]} MB')
+            print()
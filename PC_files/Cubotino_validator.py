@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+#############################################################################################################
+# Andrea Favero
+#
+# Cube status validator, for the PC side of CUBOTino
+#
+# An invalid cube status (i.e. a facelet color wrongly detected by the webcam) was only detected by the solver,
+# returning an 'Error' string: Each failed check costs a solver call.
+# This module checks the cube definition string in some microseconds, without the solver, by verifying:
+#  - 54 facelets, 6 different center colors, and 9 facelets of each color
+#  - Valid corner and edge cubies (colors combination), each cubie present once
+#  - Corners twist sum, edges flip sum, and permutation parity (corners vs edges)
+# It returns an error code, and the list of the suspect facelets (as per the solver Facelet names, i.e. 'F5').
+# The cube definition string can use any character for the colors, the centers define the faces as per URFDLB order;
+# When the face letters are used (as for the solver), the centers must be on their faces (i.e. 'U' at U5).
+#
+#############################################################################################################
+"""
+
+
+
+
+# Global variables
+
+CUBE_OK = 0                                # error codes
+ERR_LENGTH = 1
+ERR_CENTERS = 2
+ERR_COLORS = 3
+ERR_CORNER = 4
+ERR_EDGE = 5
+ERR_CORNER_TWICE = 6
+ERR_EDGE_TWICE = 7
+ERR_TWIST = 8
+ERR_FLIP = 9
+ERR_PARITY = 10
+
+error_messages = {CUBE_OK: 'Cube ok',
+                  ERR_LENGTH: 'the cube definition string does not have 54 facelets',
+                  ERR_CENTERS: 'the center facelets do not have 6 different colors',
+                  ERR_COLORS: 'there are not exactly 9 facelets of each color',
+                  ERR_CORNER: 'invalid colors combination on a corner',
+                  ERR_EDGE: 'invalid colors combination on an edge',
+                  ERR_CORNER_TWICE: 'a corner is present more than once',
+                  ERR_EDGE_TWICE: 'an edge is present more than once',
+                  ERR_TWIST: 'total corner twist is wrong (a corner is twisted)',
+                  ERR_FLIP: 'total edge flip is wrong (an edge is flipped)',
+                  ERR_PARITY: 'permutation parity is wrong (two cubies are swapped)'}
+
+faces = 'URFDLB'                           # faces order, as per the cube definition string
+facelet_names = [f + str(i) for f in faces for i in range(1, 10)]   # facelets names: 'U1' to 'B9'
+centers = (4, 13, 22, 31, 40, 49)          # indexes of the center facelets
+
+# facelets of the corners and edges positions, and their faces, as per the solver definitions (cornerFacelet, etc)
+corner_facelets = ((8, 9, 20), (6, 18, 38), (0, 36, 47), (2, 45, 11), (29, 26, 15), (27, 44, 24), (33, 53, 42), (35, 17, 51))
+edge_facelets = ((5, 10), (7, 19), (3, 37), (1, 46), (32, 16), (28, 25), (30, 43), (34, 52), (23, 12), (21, 41), (50, 39), (48, 14))
+corner_faces = ('URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB')
+edge_faces = ('UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR')
+corner_idx = {c: i for i, c in enumerate(corner_faces)}   # dict from corner faces (U or D first) to corner index
+edge_idx = {e: i for i, e in enumerate(edge_faces)}       # dict from edge faces to edge index
+
+all_corner_facelets = [f for c in corner_facelets for f in c]   # facelets of all the corners
+all_edge_facelets = [f for e in edge_facelets for f in e]       # facelets of all the edges
+
+
+
+
+
+
+def names(facelets):
+    """ Returns the list of facelets names (i.e. ['U9', 'R1', 'F3']) from the list of facelets indexes."""
+
+    return [facelet_names[f] for f in sorted(facelets)]
+
+
+
+
+
+
+def parity(perm):
+    """ Returns the parity (0 even, 1 odd) of the permutation, as count of the inversions."""
+
+    p = 0                                  # inversions counter
+    n = len(perm)                          # permutation length
+    for i in range(n):
+        for j in range(i + 1, n):
+            if perm[i] > perm[j]:          # case of inversion
+                p += 1
+    return p % 2
+
+
+
+
+
+
+def validate(cube_defstr):
+    """ Validates the cube definition string, without the solver.
+        Returns the error code (CUBE_OK when valid) and the list of the suspect facelets names (i.e. ['U9', 'R1'])."""
+
+    s = cube_defstr.strip()                # cube definition string, without the line feed
+    if len(s) != 54:                       # case the string does not have 54 facelets
+        return ERR_LENGTH, []
+
+    center_cols = [s[c] for c in centers]  # colors of the center facelets
+    if len(set(center_cols)) != 6:         # case of centers with the same color
+        return ERR_CENTERS, names([c for c in centers if center_cols.count(s[c]) > 1])
+    if set(center_cols) == set(faces) and ''.join(center_cols) != faces:   # case of face letters on wrong centers
+        return ERR_CENTERS, names([c for i, c in enumerate(centers) if s[c] != faces[i]])
+
+    face = {col: faces[i] for i, col in enumerate(center_cols)}   # dict from color to face, as per the centers
+    s = ''.join([face.get(col, '?') for col in s])   # cube string as per faces, '?' for colors not on the centers
+    counts = {f: s.count(f) for f in faces}  # facelets per face color
+    if s.count('?') or min(counts.values()) != 9:    # case not all the colors are 9 times
+        # facelets with unknown colors, or with colors in excess, are the suspect ones
+        return ERR_COLORS, names([f for f in range(54) if (s[f] == '?' or counts[s[f]] > 9) and f not in centers])
+
+    cp, co = [], []                        # corners permutation and orientation
+    for c in corner_facelets:              # iteration over the corner positions
+        cols = s[c[0]] + s[c[1]] + s[c[2]] # faces of the corner facelets
+        for ori in range(3):               # iteration over the corner orientations
+            if cols[ori] in 'UD':          # case of the U or D facelet
+                break
+        else:                              # case the corner has no U or D facelet
+            return ERR_CORNER, names(c)
+        idx = corner_idx.get(cols[ori] + cols[(ori + 1) % 3] + cols[(ori + 2) % 3])   # corner index
+        if idx is None:                    # case of an invalid corner
+            return ERR_CORNER, names(c)
+        cp.append(idx)
+        co.append(ori)
+    if len(set(cp)) != 8:                  # case of a corner present more than once
+        return ERR_CORNER_TWICE, names([f for i, c in enumerate(corner_facelets) if cp.count(cp[i]) > 1 for f in c])
+
+    ep, eo = [], []                        # edges permutation and orientation
+    for e in edge_facelets:                # iteration over the edge positions
+        cols = s[e[0]] + s[e[1]]           # faces of the edge facelets
+        if cols in edge_idx:               # case of an edge not flipped
+            ep.append(edge_idx[cols])
+            eo.append(0)
+        elif cols[::-1] in edge_idx:       # case of a flipped edge
+            ep.append(edge_idx[cols[::-1]])
+            eo.append(1)
+        else:                              # case of an invalid edge
+            return ERR_EDGE, names(e)
+    if len(set(ep)) != 12:                 # case of an edge present more than once
+        return ERR_EDGE_TWICE, names([f for i, e in enumerate(edge_facelets) if ep.count(ep[i]) > 1 for f in e])
+
+    if sum(co) % 3 != 0:                   # case of a twisted corner
+        return ERR_TWIST, names(all_corner_facelets)
+    if sum(eo) % 2 != 0:                   # case of a flipped edge
+        return ERR_FLIP, names(all_edge_facelets)
+    if parity(cp) != parity(ep):           # case of two swapped cubies
+        return ERR_PARITY, names(all_corner_facelets + all_edge_facelets)
+    return CUBE_OK, []
+
+
+
+
+
+
+def error_string(code, suspects):
+    """ Returns the error string, starting by 'Error' as the solver ones, with the suspect facelets names."""
+
+    if code == CUBE_OK:                    # case of a valid cube
+        return error_messages[code]
+    text = 'Error: ' + error_messages[code]   # error string
+    if suspects and len(suspects) <= 12:   # case of a few suspect facelets
+        text += ' (suspect facelets: ' + ', '.join(suspects) + ')'
+    return text
@@ -44,24 +44,10 @@ except:
     pass
 
 
-# there are two import attempts for Kociemba solver
-try:                                                  # attempt
-    import solver as sv                               # import Kociemba solver copied in robot folder
-    print('\nimported the installed twophase solver')  # feedback is printed to the terminal
-    solver_found = True                               # boolean to track no exception on import the copied solver
-except:                                               # exception is raised if no library in folder or other issues
-    solver_found = False                              # boolean to track exception on importing the copied solver
-    
-if not solver_found:                                  # case the library was not in folder
-    try:                                              # attempt
-        import twophase.solver as sv                  # import Kociemba solver installed
-        print('\nimported the copied twophase solver') # feedback is printed to the terminal
-        twophase_solver_found = True                  # boolean to track no exception on import the installed solver
-    except:                                           # exception is raised if no library in venv or other issues
-        twophase_solver_found = False                 # boolean to track exception on importing the installed solver
-
-if not solver_found and not twophase_solver_found:    # case no one solver has been imported
-    print('\n(Kociemba) twophase solver not found') # feedback is printed to the terminal
+# the Kociemba solver runs on the solver service process, that loads the solver tables once
+import Cubotino_solver_service as ss                  # client of the solver service process (by Andrea Favero)
+import Cubotino_validator as cv                       # cube status validator, without the solver (by Andrea Favero)
+import Cubotino_cube_state as cst                     # compact cube status (by Andrea Favero)
 print('====================================================================================\n')
 
 
@@ -1628,11 +1614,8 @@ def cube_string(cube_status):
     All uppercase letters indicating the color's initial
     Argument is the cube status generated, whein the values are the facelet colors (full color name).'''
     
-    cube_in_letters = {'white':'U', 'red':'R', 'green': 'F', 'yellow':'D', 'orange':'L', 'blue':'B'}  
-    string=''
-    for color in cube_status.values():         
-        string=string+str(cube_in_letters[color])
-    return string
+    face_colors = ('white', 'red', 'green', 'yellow', 'orange', 'blue')   # colors of the faces, in URFDLB order
+    return cst.CubeState.from_colors(cube_status.values(), face_colors).to_string()
 
 
 
@@ -1644,8 +1627,15 @@ def cube_solution(cube_string):
     ''' Calls the Hegbert Kociemba solver, and returns the solution's moves
     from: https://github.com/hkociemba/RubiksCube-TwophaseSolver 
     (Solve Rubik's Cube in less than 20 moves on average with Python)
-    The returned string is slightly manipulated to have the moves amount at the start.'''    
-    s = sv.solve(cube_string, 20, 2)  # solves with a maximum of 20 moves and a timeout of 2 seconds for example
+    The returned string is slightly manipulated to have the moves amount at the start.
+    The cube status is validated before, so an incoherent detection does not cost a solver call.'''    
+    code, suspects = cv.validate(cube_string) # cube status is validated, without the solver
+    if code != cv.CUBE_OK:            # case of incoherent cube status (the solver is not called)
+        if debug:                     # case the debug variable is set True
+            print(f'Cube status validation: {cv.error_string(code, suspects)}')
+        return cv.error_string(code, suspects), 'Error'   # error string, and short error string
+    
+    s, timing = ss.solve(cube_string, 20, 2)  # solves with a maximum of 20 moves and a timeout of 2 seconds, on the solver service
     solution = s[:s.find('(')]        # solution capture the sequence of manouvre
     
     # solution_text places the amount of moves first, and the solution (sequence of manouvere) afterward